@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.templatetags.static import static
 from django.urls import reverse_lazy
@@ -50,11 +51,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'hall_booking.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'hall_booking.routers.ReplicaStickinessMiddleware',  # before sessions so session writes count as writes
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'hall_booking.profiling.ProfilingMiddleware',
+    'hall_booking.nplusone.NPlusOneMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,13 +88,108 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite profile, applied to every new connection:
+# - `timeout` is SQLite's busy_timeout in seconds
+# - hot writes (hall_booking.writelock.serialized_write) use BEGIN IMMEDIATE, so a transaction that
+#   reads then writes waits for `timeout` instead of failing at once when it upgrades its read lock;
+#   every other transaction stays DEFERRED and never takes the write lock for a read
+# - SQLITE_WAL=1 switches the database file to WAL so readers continue while a write is in progress.
+#   journal_mode is stored in the file itself, so it is opt-in: the db.sqlite3 shipped with the
+#   repository stays in rollback-journal mode unless you ask for it
+SQLITE_WAL = os.environ.get('SQLITE_WAL', '') == '1'
+
+SQLITE_PRAGMAS = {
+    **({
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # durable across application crashes; WAL keeps the file consistent
+    } if SQLITE_WAL else {}),
+    'cache_size': -20000,  # KiB of page cache per connection
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_DATABASE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'db.sqlite3',
+    'OPTIONS': {
+        'timeout': 20,
+        'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    },
+}
+
+# PostgreSQL (DB_ENGINE=postgresql, needs `pip install "psycopg[binary,pool]"`):
+# - CONN_MAX_AGE keeps one connection per worker thread open between requests
+# - DB_POOL=1 uses psycopg's connection pool instead; Django requires CONN_MAX_AGE = 0 with a pool
+# - the hall_booking 0014 migration adds the Postgres-only features (hall_booking.pgfeatures,
+#   `manage.py postgres_features`)
+DB_POOL = os.environ.get('DB_POOL', '') == '1'
+
+POSTGRES_DATABASE = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': os.environ.get('DB_NAME', 'hall_booking'),
+    'USER': os.environ.get('DB_USER', ''),
+    'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+    'HOST': os.environ.get('DB_HOST', ''),
+    'PORT': os.environ.get('DB_PORT', ''),
+    'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),  # seconds to wait for a free connection
+        },
+    } if DB_POOL else {},
+}
+
 DATABASES = {
+    'default': POSTGRES_DATABASE if os.environ.get('DB_ENGINE', 'sqlite') == 'postgresql' else SQLITE_DATABASE,
+}
+
+# Read replica for reports and charts (hall_booking.routers): DB_REPLICA_NAME (a second SQLite file or
+# database name) and/or DB_REPLICA_HOST; every other setting is copied from the primary.
+# Without a replica alias the router leaves every query on `default`.
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default'].get('HOST', '')),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['hall_booking.routers.ReplicaRouter']
+REPLICA_DATABASE = 'replica'
+REPLICA_APP_LABELS = ['hall_booking']  # apps whose reads may go to the replica; sessions and auth never do
+REPLICA_STICKY_SECONDS = 5  # after a user writes, their requests read from the primary for this long
+REPLICA_STICKY_COOKIE = 'hb_primary'
+
+# Finished bookings (completed/cancelled/rejected) and read notifications older than this move to
+# the archive tables (hall_booking.archive, run `manage.py archive_bookings` from cron)
+ARCHIVE_AFTER_MONTHS = 12
+ARCHIVE_BATCH_SIZE = 500  # bookings moved per write transaction
+
+
+# Cache
+# L2 shared by all worker processes; hall_booking.cache keeps a bounded in-process L1 in front of it.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
+CACHE_L1_MAX_ENTRIES = 512
+CACHE_DEFAULT_TTL = 300  # seconds a value is served fresh
+CACHE_STALE_TTL = 60  # extra seconds a stale value is served while one request recomputes it
+CACHE_LOCK_TIMEOUT = 30
+CACHE_TAG_CHECK_INTERVAL = 1.0  # seconds a worker trusts its local copy of cache tag versions
+PAGE_CACHE_TTL = 600  # anonymous full-page cache (hall_booking.pagecache)
+PAGE_CACHE_MAX_AGE = 0  # browsers always revalidate with ETag / Last-Modified
+JSON_COMPRESS_MIN_BYTES = 1024  # JSON endpoints (hall_booking.api) compress payloads above this size
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,6 +235,79 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rows per transaction for populate_* / load_sample_data bulk upserts (hall_booking.seeding)
+SEED_BATCH_SIZE = 500
+
+# Per-view p95 latency / query-count budgets checked by benchmark_views
+BENCHMARK_BUDGETS_FILE = BASE_DIR / 'benchmarks' / 'budgets.json'
+
+# Local benchmark run history (SQLite) recorded by benchmark_views --record, read by bench_compare
+BENCHMARK_HISTORY_FILE = BASE_DIR / 'benchmarks' / 'history.sqlite3'
+
+# Per-request instrumentation (hall_booking.instrumentation)
+# Fraction of requests measured (Server-Timing, JSON log line, RouteStat); every request in development,
+# none in production unless set, e.g. INSTRUMENTATION_SAMPLE_RATE=0.01
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', 1.0 if DEBUG else 0.0))
+INSTRUMENTATION_DUPLICATE_THRESHOLD = 3  # identical query shapes per request reported as N+1 suspects
+INSTRUMENTATION_TRACEMALLOC = False  # peak allocation per request; slows sampled requests noticeably
+INSTRUMENTATION_ROUTE_STATS = True  # aggregate per-route totals into RouteStat (admin)
+INSTRUMENTATION_FLUSH_INTERVAL = 30  # seconds between RouteStat writes per process
+
+# On-demand request profiling for staff (hall_booking.profiling, admin-site/profiles/)
+PROFILER_DIR = BASE_DIR / 'profiles'
+PROFILER_MAX_CAPTURES = 50  # oldest captures are deleted beyond this count...
+PROFILER_MAX_BYTES = 100 * 1024 * 1024  # ...or this total size
+PROFILER_TOKEN_MAX_AGE = 3600  # seconds a signed trigger link stays valid
+PROFILER_SAMPLE_INTERVAL = 0.005  # seconds between stack samples in "sample" mode
+
+# Hot writes (confirm_booking, slot holds, marking notifications read) queue behind a per-process
+# lock on SQLite before taking the database write lock (hall_booking.writelock)
+SQLITE_SERIALIZE_WRITES = True
+SQLITE_WRITE_LOCK_TIMEOUT = 30  # seconds to wait for the in-process lock
+
+# Prometheus-format metrics at /metrics (hall_booking.metrics)
+METRICS_DIR = None  # shared directory for per-process snapshots; None = this process only
+METRICS_FLUSH_INTERVAL = 5  # seconds between snapshot writes when METRICS_DIR is set
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # bearer token for scrapers; empty = DEBUG or staff only
+
+# Repeated lazy relation loads per request (hall_booking.nplusone): off / log / warn / raise
+NPLUSONE_MODE = 'log' if DEBUG else 'off'
+NPLUSONE_THRESHOLD = 3  # loads of the same relation from the same call site
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        # سطر JSON كما هو ليسهل جمعه وتحليله
+        'structured': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'requests': {'class': 'logging.StreamHandler', 'formatter': 'structured'},
+    },
+    'loggers': {
+        'hall_booking.requests': {'handlers': ['requests'], 'level': 'INFO', 'propagate': False},
+        'hall_booking.nplusone': {'handlers': ['requests'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# Email
+# في بيئة التطوير تُطبع الرسائل في الطرفية بدلاً من إرسالها
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'no-reply@a7jazili.com'
+SITE_DOMAIN = 'localhost:8000'
+SITE_USE_HTTPS = False
+
+# Background jobs (hall_booking.jobqueue, executed by `manage.py run_worker`)
+JOB_QUEUE_MAX_ATTEMPTS = 5
+JOB_QUEUE_VISIBILITY_TIMEOUT = 300  # seconds a claimed job is hidden from other workers
+JOB_QUEUE_RETRY_BACKOFF = 30  # base delay (seconds) for exponential retry backoff
+JOB_QUEUE_MAX_BACKOFF = 3600
+
+# Booking lifecycle sweeps (hall_booking.lifecycle)
+BOOKING_REMINDER_WINDOW_HOURS = 24
+BOOKING_PENDING_TTL_HOURS = 72  # pending requests older than this are expired (cancelled)
+SLOT_HOLD_TTL_MINUTES = 15  # how long a wizard time selection holds the slot
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
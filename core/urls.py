@@ -60,6 +60,8 @@ urlpatterns = [
     # Add authentication URLs for admin theme compatibility
     path('accounts/login/', auth_views.LoginView.as_view(), name='login'),
     path('accounts/logout/', auth_views.LogoutView.as_view(), name='logout'),
+    path('accounts/reset/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(), name='password_reset_confirm'),
+    path('accounts/reset/done/', auth_views.PasswordResetCompleteView.as_view(), name='password_reset_complete'),
     
     path('', include('hall_booking.urls')),
     path('', views.home, name='index'),  # Add index URL for admin theme compatibility
@@ -12,14 +12,22 @@ from django.urls import path
 from django.shortcuts import render
 from django.db.models import Count, Sum, Avg, Q
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
+from django.utils.decorators import method_decorator
 from datetime import datetime, timedelta
+import uuid
+from urllib.parse import urlencode
 from unfold.admin import ModelAdmin, TabularInline, StackedInline
 from unfold.decorators import display
 from unfold.contrib.filters.admin import RangeDateFilter
 from .models import (Category, Hall, Booking, Contact, HallImage, HallManager, 
                     Notification, Governorate, City, HallService, HallMeal, 
-                    BookingService, BookingMeal, SiteSettings)
+                    BookingService, BookingMeal, SiteSettings, BookingStatusEvent,
+                    BackgroundJob, SlotHold, RouteStat, BookingArchive, NotificationArchive,
+                    bulk_change_status)
+from . import profiling, stats
+from .routers import use_replica
+from .api import json_endpoint
 
 # تخصيص لوحة الإدارة
 class HallBookingAdminSite(AdminSite):
@@ -35,8 +43,51 @@ class HallBookingAdminSite(AdminSite):
             path('statistics/api/bookings-chart/', self.admin_view(self.bookings_chart_api), name='bookings_chart_api'),
             path('statistics/api/revenue-chart/', self.admin_view(self.revenue_chart_api), name='revenue_chart_api'),
             path('statistics/api/halls-chart/', self.admin_view(self.halls_chart_api), name='halls_chart_api'),
+            path('profiles/', self.admin_view(self.profiles_view), name='profiles'),
+            path('profiles/<str:capture_id>/', self.admin_view(self.profile_detail_view), name='profile_detail'),
+            path('profiles/<str:capture_id>/download/', self.admin_view(self.profile_download_view),
+                 name='profile_download'),
         ]
         return custom_urls + urls
+
+    def profiles_view(self, request):
+        """قائمة التقاطات تحليل الأداء وإنشاء روابط تفعيل موقّعة"""
+        link = None
+        if request.method == 'POST':
+            target = request.POST.get('path', '').strip() or '/'
+            mode = request.POST.get('mode', 'cprofile')
+            if mode in profiling.MODES and target.startswith('/'):
+                path_only = target.split('?', 1)[0]
+                separator = '&' if '?' in target else '?'
+                token = profiling.make_token(mode, path=path_only)
+                link = request.build_absolute_uri(f"{target}{separator}{urlencode({profiling.QUERY_PARAM: token})}")
+        context = {
+            'title': 'تحليل أداء الطلبات',
+            'captures': profiling.list_captures(),
+            'modes': profiling.MODES,
+            'link': link,
+            'header': 'X-HB-Profile',
+        }
+        return render(request, 'admin/profiles.html', context)
+
+    def profile_detail_view(self, request, capture_id):
+        capture = profiling.get_capture(capture_id)
+        if capture is None:
+            raise Http404('الالتقاط غير موجود')
+        meta, data_path = capture
+        context = {
+            'title': f"{meta['method']} {meta['path']}",
+            'capture': meta,
+            'summary': profiling.summarize(meta, data_path),
+        }
+        return render(request, 'admin/profile_detail.html', context)
+
+    def profile_download_view(self, request, capture_id):
+        capture = profiling.get_capture(capture_id)
+        if capture is None:
+            raise Http404('الالتقاط غير موجود')
+        _, data_path = capture
+        return FileResponse(open(data_path, 'rb'), as_attachment=True, filename=data_path.name)
     
     def dashboard_view(self, request):
         # إحصائيات عامة
@@ -204,39 +255,9 @@ class HallBookingAdminSite(AdminSite):
 admin_site = HallBookingAdminSite(name='hall_booking_admin')
 
 # إضافة views الإحصائيات مباشرة في admin
+@use_replica()
 def statistics_view(self, request):
     """صفحة الإحصائيات مع الرسوم البيانية"""
-    # إحصائيات عامة
-    total_halls = Hall.objects.count()
-    total_bookings = Booking.objects.count()
-    total_revenue = Booking.objects.filter(status='completed').aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # إحصائيات الحجوزات حسب الحالة
-    booking_stats = {
-        'pending': Booking.objects.filter(status='pending').count(),
-        'approved': Booking.objects.filter(status='approved').count(),
-        'completed': Booking.objects.filter(status='completed').count(),
-        'cancelled': Booking.objects.filter(status='cancelled').count(),
-        'rejected': Booking.objects.filter(status='rejected').count(),
-    }
-    
-    # إحصائيات القاعات حسب الفئة
-    category_stats = Category.objects.annotate(
-        hall_count=Count('hall'),
-        booking_count=Count('hall__bookings')
-    ).values('name', 'hall_count', 'booking_count')
-    
-    # إحصائيات المحافظات
-    governorate_stats = Governorate.objects.annotate(
-        hall_count=Count('hall'),
-        booking_count=Count('hall__bookings')
-    ).values('name', 'hall_count', 'booking_count')
-    
-    # أفضل القاعات (الأكثر حجزاً)
-    top_halls = Hall.objects.annotate(
-        booking_count=Count('bookings')
-    ).order_by('-booking_count')[:10]
-    
     context = {
         'title': 'الإحصائيات والتقارير',
         'site_title': self.site_title,
@@ -245,73 +266,31 @@ def statistics_view(self, request):
         'has_permission': True,
         'available_apps': self.get_app_list(request),
         'is_popup': False,
-        'total_halls': total_halls,
-        'total_bookings': total_bookings,
-        'total_revenue': total_revenue,
-        'booking_stats': booking_stats,
-        'category_stats': list(category_stats),
-        'governorate_stats': list(governorate_stats),
-        'top_halls': top_halls,
+        **stats.site_totals(),
+        'category_stats': stats.category_stats(),
+        'governorate_stats': stats.governorate_stats(),
+        'top_halls': stats.top_halls(),
     }
     
     return render(request, 'admin/statistics_new.html', context)
 
+@method_decorator(json_endpoint(tags=['stats'], max_age=60))
+@use_replica()
 def bookings_chart_api(self, request):
     """API للحصول على بيانات مخطط الحجوزات"""
-    months = []
-    bookings_data = []
-    
-    for i in range(12):
-        date = timezone.now() - timedelta(days=30*i)
-        month_name = date.strftime('%Y-%m')
-        booking_count = Booking.objects.filter(
-            created_at__year=date.year,
-            created_at__month=date.month
-        ).count()
-        
-        months.append(month_name)
-        bookings_data.append(booking_count)
-    
-    return JsonResponse({
-        'labels': months[::-1],
-        'data': bookings_data[::-1]
-    })
+    return JsonResponse(stats.monthly_bookings())
 
+@method_decorator(json_endpoint(tags=['stats'], max_age=60))
+@use_replica()
 def revenue_chart_api(self, request):
     """API للحصول على بيانات مخطط الإيرادات"""
-    months = []
-    revenue_data = []
-    
-    for i in range(12):
-        date = timezone.now() - timedelta(days=30*i)
-        month_name = date.strftime('%Y-%m')
-        revenue = Booking.objects.filter(
-            status='completed',
-            created_at__year=date.year,
-            created_at__month=date.month
-        ).aggregate(total=Sum('total_price'))['total'] or 0
-        
-        months.append(month_name)
-        revenue_data.append(float(revenue))
-    
-    return JsonResponse({
-        'labels': months[::-1],
-        'data': revenue_data[::-1]
-    })
+    return JsonResponse(stats.monthly_revenue())
 
+@method_decorator(json_endpoint(tags=['stats'], max_age=60))
+@use_replica()
 def halls_chart_api(self, request):
     """API للحصول على بيانات مخطط القاعات حسب الفئة"""
-    categories = Category.objects.annotate(
-        hall_count=Count('hall')
-    ).values('name', 'hall_count')
-    
-    labels = [cat['name'] for cat in categories]
-    data = [cat['hall_count'] for cat in categories]
-    
-    return JsonResponse({
-        'labels': labels,
-        'data': data
-    })
+    return JsonResponse(stats.halls_per_category())
 
 # ربط الدوال بالكلاس
 HallBookingAdminSite.statistics_view = statistics_view
@@ -378,10 +357,18 @@ class HallManagerInline(TabularInline):
     readonly_fields = ['assigned_at']
 
 # تخصيص نموذج القاعات
+class CityListFilter(admin.RelatedFieldListFilter):
+    """خيارات فلتر المدن مع محافظاتها في استعلام واحد (``City.__str__`` يعرض اسم المحافظة)"""
+
+    def field_choices(self, field, request, model_admin):
+        return [(city.pk, str(city)) for city in City.objects.select_related('governorate')]
+
+
 @admin.register(Hall)
 class HallAdmin(ModelAdmin):
     list_display = ['name', 'category', 'governorate', 'city', 'price_per_hour', 'status', 'created_at']
-    list_filter = ['status', 'category', 'governorate', 'city']
+    list_filter = ['status', 'category', 'governorate', ('city', CityListFilter)]
+    list_select_related = ['category', 'governorate', 'city__governorate']
     search_fields = ['name', 'description', 'address']
     readonly_fields = ['created_at', 'updated_at', 'get_thumbnail_preview']
     inlines = [HallImageInline, HallServiceInline, HallMealInline]
@@ -430,15 +417,26 @@ class BookingMealInline(TabularInline):
     autocomplete_fields = ['meal']
     readonly_fields = ['total_price']
 
+# سجل انتقالات الحالة (قراءة فقط)
+class BookingStatusEventInline(TabularInline):
+    model = BookingStatusEvent
+    extra = 0
+    fields = ['from_status', 'to_status', 'actor', 'created_at']
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 # تخصيص نموذج الحجوزات
 @admin.register(Booking)
 class BookingAdmin(ModelAdmin):
-    list_display = ['event_title', 'customer_name', 'hall', 'start_datetime', 'end_datetime', 'status', 'total_price', 'created_at']
+    list_display = ['reference', 'event_title', 'customer_name', 'hall', 'start_datetime', 'end_datetime', 'status', 'total_price', 'created_at']
     list_filter = ['status', 'created_at', 'hall__category']
     search_fields = ['customer_name', 'customer_email', 'event_title', 'hall__name']
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'total_price', 'updated_at']
-    inlines = [BookingServiceInline, BookingMealInline]
+    inlines = [BookingServiceInline, BookingMealInline, BookingStatusEventInline]
     
     fieldsets = (
         ('معلومات العميل', {
@@ -461,21 +459,58 @@ class BookingAdmin(ModelAdmin):
     
     actions = ['approve_bookings', 'reject_bookings', 'mark_as_completed']
     
+    def get_search_results(self, request, queryset, search_term):
+        # الرقم المرجعي أو رقم الحجز يُبحث عنهما بمطابقة تامة عبر الفهرس الفريد
+        term = search_term.strip().replace('-', '')
+        if len(term) == 12 and term.isalnum():
+            matches = queryset.filter(reference=term.upper())
+            if matches.exists():
+                return matches, False
+        if len(term) == 32:
+            try:
+                return queryset.filter(booking_id=uuid.UUID(term)), False
+            except ValueError:
+                pass
+        return super().get_search_results(request, queryset, search_term)
+
+    def save_model(self, request, obj, form, change):
+        obj._status_actor = request.user
+        super().save_model(request, obj, form, change)
+
     def approve_bookings(self, request, queryset):
-        updated = queryset.update(status='approved')
+        updated = bulk_change_status(queryset, 'approved', actor=request.user)
         self.message_user(request, f'تم الموافقة على {updated} حجز بنجاح.')
     approve_bookings.short_description = "الموافقة على الحجوزات المحددة"
     
     def reject_bookings(self, request, queryset):
-        updated = queryset.update(status='rejected')
+        updated = bulk_change_status(queryset, 'rejected', actor=request.user)
         self.message_user(request, f'تم رفض {updated} حجز بنجاح.')
     reject_bookings.short_description = "رفض الحجوزات المحددة"
     
     def mark_as_completed(self, request, queryset):
-        updated = queryset.update(status='completed')
+        updated = bulk_change_status(queryset, 'completed', actor=request.user)
         self.message_user(request, f'تم تحديد {updated} حجز كمكتمل بنجاح.')
     mark_as_completed.short_description = "تحديد الحجوزات كمكتملة"
 
+@admin.register(BookingStatusEvent)
+class BookingStatusEventAdmin(ModelAdmin):
+    list_display = ['booking', 'from_status', 'to_status', 'actor', 'created_at']
+    list_filter = ['to_status', 'from_status', ('created_at', RangeDateFilter)]
+    search_fields = ['booking__customer_name', 'booking__event_title', 'actor__username']
+    list_select_related = ['booking', 'booking__hall', 'actor']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['booking', 'from_status', 'to_status', 'actor', 'created_at']
+
+    # السجل إلحاقي فقط
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 # Inline للحجوزات ضمن صفحة المستخدم في لوحة الإدارة
 class BookingInline(TabularInline):
     model = Booking
@@ -776,6 +811,108 @@ class SiteSettingsAdmin(ModelAdmin):
         return super().changelist_view(request, extra_context)
 
 
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(ModelAdmin):
+    list_display = ['task_name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'task_name', ('created_at', RangeDateFilter)]
+    search_fields = ['task_name', 'dedup_key', 'locked_by']
+    ordering = ['-created_at']
+    readonly_fields = ['attempts', 'locked_until', 'locked_by', 'last_error', 'created_at', 'finished_at']
+
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        updated = queryset.filter(status='failed').update(
+            status='queued', run_at=timezone.now(), attempts=0, locked_until=None, finished_at=None
+        )
+        self.message_user(request, f'تمت إعادة جدولة {updated} مهمة.')
+    retry_jobs.short_description = "إعادة تشغيل المهام الفاشلة"
+
+
+@admin.register(SlotHold)
+class SlotHoldAdmin(ModelAdmin):
+    list_display = ['hall', 'start_datetime', 'end_datetime', 'expires_at', 'created_at']
+    list_filter = ['hall', ('expires_at', RangeDateFilter)]
+    ordering = ['-created_at']
+    readonly_fields = ['hall', 'owner_token', 'start_datetime', 'end_datetime', 'expires_at', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(BookingArchive)
+class BookingArchiveAdmin(ModelAdmin):
+    list_display = ['reference', 'hall', 'customer_name', 'event_title', 'start_datetime', 'status',
+                    'total_price', 'archived_at']
+    list_filter = ['status', ('start_datetime', RangeDateFilter)]
+    search_fields = ['reference', 'customer_name', 'customer_email', 'customer_phone', 'event_title']
+    list_select_related = ['hall']
+    date_hierarchy = 'start_datetime'
+    readonly_fields = [field.name for field in BookingArchive._meta.fields]
+
+    # الأرشيف يُكتب بأمر archive_bookings فقط
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(ModelAdmin):
+    list_display = ['user', 'title', 'notification_type', 'is_read', 'created_at', 'archived_at']
+    list_filter = ['notification_type', 'is_read', ('created_at', RangeDateFilter)]
+    search_fields = ['user__username', 'title', 'message']
+    list_select_related = ['user']
+    readonly_fields = [field.name for field in NotificationArchive._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RouteStat)
+class RouteStatAdmin(ModelAdmin):
+    list_display = ['route', 'method', 'requests', 'errors', 'average_ms', 'max_ms_display', 'average_queries',
+                    'average_sql_ms', 'average_template_ms', 'duplicate_queries', 'peak_kb', 'last_seen']
+    list_filter = ['method', ('last_seen', RangeDateFilter)]
+    search_fields = ['route', 'view_name']
+    ordering = ['-total_ms']
+    readonly_fields = [field.name for field in RouteStat._meta.fields]
+
+    actions = ['reset_stats']
+
+    @display(description="متوسط الزمن (مللي ثانية)")
+    def average_ms(self, obj):
+        return f"{obj.avg_ms:.1f}"
+
+    @display(description="أطول زمن (مللي ثانية)", ordering='max_ms')
+    def max_ms_display(self, obj):
+        return f"{obj.max_ms:.1f}"
+
+    @display(description="متوسط الاستعلامات")
+    def average_queries(self, obj):
+        return f"{obj.avg_queries:.1f}"
+
+    @display(description="متوسط زمن SQL")
+    def average_sql_ms(self, obj):
+        return f"{obj.avg_sql_ms:.1f}"
+
+    @display(description="متوسط زمن القوالب")
+    def average_template_ms(self, obj):
+        return f"{obj.avg_template_ms:.1f}"
+
+    def has_add_permission(self, request):
+        return False
+
+    def reset_stats(self, request, queryset):
+        deleted, _ = queryset.delete()
+        self.message_user(request, f'تم حذف إحصاءات {deleted} مسار.')
+    reset_stats.short_description = "حذف الإحصاءات المحددة"
+
+
 # Register models with the custom admin site
 admin_site.register(Governorate, GovernorateAdmin)
 admin_site.register(City, CityAdmin)
@@ -784,5 +921,11 @@ admin_site.register(Hall, HallAdmin)
 admin_site.register(HallService, HallServiceAdmin)
 admin_site.register(HallMeal, HallMealAdmin)
 admin_site.register(Booking, BookingAdmin)
+admin_site.register(BookingStatusEvent, BookingStatusEventAdmin)
+admin_site.register(BackgroundJob, BackgroundJobAdmin)
+admin_site.register(SlotHold, SlotHoldAdmin)
+admin_site.register(RouteStat, RouteStatAdmin)
+admin_site.register(BookingArchive, BookingArchiveAdmin)
+admin_site.register(NotificationArchive, NotificationArchiveAdmin)
 admin_site.register(Contact, ContactAdmin)
 admin_site.register(HallManager, HallManagerAdmin)
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+طبقة استجابات JSON: طلبات GET الشرطية والضغط والتحكم في التخزين لكل نقطة نهاية.
+
+- إذا مُررت ``tags`` يُحسب ``ETag`` من إصدارات الوسوم قبل تنفيذ العرض، فيُرد 304 دون أي عمل.
+- بدونها يُحسب ``ETag`` من بصمة المحتوى (يوفر النقل فقط).
+- المحتوى الأكبر من ``JSON_COMPRESS_MIN_BYTES`` يُضغط بـ brotli (إن كانت المكتبة مثبتة) أو gzip.
+"""
+import hashlib
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from django.utils.text import compress_string
+
+from .invalidation import tag_versions
+
+try:
+    import brotli
+except ImportError:  # brotli اختيارية
+    brotli = None
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+_accepts_brotli = re.compile(r'\bbr\b')
+
+
+def compress_response(request, response):
+    """ضغط محتوى الاستجابة حسب ``Accept-Encoding`` إذا كان كبيراً بما يكفي"""
+    if response.streaming or response.has_header('Content-Encoding'):
+        return response
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if len(response.content) < getattr(settings, 'JSON_COMPRESS_MIN_BYTES', 1024):
+        return response
+
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli is not None and _accepts_brotli.search(accept_encoding):
+        encoding, compressed = 'br', brotli.compress(response.content)
+    elif _accepts_gzip.search(accept_encoding):
+        encoding, compressed = 'gzip', compress_string(response.content)
+    else:
+        return response
+    if len(compressed) >= len(response.content):
+        return response
+
+    response.content = compressed
+    response['Content-Length'] = str(len(compressed))
+    response['Content-Encoding'] = encoding
+    # المحتوى المضغوط يختلف بايتياً عن الأصل، لذا يصبح الـ ETag ضعيفاً (كما في GZipMiddleware)
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+def _etag_for(request, endpoint_tags):
+    user_id = request.user.pk if request.user.is_authenticated else ''
+    versions = tag_versions(list(endpoint_tags))
+    seed = f"{request.get_full_path()}:{user_id}:{versions}"
+    return quote_etag(hashlib.sha1(seed.encode('utf-8')).hexdigest()[:20])
+
+
+def json_endpoint(tags=None, max_age=0, public=False):
+    """إضافة ETag وردود 304 وضغط و ``Cache-Control`` لعرض يعيد JSON
+
+    ``tags`` وسوم البيانات أو دالة ``(request, *args, **kwargs)`` تبنيها.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return compress_response(request, view(request, *args, **kwargs))
+
+            etag = None
+            if tags is not None:
+                endpoint_tags = tags(request, *args, **kwargs) if callable(tags) else tags
+                etag = _etag_for(request, endpoint_tags)
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    return _with_cache_headers(not_modified, etag, max_age, public)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return compress_response(request, response)
+            if etag is None:
+                etag = quote_etag(hashlib.sha1(response.content).hexdigest()[:20])
+                conditional = get_conditional_response(request, etag=etag, response=response)
+                if conditional is not response:
+                    return _with_cache_headers(conditional, etag, max_age, public)
+            _with_cache_headers(response, etag, max_age, public)
+            return compress_response(request, response)
+        return wrapper
+    return decorator
+
+
+def _with_cache_headers(response, etag, max_age, public):
+    response['ETag'] = etag
+    if public:
+        patch_cache_control(response, public=True, max_age=max_age)
+    else:
+        patch_cache_control(response, private=True, max_age=max_age)
+    patch_vary_headers(response, ['Accept-Encoding', 'Cookie'])
+    return response
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class HallBookingConfig(AppConfig):
+    name = 'hall_booking'
+
+    def ready(self):
+        from .invalidation import connect_signals
+        connect_signals()
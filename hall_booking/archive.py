@@ -0,0 +1,197 @@
+"""
+أرشيف الحجوزات والإشعارات القديمة.
+
+``archive_bookings`` ينقل على دفعات الحجوزات المنتهية (مكتملة أو ملغاة أو مرفوضة) التي بدأت قبل
+``ARCHIVE_AFTER_MONTHS`` شهراً إلى ``BookingArchive`` مع لقطة من خدماتها ووجباتها وسجل حالاتها،
+وينقل إشعاراتها إلى ``NotificationArchive``، ثم يحذفها من الجداول الحية. ``archive_notifications``
+ينقل الإشعارات المقروءة القديمة غير المرتبطة بحجز. كل دفعة معاملة كتابة واحدة فلا يظهر حجز في
+الجدولين أو يختفي منهما معاً، والإبطال يُجمع في رفع واحد لكل دفعة.
+
+التقارير تضيف الأرشيف عبر ``booking_sources`` و ``archived_counts`` فقط حين تبدأ الفترة المطلوبة
+قبل أحدث ما في الأرشيف (``archive_bounds``)، فتبقى تقارير الأشهر الأخيرة على الجدول الحي وحده.
+"""
+import calendar
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max
+from django.utils import timezone
+
+from .cache import cached
+from .invalidation import batched_invalidation
+from .models import Booking, BookingArchive, Notification, NotificationArchive
+from .writelock import serialized_write
+
+ARCHIVE_STATUSES = ['completed', 'cancelled', 'rejected']
+
+# حقول Booking المنسوخة كما هي (hall_id و user_id بأسمائها في الجدولين)
+BOOKING_FIELDS = [f.attname for f in Booking._meta.concrete_fields if not f.primary_key]
+NOTIFICATION_FIELDS = [f.attname for f in Notification._meta.concrete_fields if not f.primary_key]
+
+
+def months_ago(months, now=None):
+    """نفس اليوم والساعة قبل ``months`` شهراً (آخر يوم في الشهر إن كان أقصر)"""
+    now = now or timezone.now()
+    year, month = divmod(now.year * 12 + now.month - 1 - months, 12)
+    day = min(now.day, calendar.monthrange(year, month + 1)[1])
+    return now.replace(year=year, month=month + 1, day=day)
+
+
+def archive_cutoff(months=None):
+    if months is None:
+        months = getattr(settings, 'ARCHIVE_AFTER_MONTHS', 12)
+    return months_ago(months)
+
+
+def archivable_bookings(cutoff):
+    """الحجوزات المنتهية التي بدأت قبل ``cutoff`` (فهرس الحالة وتاريخ البداية)"""
+    return Booking.objects.filter(status__in=ARCHIVE_STATUSES, start_datetime__lt=cutoff)
+
+
+def archivable_notifications(cutoff):
+    """الإشعارات المقروءة الأقدم من ``cutoff`` غير المرتبطة بحجز"""
+    return Notification.objects.filter(booking__isnull=True, is_read=True, created_at__lt=cutoff)
+
+
+def _archived_booking(booking, now):
+    events = sorted(booking.status_events.all(), key=lambda event: (event.created_at, event.pk))
+    approved_at = next((event.created_at for event in events
+                        if event.from_status == 'pending' and event.to_status == 'approved'), None)
+    return BookingArchive(
+        id=booking.pk,
+        **{field: getattr(booking, field) for field in BOOKING_FIELDS},
+        approved_at=approved_at,
+        services=[
+            {'service_id': item.service_id, 'name': item.service.name, 'quantity': item.quantity,
+             'price': str(item.price), 'notes': item.notes}
+            for item in booking.booking_services.all()
+        ],
+        meals=[
+            {'meal_id': item.meal_id, 'name': item.meal.name, 'quantity': item.quantity,
+             'price_per_person': str(item.price_per_person), 'total_price': str(item.total_price),
+             'serving_time': item.serving_time.isoformat() if item.serving_time else None, 'notes': item.notes}
+            for item in booking.booking_meals.all()
+        ],
+        status_history=[
+            {'from': event.from_status, 'to': event.to_status, 'actor_id': event.actor_id,
+             'at': event.created_at.isoformat()}
+            for event in events
+        ],
+        archived_at=now,
+    )
+
+
+def _archived_notification(notification, now):
+    return NotificationArchive(
+        id=notification.pk,
+        **{field: getattr(notification, field) for field in NOTIFICATION_FIELDS},
+        archived_at=now,
+    )
+
+
+def _batch_size(batch_size):
+    return batch_size or getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+
+
+def archive_bookings(cutoff, batch_size=None, max_batches=None):
+    """نقل الحجوزات القابلة للأرشفة وإشعاراتها على دفعات؛ يعيد (عدد الحجوزات، عدد الإشعارات)"""
+    batch_size = _batch_size(batch_size)
+    bookings_moved = notifications_moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        with batched_invalidation(), serialized_write():
+            ids = list(archivable_bookings(cutoff).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            now = timezone.now()
+            bookings = Booking.objects.filter(pk__in=ids).prefetch_related(
+                'booking_services__service', 'booking_meals__meal', 'status_events'
+            )
+            BookingArchive.objects.bulk_create([_archived_booking(booking, now) for booking in bookings])
+            notifications = NotificationArchive.objects.bulk_create([
+                _archived_notification(notification, now)
+                for notification in Notification.objects.filter(booking_id__in=ids)
+            ])
+            # الخدمات والوجبات وسجل الحالات والإشعارات تُحذف بالتتابع
+            Booking.objects.filter(pk__in=ids).delete()
+        bookings_moved += len(ids)
+        notifications_moved += len(notifications)
+        batches += 1
+    return bookings_moved, notifications_moved
+
+
+def archive_notifications(cutoff, batch_size=None, max_batches=None):
+    """نقل الإشعارات المقروءة القديمة غير المرتبطة بحجز على دفعات؛ يعيد عددها"""
+    batch_size = _batch_size(batch_size)
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        with batched_invalidation(), serialized_write():
+            notifications = list(archivable_notifications(cutoff).order_by('pk')[:batch_size])
+            if not notifications:
+                break
+            now = timezone.now()
+            NotificationArchive.objects.bulk_create([
+                _archived_notification(notification, now) for notification in notifications
+            ])
+            Notification.objects.filter(pk__in=[n.pk for n in notifications]).delete()
+        moved += len(notifications)
+        batches += 1
+    return moved
+
+
+@cached('archive', ttl=3600)
+def archive_bounds():
+    """أحدث تاريخ طلب وبداية وموافقة في أرشيف الحجوزات، أو None إن كان فارغاً"""
+    bounds = BookingArchive.objects.aggregate(
+        created_at_max=Max('created_at'),
+        start_datetime_max=Max('start_datetime'),
+        approved_at_max=Max('approved_at'),
+    )
+    return bounds if bounds['created_at_max'] is not None else None
+
+
+def needs_archive(field='created_at', since=None):
+    """هل قد يحوي الأرشيف صفوفاً لفترة تبدأ من ``since`` على ``field`` (None = كل التاريخ)"""
+    bounds = archive_bounds()
+    if bounds is None:
+        return False
+    if since is None:
+        return True
+    newest = bounds[f'{field}_max']
+    if newest is None:
+        return False
+    if isinstance(since, date) and not isinstance(since, datetime):
+        newest = newest.date()
+    return since <= newest
+
+
+def booking_sources(field='created_at', since=None):
+    """الجدول الحي والأرشيف (إن احتاجته الفترة) لتنفيذ نفس الاستعلام على كليهما وجمع النتائج"""
+    sources = [Booking.objects]
+    if needs_archive(field, since):
+        sources.append(BookingArchive.objects)
+    return sources
+
+
+def archived_counts(group_by):
+    """عدد الحجوزات المؤرشفة لكل قيمة من ``group_by`` (مثل ``hall`` أو ``hall__category``)
+
+    استعلام مجمّع منفصل يُدمج في Python؛ الاستعلام الفرعي المرتبط داخل التجميع يُعاد تنفيذه لكل صف.
+    """
+    if not needs_archive():
+        return {}
+    return dict(BookingArchive.objects.order_by().values_list(group_by).annotate(count=Count('pk')))
+
+
+def archived_approval_latencies(hall_ids=None, since=None):
+    """أزمنة الموافقة للحجوزات المؤرشفة بنفس أعمدة ``median_approval_hours_by_hall`` (None إن لم تحتج الفترة الأرشيف)"""
+    if not needs_archive('approved_at', since):
+        return None
+    rows = BookingArchive.objects.filter(approved_at__isnull=False)
+    if hall_ids is not None:
+        rows = rows.filter(hall_id__in=hall_ids)
+    if since is not None:
+        rows = rows.filter(approved_at__gte=since)
+    return rows.annotate(
+        approval_hall=F('hall_id'),
+        approval_latency=ExpressionWrapper(F('approved_at') - F('created_at'), output_field=DurationField()),
+    ).order_by().values('approval_hall', 'approval_latency')
@@ -0,0 +1,111 @@
+"""فحص توفر القاعات مع احتساب الحجوزات الفعلية والحجوزات المؤقتة (SlotHold) معاً"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Booking, Hall, SlotHold
+from .pgfeatures import is_overlap_violation
+from .writelock import serialized_write
+
+BLOCKING_STATUSES = ['approved', 'pending']
+WIZARD_TOKEN_SESSION_KEY = 'booking_wizard_token'
+
+
+def hold_ttl():
+    return timedelta(minutes=getattr(settings, 'SLOT_HOLD_TTL_MINUTES', 15))
+
+
+def _conflicting_bookings(start, end):
+    return Booking.objects.filter(
+        hall=OuterRef('pk'),
+        status__in=BLOCKING_STATUSES,
+        start_datetime__lt=end,
+        end_datetime__gt=start,
+    )
+
+
+def _conflicting_holds(start, end, owner=None):
+    holds = SlotHold.objects.filter(
+        hall=OuterRef('pk'),
+        expires_at__gt=timezone.now(),
+        start_datetime__lt=end,
+        end_datetime__gt=start,
+    )
+    if owner:
+        # الحجز المؤقت الخاص بنفس المعالج لا يحجب صاحبه
+        holds = holds.exclude(owner_token=owner)
+    return holds
+
+
+def is_slot_available(hall_id, start, end, owner=None):
+    """التحقق من خلو الفترة من الحجوزات والحجوزات المؤقتة باستعلام واحد"""
+    busy = Hall.objects.filter(pk=hall_id).filter(
+        Exists(_conflicting_bookings(start, end)) | Exists(_conflicting_holds(start, end, owner))
+    )
+    return not busy.exists()
+
+
+def busy_slots(hall, day, owner=None):
+    """الفترات المشغولة في يوم معين (حجوزات وحجوزات مؤقتة لمعالجات أخرى) مرتبة زمنياً"""
+    bookings = Booking.objects.filter(
+        hall=hall, start_datetime__date=day, status__in=BLOCKING_STATUSES
+    ).order_by().values_list('start_datetime', 'end_datetime')
+    holds = SlotHold.objects.filter(
+        hall=hall, start_datetime__date=day, expires_at__gt=timezone.now()
+    )
+    if owner:
+        holds = holds.exclude(owner_token=owner)
+    return sorted(bookings.union(holds.order_by().values_list('start_datetime', 'end_datetime'), all=True))
+
+
+def wizard_token(request, create=False):
+    """مالك الحجوزات المؤقتة: رمز محفوظ في الجلسة لا ``request.session.session_key`` الذي يتغير عند تسجيل الدخول"""
+    token = request.session.get(WIZARD_TOKEN_SESSION_KEY)
+    if token is None and create:
+        token = request.session[WIZARD_TOKEN_SESSION_KEY] = uuid.uuid4().hex
+    return token
+
+
+def hold_slot(hall, start, end, owner, ttl=None):
+    """إنشاء حجز مؤقت للمعالج ``owner`` إذا كانت الفترة متاحة، وإلا إرجاع None
+
+    يستبدل أي حجز مؤقت سابق لنفس المعالج على نفس القاعة.
+    """
+    try:
+        with serialized_write():
+            SlotHold.objects.filter(hall=hall, owner_token=owner).delete()
+            # المنتهية لا تحجب الفترة، لكن قيد منع التداخل على PostgreSQL لا يعرف ذلك
+            SlotHold.objects.filter(hall=hall, expires_at__lte=timezone.now()).delete()
+            if not is_slot_available(hall.pk, start, end, owner=owner):
+                return None
+            return SlotHold.objects.create(
+                hall=hall,
+                owner_token=owner,
+                start_datetime=start,
+                end_datetime=end,
+                expires_at=timezone.now() + (ttl or hold_ttl()),
+            )
+    except IntegrityError as exc:
+        # جلسة أخرى حجزت فترة متداخلة بين الفحص والإنشاء (قيد hb_slothold_no_overlap)
+        if is_overlap_violation(exc):
+            return None
+        raise
+
+
+def release_holds(owner, hall=None):
+    """إلغاء الحجوزات المؤقتة لمعالج (بعد تأكيد الحجز مثلاً)"""
+    if not owner:
+        return 0
+    holds = SlotHold.objects.filter(owner_token=owner)
+    if hall is not None:
+        holds = holds.filter(hall=hall)
+    return holds.delete()[0]
+
+
+def purge_expired_holds(now=None):
+    """حذف الحجوزات المؤقتة المنتهية"""
+    return SlotHold.objects.filter(expires_at__lte=now or timezone.now()).delete()[0]
@@ -0,0 +1,194 @@
+"""
+سجل محلي لنتائج ``benchmark_views`` ومقارنة تشغيلين مع مراعاة الضجيج.
+
+- التخزين في ملف SQLite مستقل (``BENCHMARK_HISTORY_FILE``) خارج قاعدة التطبيق وخارج git.
+- كل تشغيل مفتاحه commit الحالي (مع علامة التعديلات غير المحفوظة) وملف البيانات.
+- المقارنة بفترات ثقة bootstrap لنسبة الوسيطين، فلا يُعد الفرق تراجعاً إلا إذا تجاوز
+  الحد الأدنى للفترة عتبة التسامح؛ عدد الاستعلامات حتمي فيُقارن مباشرة.
+"""
+import json
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    git_commit TEXT NOT NULL,
+    git_dirty INTEGER NOT NULL,
+    profile TEXT NOT NULL,
+    iterations INTEGER NOT NULL,
+    cold INTEGER NOT NULL,
+    host TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    scenario TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    p50_ms REAL NOT NULL,
+    p95_ms REAL NOT NULL,
+    queries INTEGER NOT NULL,
+    sql_ms REAL NOT NULL,
+    peak_kb REAL,
+    samples_ms TEXT NOT NULL,
+    peak_samples_kb TEXT NOT NULL,
+    PRIMARY KEY (run_id, scenario)
+);
+CREATE INDEX IF NOT EXISTS runs_commit_idx ON runs (git_commit, profile);
+"""
+
+
+def history_path():
+    return Path(getattr(settings, 'BENCHMARK_HISTORY_FILE', settings.BASE_DIR / 'benchmarks' / 'history.sqlite3'))
+
+
+def connect(path=None):
+    path = Path(path or history_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    db.execute('PRAGMA foreign_keys = ON')
+    db.executescript(SCHEMA)
+    return db
+
+
+def git_revision():
+    """(commit، هل توجد تعديلات غير محفوظة)؛ ``unknown`` خارج مستودع git"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=settings.BASE_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    try:
+        return git('rev-parse', 'HEAD'), bool(git('status', '--porcelain', '--untracked-files=no'))
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def record_run(results, profile, iterations, cold=False, path=None):
+    """حفظ نتائج تشغيل وإرجاع رقمه"""
+    commit, dirty = git_revision()
+    with connect(path) as db:
+        run_id = db.execute(
+            'INSERT INTO runs (created_at, git_commit, git_dirty, profile, iterations, cold, host) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (timezone.now().isoformat(), commit, int(dirty), profile, iterations, int(cold), socket.gethostname()),
+        ).lastrowid
+        db.executemany(
+            'INSERT INTO results (run_id, scenario, ok, p50_ms, p95_ms, queries, sql_ms, peak_kb, samples_ms, '
+            'peak_samples_kb) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (run_id, result['name'], int(result['ok']), result['p50_ms'], result['p95_ms'], result['queries'],
+                 result['sql_ms'], result.get('peak_kb'), json.dumps(result['samples_ms']),
+                 json.dumps(result.get('peak_samples_kb') or []))
+                for result in results
+            ],
+        )
+    return run_id
+
+
+def list_runs(limit=20, profile=None, path=None):
+    with connect(path) as db:
+        query = 'SELECT * FROM runs'
+        params = []
+        if profile:
+            query += ' WHERE profile = ?'
+            params.append(profile)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        return [dict(row) for row in db.execute(query, params)]
+
+
+def resolve_run(ref, profile=None, path=None):
+    """رقم تشغيل من مرجع: رقم، أو بادئة commit (أحدث تشغيل له)، أو ``latest``/``previous``"""
+    with connect(path) as db:
+        profile_clause = ' AND profile = ?' if profile else ''
+        profile_params = [profile] if profile else []
+        if ref in ('latest', 'previous'):
+            rows = db.execute(f'SELECT id FROM runs WHERE 1=1{profile_clause} ORDER BY id DESC LIMIT 2',
+                              profile_params).fetchall()
+            index = 0 if ref == 'latest' else 1
+            return rows[index]['id'] if len(rows) > index else None
+        if str(ref).isdigit():
+            row = db.execute('SELECT id FROM runs WHERE id = ?', [int(ref)]).fetchone()
+            if row:
+                return row['id']
+        row = db.execute(
+            f'SELECT id FROM runs WHERE git_commit LIKE ?{profile_clause} ORDER BY id DESC LIMIT 1',
+            [f'{ref}%', *profile_params],
+        ).fetchone()
+        return row['id'] if row else None
+
+
+def load_run(run_id, path=None):
+    with connect(path) as db:
+        run = db.execute('SELECT * FROM runs WHERE id = ?', [run_id]).fetchone()
+        if run is None:
+            return None, {}
+        results = {}
+        for row in db.execute('SELECT * FROM results WHERE run_id = ?', [run_id]):
+            result = dict(row)
+            result['samples_ms'] = json.loads(result['samples_ms'])
+            result['peak_samples_kb'] = json.loads(result['peak_samples_kb'])
+            results[result['scenario']] = result
+        return dict(run), results
+
+
+def bootstrap_ratio(base, head, resamples=2000, confidence=0.95, seed=0):
+    """فترة ثقة bootstrap لنسبة وسيط ``head`` إلى وسيط ``base`` (النسبة، الحد الأدنى، الحد الأعلى)"""
+    if not base or not head:
+        return None
+    point = statistics.median(head) / statistics.median(base)
+    rng = random.Random(seed)
+    ratios = sorted(
+        statistics.median(rng.choices(head, k=len(head))) / statistics.median(rng.choices(base, k=len(base)))
+        for _ in range(resamples)
+    )
+    tail = (1 - confidence) / 2
+    low = ratios[int(tail * (resamples - 1))]
+    high = ratios[int((1 - tail) * (resamples - 1))]
+    return point, low, high
+
+
+def compare_runs(base, head, threshold=0.05, memory_threshold=0.10, resamples=2000, confidence=0.95):
+    """مقارنة نتائج تشغيلين لكل سيناريو
+
+    تراجع الزمن/الذاكرة: الحد الأدنى لفترة الثقة أكبر من ``1 + threshold``.
+    تراجع الاستعلامات: أي زيادة في عددها.
+    """
+    rows = []
+    for name in sorted(set(base) | set(head)):
+        before, after = base.get(name), head.get(name)
+        row = {'scenario': name, 'regressions': [], 'improvements': []}
+        rows.append(row)
+        if before is None or after is None:
+            row['missing'] = 'base' if before is None else 'head'
+            continue
+
+        latency = bootstrap_ratio(before['samples_ms'], after['samples_ms'], resamples, confidence)
+        row['latency'] = latency
+        if latency:
+            if latency[1] > 1 + threshold:
+                row['regressions'].append('latency')
+            elif latency[2] < 1 - threshold:
+                row['improvements'].append('latency')
+
+        row['queries'] = (before['queries'], after['queries'])
+        if after['queries'] > before['queries']:
+            row['regressions'].append('queries')
+        elif after['queries'] < before['queries']:
+            row['improvements'].append('queries')
+
+        memory = bootstrap_ratio(before['peak_samples_kb'], after['peak_samples_kb'], resamples, confidence)
+        row['memory'] = memory
+        if memory:
+            if memory[1] > 1 + memory_threshold:
+                row['regressions'].append('memory')
+            elif memory[2] < 1 - memory_threshold:
+                row['improvements'].append('memory')
+    return rows
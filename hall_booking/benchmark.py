@@ -0,0 +1,304 @@
+"""
+قياس تكلفة الطلب للعروض الأساسية من طرف إلى طرف عبر عميل الاختبار.
+
+لكل سيناريو: زمن الاستجابة (p50/p95)، وعدد استعلامات SQL وزمنها، وذروة الذاكرة. تُقارن النتائج
+بميزانيات محفوظة في ``BENCHMARK_BUDGETS_FILE`` (JSON) ويفشل القياس إذا تجاوزها عرض.
+
+السيناريوهات المعدِّلة للبيانات (مثل ``confirm_booking``) تُنفذ داخل معاملة تُلغى بعد كل تكرار.
+المستخدم الإداري ومدخلات الذاكرة المؤقتة خاصة بالقياس وتُحذف بعده، فلا يمس تشغيله على قاعدة حقيقية بياناتها.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import tiered_cache
+from .models import Booking, Hall
+
+BENCH_USERNAME = 'bench_admin'
+
+
+class Scenario:
+    """طلب واحد يُقاس عبر عميل الاختبار"""
+
+    def __init__(self, name, path, method='get', data=None, user=None, mutates=False, content_type=None,
+                 expect=None):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.user = user
+        self.mutates = mutates
+        self.content_type = content_type
+        # فحص اختياري لمحتوى الرد (مثل ``success`` في ردود JSON التي تعيد 200 دائماً)
+        self.expect = expect
+
+    def succeeded(self, response):
+        if response.status_code >= 400:
+            return False
+        return self.expect is None or bool(self.expect(response))
+
+    def client(self):
+        # الاستثناءات تُسجل كرد 500 بدلاً من إيقاف القياس كله
+        client = Client(raise_request_exception=False)
+        if self.user is not None:
+            client.force_login(self.user)
+        return client
+
+    def request(self, client, iteration):
+        data = self.data(iteration) if callable(self.data) else self.data
+        kwargs = {'content_type': self.content_type} if self.content_type else {}
+        return getattr(client, self.method)(self.path, data, **kwargs)
+
+
+class QueryTimer:
+    """عدّاد استعلامات وزمنها عبر ``execute_wrapper`` (أدق وأخف من ``CaptureQueriesContext``)"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+@contextmanager
+def bench_user():
+    """مستخدم إداري للسيناريوهات التي تتطلب صلاحيات الموظفين، يُحذف بعد القياس إن أُنشئ له"""
+    user, created = User.objects.get_or_create(
+        username=BENCH_USERNAME,
+        defaults={'email': f'{BENCH_USERNAME}@example.com', 'is_staff': True, 'is_superuser': True},
+    )
+    try:
+        yield user
+    finally:
+        if created:
+            user.delete()
+
+
+def _busiest_hall():
+    hall = (Hall.objects.filter(status='available')
+            .annotate(bookings_count=Count('bookings'))
+            .order_by('-bookings_count', 'pk')
+            .first())
+    if hall is None:
+        raise ValueError('No available halls; run generate_dataset first')
+    return hall
+
+
+def build_scenarios(admin):
+    """السيناريوهات القياسية على القاعة الأكثر حجوزات في البيانات الحالية"""
+    hall = _busiest_hall()
+    busy_day = (Booking.objects.filter(hall=hall, start_datetime__gte=timezone.now())
+                .order_by('start_datetime').values_list('start_datetime', flat=True).first()
+                or timezone.now()).date().isoformat()
+    hall_args = [hall.pk]
+
+    def wizard(step):
+        return reverse(f'hall_booking:booking_{step}', args=hall_args)
+
+    def confirm_payload(iteration):
+        # يوم مختلف بعيد في المستقبل لكل تكرار حتى لا يتعارض مع الحجوزات الموجودة
+        day = (timezone.localdate() + timedelta(days=3650 + iteration)).isoformat()
+        return json.dumps({
+            'booking_datetime': {'date': day, 'start_time': '10:00', 'end_time': '14:00'},
+            'customer_info': {'customer_name': 'Bench', 'customer_email': 'bench@example.com',
+                              'customer_phone': '01000000000', 'event_title': 'Benchmark',
+                              'attendees_count': 10},
+            'selected_services': [{'id': service.pk, 'quantity': 1}
+                                  for service in hall.hall_services.filter(is_available=True)[:2]],
+            'selected_meals': [{'id': meal.pk, 'quantity': 10, 'serving_time': '12:00'}
+                               for meal in hall.hall_meals.filter(is_available=True)[:1]],
+        })
+
+    halls_list = reverse('hall_booking:halls_list')
+    schedule = reverse('hall_booking:hall_schedule_management', args=hall_args)
+    return [
+        Scenario('home', reverse('hall_booking:home')),
+        Scenario('home:auth', reverse('hall_booking:home'), user=admin),
+        Scenario('halls_list', halls_list),
+        Scenario('halls_list:filtered', halls_list,
+                 data={'governorate': hall.governorate_id, 'category': hall.category_id}),
+        Scenario('halls_list:search', halls_list, data={'search': hall.name.split(' - ')[0]}),
+        Scenario('halls_list:auth', halls_list, user=admin),
+        Scenario('hall_detail', reverse('hall_booking:hall_detail', args=hall_args)),
+        Scenario('hall_detail:auth', reverse('hall_booking:hall_detail', args=hall_args), user=admin),
+        Scenario('wizard:step1', wizard('step1_date')),
+        Scenario('wizard:step2', wizard('step2_time'), data={'date': busy_day}),
+        Scenario('wizard:step3', wizard('step3_services')),
+        Scenario('wizard:step4', wizard('step4_meals')),
+        Scenario('wizard:step5', wizard('step5_info')),
+        Scenario('wizard:step6', wizard('step6_review')),
+        Scenario('confirm_booking', reverse('hall_booking:confirm_booking', args=hall_args), method='post',
+                 data=confirm_payload, content_type='application/json', user=admin, mutates=True,
+                 expect=lambda response: response.json().get('success')),
+        Scenario('schedule:day', schedule, data={'view': 'day', 'date': busy_day}, user=admin),
+        Scenario('schedule:week', schedule, data={'view': 'week', 'date': busy_day}, user=admin),
+        Scenario('schedule:month', schedule, data={'view': 'month', 'date': busy_day}, user=admin),
+        Scenario('admin_statistics', reverse('admin:statistics'), user=admin),
+        Scenario('chart:bookings', reverse('admin:bookings_chart_api'), user=admin),
+        Scenario('chart:revenue', reverse('admin:revenue_chart_api'), user=admin),
+        Scenario('chart:halls', reverse('admin:halls_chart_api'), user=admin),
+    ]
+
+
+@contextmanager
+def bench_cache():
+    """بادئة مفاتيح خاصة بالقياس في الذاكرة المشتركة، تُحذف مدخلاتها عند الانتهاء"""
+    old_prefix = tiered_cache.prefix
+    # فريدة لكل تشغيل حتى لا تُقرأ مدخلات تشغيل سابق على قاعدة أخرى بنفس إصدارات الوسوم
+    tiered_cache.prefix = f'{old_prefix}-bench-{uuid.uuid4().hex[:8]}'
+    try:
+        yield
+    finally:
+        clear_caches()
+        tiered_cache.prefix = old_prefix
+
+
+def clear_caches():
+    """حذف مدخلات القياس فقط من L2 (عبر مفاتيح L1 التي تحمل بادئته) ثم إفراغ L1 الخاصة بالعملية"""
+    prefix = f'{tiered_cache.prefix}:'
+    for key in tiered_cache.l1.keys():
+        if key.startswith(prefix):
+            tiered_cache.l2.delete_many([key, f'{key}:lock'])
+    tiered_cache.l1.clear()
+
+
+def percentile(values, pct):
+    """نسبة مئوية بالاستيفاء الخطي بين أقرب رتبتين"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _measure(scenario, client, iteration, cold):
+    if cold:
+        clear_caches()
+    timer = QueryTimer()
+    with connection.execute_wrapper(timer):
+        started = time.perf_counter()
+        if scenario.mutates:
+            with transaction.atomic():
+                response = scenario.request(client, iteration)
+                transaction.set_rollback(True)
+        else:
+            response = scenario.request(client, iteration)
+        elapsed = time.perf_counter() - started
+    return scenario.succeeded(response), elapsed * 1000, timer.count, timer.seconds * 1000
+
+
+def _peak_memory(scenario, client, iteration, cold):
+    """ذروة التخصيص أثناء طلب واحد بالكيلوبايت (تمريرة منفصلة لأن tracemalloc يبطئ التنفيذ)"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        _measure(scenario, client, iteration, cold)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_scenario(scenario, iterations=20, warmup=3, cold=False, memory_samples=3):
+    """تشغيل سيناريو وإرجاع العينات وملخصها"""
+    client = scenario.client()
+    try:
+        for i in range(warmup):
+            _measure(scenario, client, i, cold)
+        samples = [_measure(scenario, client, warmup + i, cold) for i in range(iterations)]
+        peaks = [_peak_memory(scenario, client, warmup + iterations + i, cold) for i in range(memory_samples)]
+    finally:
+        # جلسة force_login محفوظة في القاعدة
+        client.logout()
+    latencies = [sample[1] for sample in samples]
+    queries = [sample[2] for sample in samples]
+    sql_times = [sample[3] for sample in samples]
+    return {
+        'name': scenario.name,
+        'ok': all(sample[0] for sample in samples),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        # الوسيط لا الحد الأقصى: تحديث إصدارات الوسوم الدوري يضيف استعلاماً لبعض الطلبات
+        'queries': int(statistics.median(queries)),
+        'sql_ms': round(statistics.median(sql_times), 3),
+        'peak_kb': round(statistics.median(peaks), 1) if peaks else None,
+        'samples_ms': [round(value, 3) for value in latencies],
+        'peak_samples_kb': [round(value, 1) for value in peaks],
+    }
+
+
+# وسيط القياس لكل طلب يضيف سطور سجل واستعلامات كتابة دورية إلى ما نقيسه
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+def run_benchmarks(names=None, iterations=20, warmup=3, cold=False, memory_samples=3, progress=None):
+    results = []
+    with bench_user() as admin, bench_cache():
+        for scenario in build_scenarios(admin):
+            if names and not any(scenario.name == name or scenario.name.startswith(f'{name}:') for name in names):
+                continue
+            result = run_scenario(scenario, iterations=iterations, warmup=warmup, cold=cold,
+                                  memory_samples=memory_samples)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return results
+
+
+def budgets_path():
+    return Path(getattr(settings, 'BENCHMARK_BUDGETS_FILE', settings.BASE_DIR / 'benchmarks' / 'budgets.json'))
+
+
+def load_budgets(path=None):
+    path = Path(path or budgets_path())
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def save_budgets(results, path=None, headroom=3.0):
+    """حفظ ميزانيات جديدة من نتائج القياس: p95 مضروباً في ``headroom`` وعدد الاستعلامات كما هو"""
+    path = Path(path or budgets_path())
+    budgets = load_budgets(path)
+    for result in results:
+        budgets[result['name']] = {
+            'p95_ms': round(max(result['p95_ms'] * headroom, 20.0), 1),
+            'queries': result['queries'],
+        }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(dict(sorted(budgets.items())), indent=2, ensure_ascii=False) + '\n',
+                    encoding='utf-8')
+    return path
+
+
+def check_budgets(results, budgets):
+    """قائمة التجاوزات: (السيناريو، المقياس، القيمة، الميزانية)، إضافة إلى السيناريوهات التي فشلت ردودها"""
+    failures = []
+    for result in results:
+        if not result['ok']:
+            failures.append((result['name'], 'response', 'error', 'success'))
+        budget = budgets.get(result['name'])
+        if not budget:
+            continue
+        for metric in ('p95_ms', 'queries'):
+            if metric in budget and result[metric] > budget[metric]:
+                failures.append((result['name'], metric, result[metric], budget[metric]))
+    return failures
@@ -0,0 +1,286 @@
+"""
+طبقة تخزين مؤقت متدرجة للمسارات الساخنة.
+
+- L1: ذاكرة داخل العملية (LRU محدودة الحجم) تتفادى حتى تكلفة الوصول إلى L2.
+- L2: ذاكرة Django المشتركة بين العمليات (``CACHES['default']``).
+- المفاتيح مقسمة إلى نطاقات (namespaces) وموسومة بوسوم؛ المفتاح يتضمن إصداراتها من
+  جدول ``CacheTagVersion`` (انظر ``hall_booking.invalidation``) فرفع أي إصدار يبطل المدخل.
+- منع التدافع: القيمة الباردة تُحسب مرة واحدة (قفل داخل العملية + قفل ``add`` في L2)،
+  والقيمة المنتهية تُقدَّم قديمة خلال فترة السماح بينما يعيد طلب واحد حسابها.
+- داخل ``use_replica`` تُحسب القيمة من نسخة القراءة فقط إذا وصلتها إصدارات الوسوم التي بُني عليها المفتاح
+  (``CacheTagVersion`` يُنسخ مع البيانات)؛ وإلا فمن الرئيسية، فلا تُخزَّن بيانات سبقت الإبطال تحت إصدار لاحق له.
+
+القيم المخزنة مشتركة بين الطلبات داخل العملية، لذا يجب التعامل معها للقراءة فقط.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .invalidation import invalidate_tags, tag_versions, versions_visible_on
+from .metrics import cache_requests
+from .routers import pin_to_primary, reads_from_replica, replica_alias
+
+
+class SkipCache(Exception):
+    """يرفعها المنتِج لإرجاع ``value`` دون تخزينها (مثل استجابة خطأ)"""
+
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+class LRUCache:
+    """قاموس محدود الحجم يحذف الأقدم استخداماً عند الامتلاء (آمن للخيوط)"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+                return self._data[key]
+            except KeyError:
+                return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """ذاكرة مؤقتة من مستويين مع نطاقات مرقّمة الإصدار وحماية من التدافع"""
+
+    def __init__(self, alias='default', l1_max_entries=512, default_ttl=300, stale_ttl=60,
+                 lock_timeout=30, prefix='hb'):
+        self.alias = alias
+        self.l1 = LRUCache(l1_max_entries)
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.prefix = prefix
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            alias=get_setting('CACHE_L2_ALIAS', 'default'),
+            l1_max_entries=get_setting('CACHE_L1_MAX_ENTRIES', 512),
+            default_ttl=get_setting('CACHE_DEFAULT_TTL', 300),
+            stale_ttl=get_setting('CACHE_STALE_TTL', 60),
+            lock_timeout=get_setting('CACHE_LOCK_TIMEOUT', 30),
+        )
+
+    @property
+    def l2(self):
+        return caches[self.alias]
+
+    # ---- النطاقات والوسوم ----
+
+    def _versioned_key(self, namespace, key, tags=()):
+        tags = [namespace, *tags]
+        versions = tag_versions(tags)
+        return f"{self.prefix}:{namespace}:{key}:{'.'.join(map(str, versions))}", dict(zip(tags, versions))
+
+    def make_key(self, namespace, key, tags=()):
+        """مفتاح يتضمن إصدارات النطاق ووسومه؛ رفع أي إصدار يجعل المدخل القديم غير قابل للوصول"""
+        return self._versioned_key(namespace, key, tags)[0]
+
+    def invalidate(self, *tags):
+        invalidate_tags(*tags)
+
+    # ---- القراءة والكتابة ----
+
+    def _get_entry(self, full_key):
+        entry = self.l1.get(full_key)
+        if entry is None:
+            entry = self.l2.get(full_key)
+            if entry is not None:
+                self.l1.set(full_key, entry)
+        if entry is not None and time.time() >= entry[2]:
+            return None
+        return entry
+
+    def _store(self, full_key, value, ttl, stale_ttl):
+        now = time.time()
+        entry = (value, now + ttl, now + ttl + stale_ttl)
+        self.l2.set(full_key, entry, timeout=ttl + stale_ttl)
+        self.l1.set(full_key, entry)
+        return value
+
+    @staticmethod
+    def _read_source(versions):
+        """نسخة القراءة إن كانت في ``use_replica`` ووصلتها إصدارات المفتاح، وإلا الرئيسية"""
+        if reads_from_replica() and versions_visible_on(replica_alias(), versions):
+            return nullcontext()
+        return pin_to_primary()
+
+    def _produce(self, full_key, producer, ttl, stale_ttl, versions):
+        try:
+            with self._read_source(versions):
+                value = producer()
+        except SkipCache as skip:
+            return skip.value
+        return self._store(full_key, value, ttl, stale_ttl)
+
+    def set(self, namespace, key, value, ttl=None, stale_ttl=None, tags=()):
+        return self._store(
+            self.make_key(namespace, key, tags),
+            value,
+            self.default_ttl if ttl is None else ttl,
+            self.stale_ttl if stale_ttl is None else stale_ttl,
+        )
+
+    def delete(self, namespace, key, tags=()):
+        full_key = self.make_key(namespace, key, tags)
+        self.l1.delete(full_key)
+        self.l2.delete(full_key)
+
+    # ---- الأقفال ----
+
+    @contextmanager
+    def _local_lock(self, full_key, blocking=True):
+        """قفل لكل مفتاح داخل العملية (وليس أقفالاً مشتركة) حتى لا تتقاطع الاستدعاءات المتداخلة"""
+        with self._locks_guard:
+            entry = self._locks.setdefault(full_key, [threading.Lock(), 0])
+            entry[1] += 1
+        acquired = entry[0].acquire(blocking=blocking)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                entry[0].release()
+            with self._locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[full_key]
+
+    def _acquire_shared_lock(self, full_key):
+        token = uuid.uuid4().hex
+        if self.l2.add(f"{full_key}:lock", token, timeout=self.lock_timeout):
+            return token
+        return None
+
+    def _release_shared_lock(self, full_key, token):
+        lock_key = f"{full_key}:lock"
+        if self.l2.get(lock_key) == token:
+            self.l2.delete(lock_key)
+
+    def _wait_for_entry(self, full_key):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.l2.get(full_key)
+            if entry is not None:
+                self.l1.set(full_key, entry)
+                return entry
+            if self.l2.get(f"{full_key}:lock") is None:
+                return None
+        return None
+
+    # ---- الواجهة الرئيسية ----
+
+    def get_or_set(self, namespace, key, producer, ttl=None, stale_ttl=None, tags=()):
+        """إرجاع القيمة المخزنة أو حسابها عبر ``producer`` مرة واحدة فقط على مستوى جميع العمليات"""
+        ttl = self.default_ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        full_key, versions = self._versioned_key(namespace, key, tags)
+
+        entry = self._get_entry(full_key)
+        if entry is not None:
+            value, fresh_until, _ = entry
+            if time.time() < fresh_until:
+                cache_requests.inc(namespace=namespace, result='hit')
+                return value
+            # قيمة قديمة: طلب واحد يعيد حسابها والبقية تقدّم القديمة دون انتظار
+            cache_requests.inc(namespace=namespace, result='stale')
+            with self._local_lock(full_key, blocking=False) as acquired:
+                if not acquired:
+                    return value
+                token = self._acquire_shared_lock(full_key)
+                if token is None:
+                    return value
+                try:
+                    return self._produce(full_key, producer, ttl, stale_ttl, versions)
+                finally:
+                    self._release_shared_lock(full_key, token)
+
+        # قيمة باردة: الخيوط في نفس العملية تنتظر أولها، والعمليات الأخرى تنتظر قفل L2
+        with self._local_lock(full_key):
+            entry = self._get_entry(full_key)
+            if entry is not None:
+                cache_requests.inc(namespace=namespace, result='hit')
+                return entry[0]
+            token = self._acquire_shared_lock(full_key)
+            if token is None:
+                entry = self._wait_for_entry(full_key)
+                if entry is not None:
+                    cache_requests.inc(namespace=namespace, result='hit')
+                    return entry[0]
+            cache_requests.inc(namespace=namespace, result='miss')
+            try:
+                return self._produce(full_key, producer, ttl, stale_ttl, versions)
+            finally:
+                if token is not None:
+                    self._release_shared_lock(full_key, token)
+
+
+tiered_cache = TieredCache.from_settings()
+
+
+def _call_key(func, args, kwargs):
+    digest = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode('utf-8')).hexdigest()[:16]
+    return f"{func.__module__}.{func.__qualname__}:{digest}"
+
+
+def cached(namespace, ttl=None, stale_ttl=None, key=None, tags=None):
+    """تخزين نتيجة دالة قراءة في الذاكرة المتدرجة ضمن نطاق محدد
+
+    ``key`` دالة اختيارية تبني المفتاح من معاملات الاستدعاء؛ افتراضياً يُشتق من repr المعاملات.
+    ``tags`` وسوم إضافية (غير النطاق نفسه) أو دالة تبنيها من المعاملات، مثل ``hall:42``.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else _call_key(func, args, kwargs)
+            entry_tags = tags(*args, **kwargs) if callable(tags) else (tags or ())
+            return tiered_cache.get_or_set(
+                namespace, cache_key, lambda: func(*args, **kwargs), ttl, stale_ttl, tags=entry_tags
+            )
+        wrapper.namespace = namespace
+        wrapper.uncached = func
+        wrapper.invalidate = lambda: invalidate_tags(namespace)
+        return wrapper
+    return decorator
@@ -0,0 +1,37 @@
+"""بيانات مرجعية وبطاقات القاعات المقروءة بكثرة، مخزنة عبر الذاكرة المتدرجة"""
+from .cache import cached
+from django.db.models import Max, Q
+
+from .models import Category, Hall
+
+
+@cached('catalogue', ttl=24 * 3600)
+def categories():
+    return list(Category.objects.all())
+
+
+@cached('halls', ttl=3600)
+def featured_halls(limit=6):
+    """بطاقات القاعات المميزة في الصفحة الرئيسية مع صورها"""
+    return list(Hall.objects.filter(status='available').select_related('category').prefetch_related('images')[:limit])
+
+
+@cached('halls', ttl=3600)
+def similar_halls(hall_id, category_id, governorate_id, limit=6):
+    """القاعات المشابهة (نفس الفئة أو نفس المحافظة) لصفحة تفاصيل القاعة"""
+    return list(Hall.objects.filter(
+        status='available'
+    ).exclude(
+        id=hall_id
+    ).filter(
+        Q(category_id=category_id) | Q(governorate_id=governorate_id)
+    ).select_related('category', 'governorate', 'city').prefetch_related('images')[:limit])
+
+
+def halls_last_modified(request):
+    """آخر تعديل على القاعات المتاحة (لترويسة Last-Modified في الصفحات العامة)"""
+    return Hall.objects.filter(status='available').aggregate(last=Max('updated_at'))['last']
+
+
+def hall_last_modified(request, hall_id):
+    return Hall.objects.filter(pk=hall_id).values_list('updated_at', flat=True).first()
@@ -0,0 +1,285 @@
+"""
+مولّد بيانات بأحجام واقعية للاختبارات الحملية والقياسات وخطط الاستعلامات.
+
+- حتمي: نفس البذرة والملف الشخصي يعطيان نفس الصفوف، وإعادة التشغيل لا تكرر شيئاً.
+- الحجوزات لا تتداخل: لكل قاعة ثلاث فترات يومية ثابتة وكل حجز يشغل فترة واحدة.
+- الإدراج على دفعات متدفقة (``Seeder.insert_missing``) فلا تُحمّل ملايين الكائنات في الذاكرة.
+- صور بديلة محلية تُرسم مرة واحدة دون أي اتصال بالشبكة.
+
+التواريخ نسبية إلى يوم التوليد (``HISTORY_DAYS`` ماضياً و ``FUTURE_DAYS`` قادماً)، لذا يُفضّل
+توليد الملف الأكبر فوق الأصغر في نفس اليوم أو على قاعدة جديدة.
+"""
+import io
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import (Booking, BookingMeal, BookingService, BookingStatusEvent, Category, City, Hall, HallImage,
+                     HallMeal, HallService, Notification, generate_reference, get_notification_data)
+from .seeding import Seeder, preserve_timestamps, seed_uuid
+
+PROFILES = {
+    'small': {'halls': 60, 'users': 300, 'bookings': 6_000},
+    'medium': {'halls': 600, 'users': 6_000, 'bookings': 240_000},
+    'xl': {'halls': 6_000, 'users': 120_000, 'bookings': 2_400_000},
+}
+
+HISTORY_DAYS = 540
+FUTURE_DAYS = 180
+# ثلاث فترات يومية لا تتداخل (ساعة البداية)، ومدة الحجز من ساعتين إلى أربع
+SLOT_STARTS = (9, 14, 19)
+PLACEHOLDER_COUNT = 6
+USERNAME_PREFIX = 'ds_user_'
+
+CATEGORIES = [
+    ('قاعات أفراح', 'قاعات فاخرة لحفلات الأفراح', 'fas fa-heart'),
+    ('قاعات مؤتمرات', 'قاعات مجهزة للمؤتمرات والندوات', 'fas fa-microphone'),
+    ('قاعات اجتماعات', 'قاعات صغيرة للاجتماعات والتدريب', 'fas fa-users'),
+    ('قاعات حفلات', 'قاعات مناسبة للحفلات والمناسبات', 'fas fa-birthday-cake'),
+    ('قاعات معارض', 'قاعات واسعة للمعارض والفعاليات', 'fas fa-store'),
+]
+FEATURES = ['تكييف مركزي', 'نظام صوتي متطور', 'إضاءة LED', 'مواقف سيارات', 'واي فاي مجاني',
+            'شاشات عرض', 'مسرح', 'خدمة ضيافة', 'مصعد', 'مولد كهرباء', 'حديقة خارجية', 'خدمة أمن']
+SERVICES = [('خدمة الصوتيات', 1000), ('خدمة الإضاءة', 1500), ('خدمة التصوير', 2000)]
+MEALS = [('بوفيه مفتوح', 'buffet', 250), ('وجبة عشاء', 'dinner', 180)]
+FIRST_NAMES = ['أحمد', 'محمد', 'فاطمة', 'سارة', 'علي', 'مريم', 'يوسف', 'خديجة', 'عمر', 'نور']
+LAST_NAMES = ['حسن', 'محمود', 'إبراهيم', 'السيد', 'عبد الله', 'مصطفى', 'عثمان', 'سليمان']
+EVENTS = ['حفل زفاف', 'مؤتمر', 'ندوة', 'اجتماع عمل', 'حفل تخرج', 'معرض', 'ورشة تدريبية', 'حفل خطوبة']
+
+
+def resolve_profile(profile, **overrides):
+    """أحجام الملف الشخصي مع استبدال ما مُرر منها (القيم None تُتجاهل)"""
+    sizes = dict(PROFILES[profile])
+    sizes.update({name: value for name, value in overrides.items() if value is not None})
+    return sizes
+
+
+def _placeholder(name, color, size):
+    """رسم صورة بديلة بلون ثابت وحفظها مرة واحدة في وسيط التخزين"""
+    if not default_storage.exists(name):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, format='JPEG', quality=70)
+        default_storage.save(name, ContentFile(buffer.getvalue()))
+    return name
+
+
+def placeholder_images(rng):
+    colors = [tuple(rng.randint(40, 220) for _ in range(3)) for _ in range(PLACEHOLDER_COUNT)]
+    main = [_placeholder(f'halls/placeholders/hall_{i}.jpg', color, (800, 600)) for i, color in enumerate(colors)]
+    gallery = [_placeholder(f'halls/gallery/placeholders/gallery_{i}.jpg', color, (600, 400))
+               for i, color in enumerate(colors)]
+    return main, gallery
+
+
+def _users(seeder, count):
+    password = make_password('dataset123')
+    users = (
+        User(
+            username=f'{USERNAME_PREFIX}{i:06d}',
+            email=f'{USERNAME_PREFIX}{i:06d}@example.com',
+            password=password,
+            first_name=FIRST_NAMES[i % len(FIRST_NAMES)],
+            last_name=LAST_NAMES[i % len(LAST_NAMES)],
+        )
+        for i in range(count)
+    )
+    created = sum(len(batch) for batch in seeder.insert_missing(User, users, 'username', total=count))
+    user_ids = list(
+        User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('username').values_list('pk', flat=True)
+    )
+    return created, user_ids[:count]
+
+
+def _halls(seeder, rng, count, main_images):
+    categories = list(seeder.upsert(
+        Category,
+        [Category(name=name, description=description, icon=icon) for name, description, icon in CATEGORIES],
+        unique_fields=['name'],
+    ).values())
+    cities = list(City.objects.select_related('governorate').order_by('governorate__code', 'name'))
+    halls = []
+    for i in range(count):
+        # توزيع القاعات على كل المدن بالتناوب ليغطي جميع المحافظات
+        city = cities[i % len(cities)]
+        category = categories[rng.randrange(len(categories))]
+        halls.append(Hall(
+            name=f"قاعة {i + 1:05d} - {city.name}",
+            category=category,
+            governorate=city.governorate,
+            city=city,
+            address=f"شارع {rng.randint(1, 200)}، {city.name}، {city.governorate.name}",
+            description=f"{category.description} في {city.name}. قاعة مجهزة بالكامل بسعة مناسبة لجميع المناسبات.",
+            capacity=rng.choice([50, 100, 150, 200, 300, 400, 500, 800, 1000]),
+            price_per_hour=Decimal(rng.randint(20, 200) * 10),
+            image=main_images[i % len(main_images)],
+            status='maintenance' if rng.random() < 0.03 else 'available',
+            features=rng.sample(FEATURES, rng.randint(3, 6)),
+            phone=f"01{rng.randint(100000000, 999999999)}",
+        ))
+    saved = seeder.upsert(
+        Hall, halls, unique_fields=['name'],
+        update_fields=['category', 'governorate', 'city', 'address', 'description', 'capacity',
+                       'price_per_hour', 'image', 'status', 'features', 'phone'],
+    )
+    return [saved[(hall.name,)] for hall in halls]
+
+
+def _hall_extras(seeder, halls, gallery_images):
+    services = seeder.upsert(
+        HallService,
+        [HallService(hall=hall, name=name, description=f'{name} لقاعة {hall.name}', price=price)
+         for hall in halls for name, price in SERVICES],
+        unique_fields=['hall', 'name'],
+    )
+    meals = seeder.upsert(
+        HallMeal,
+        [HallMeal(hall=hall, name=name, meal_type=meal_type, price_per_person=price, min_order=20)
+         for hall in halls for name, meal_type, price in MEALS],
+        unique_fields=['hall', 'name'],
+    )
+    with_images = set(HallImage.objects.filter(hall__in=halls).values_list('hall_id', flat=True).distinct())
+    images = seeder.create(HallImage, [
+        HallImage(hall=hall, image=gallery_images[(index + j) % len(gallery_images)],
+                  image_type='gallery', title=f'صورة {j + 1} لقاعة {hall.name}', order=j, is_featured=j == 0)
+        for index, hall in enumerate(halls) if hall.pk not in with_images
+        for j in range(3)
+    ])
+    services_by_hall, meals_by_hall = {}, {}
+    for service in services.values():
+        services_by_hall.setdefault(service.hall_id, []).append(service)
+    for meal in meals.values():
+        meals_by_hall.setdefault(meal.hall_id, []).append(meal)
+    return services_by_hall, meals_by_hall, len(images)
+
+
+def _status(rng, start, now):
+    roll = rng.random()
+    if start < now:
+        return 'completed' if roll < 0.8 else 'cancelled' if roll < 0.92 else 'rejected'
+    return 'approved' if roll < 0.6 else 'pending' if roll < 0.9 else 'cancelled'
+
+
+def _hall_bookings(seed, index, hall, per_hall, user_ids, origin, now):
+    """حجوزات قاعة واحدة: فترات مختلفة من شبكة (يوم × فترة) فلا يتداخل حجزان أبداً
+
+    ترتيب الفترات ثابت للقاعة، والحجز يُعرّف بفترته؛ فالملف الأكبر يضيف فترات جديدة
+    إلى حجوزات الملف الأصغر في نفس القاعدة دون تداخل أو تكرار.
+    """
+    slots = list(range((HISTORY_DAYS + FUTURE_DAYS) * len(SLOT_STARTS)))
+    random.Random(f'{seed}:slots:{index}').shuffle(slots)
+    for slot in sorted(slots[:per_hall]):
+        rng = random.Random(f'{seed}:booking:{index}:{slot}')
+        day, period = divmod(slot, len(SLOT_STARTS))
+        start = origin + timedelta(days=day, hours=SLOT_STARTS[period])
+        hours = rng.randint(2, 4)
+        first, last = FIRST_NAMES[rng.randrange(len(FIRST_NAMES))], LAST_NAMES[rng.randrange(len(LAST_NAMES))]
+        booking_id = seed_uuid('dataset', seed, index, slot)
+        created_at = min(start - timedelta(days=rng.randint(1, 60), hours=rng.randint(0, 23)), now)
+        yield Booking(
+            booking_id=booking_id,
+            reference=generate_reference(booking_id),
+            hall=hall,
+            user_id=user_ids[rng.randrange(len(user_ids))] if user_ids and rng.random() < 0.85 else None,
+            customer_name=f'{first} {last}',
+            customer_email=f'customer{rng.randint(1, 10 ** 6)}@example.com',
+            customer_phone=f"01{rng.randint(100000000, 999999999)}",
+            event_title=EVENTS[rng.randrange(len(EVENTS))],
+            event_description='حجز مولّد لبيانات القياس',
+            start_datetime=start,
+            end_datetime=start + timedelta(hours=hours),
+            attendees_count=rng.randint(10, hall.capacity),
+            total_price=hall.price_per_hour * hours,
+            status=_status(rng, start, now),
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+
+def _booking_children(bookings, services_by_hall, meals_by_hall, now):
+    """الخدمات والوجبات والإشعارات وسجل الحالات لحجوزات دفعة واحدة"""
+    services, meals, notifications, events = [], [], [], []
+    for booking in bookings:
+        rng = random.Random(booking.booking_id.int)
+        decided_at = min(booking.created_at + timedelta(days=1), now)
+        events.append(BookingStatusEvent(booking=booking, from_status='', to_status='pending',
+                                         created_at=booking.created_at))
+        if booking.status == 'completed':
+            events.append(BookingStatusEvent(booking=booking, from_status='pending', to_status='approved',
+                                             created_at=decided_at))
+            events.append(BookingStatusEvent(booking=booking, from_status='approved', to_status='completed',
+                                             created_at=booking.end_datetime))
+        elif booking.status != 'pending':
+            events.append(BookingStatusEvent(booking=booking, from_status='pending', to_status=booking.status,
+                                             created_at=decided_at))
+
+        hall_services = services_by_hall.get(booking.hall_id)
+        if hall_services and rng.random() < 0.3:
+            service = hall_services[rng.randrange(len(hall_services))]
+            services.append(BookingService(booking=booking, service=service, quantity=1, price=service.price,
+                                           created_at=booking.created_at))
+        hall_meals = meals_by_hall.get(booking.hall_id)
+        if hall_meals and rng.random() < 0.2:
+            meal = hall_meals[rng.randrange(len(hall_meals))]
+            meals.append(BookingMeal(
+                booking=booking, meal=meal, quantity=booking.attendees_count,
+                price_per_person=meal.price_per_person,
+                total_price=meal.price_per_person * booking.attendees_count,
+                serving_time=(booking.start_datetime + timedelta(hours=1)).time(),
+                created_at=booking.created_at, updated_at=booking.created_at,
+            ))
+
+        data = get_notification_data(booking.status, booking) if booking.user_id else None
+        if data:
+            notifications.append(Notification(
+                user_id=booking.user_id, booking=booking, notification_type=data['type'],
+                title=data['title'], message=data['message'],
+                is_read=booking.end_datetime < now or rng.random() < 0.5, created_at=decided_at,
+            ))
+    return services, meals, notifications, events
+
+
+def generate_dataset(profile='small', seed=0, halls=None, users=None, bookings=None, batch_size=None,
+                     progress=None):
+    """توليد (أو إكمال) مجموعة بيانات بحجم الملف الشخصي؛ تُرجع عدد الصفوف المُنشأة لكل نوع"""
+    sizes = resolve_profile(profile, halls=halls, users=users, bookings=bookings)
+    seeder = Seeder(batch_size=batch_size, progress=progress)
+    rng = random.Random(seed)
+    now = timezone.now()
+    origin = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=HISTORY_DAYS), time.min))
+
+    main_images, gallery_images = placeholder_images(rng)
+    users_created, user_ids = _users(seeder, sizes['users'])
+    hall_list = _halls(seeder, rng, sizes['halls'], main_images)
+    services_by_hall, meals_by_hall, images_created = _hall_extras(seeder, hall_list, gallery_images)
+
+    per_hall = max(sizes['bookings'] // max(len(hall_list), 1), 0)
+    stream = (
+        booking
+        for index, hall in enumerate(hall_list)
+        for booking in _hall_bookings(seed, index, hall, per_hall, user_ids, origin, now)
+    )
+    counts = {'users': users_created, 'halls': len(hall_list), 'images': images_created,
+              'bookings': 0, 'services': 0, 'meals': 0, 'notifications': 0, 'events': 0}
+    with preserve_timestamps(Booking, BookingService, BookingMeal, Notification):
+        for created in seeder.insert_missing(Booking, stream, 'booking_id', total=per_hall * len(hall_list)):
+            services, meals, notifications, events = _booking_children(
+                created, services_by_hall, meals_by_hall, now
+            )
+            BookingService.objects.bulk_create(services)
+            BookingMeal.objects.bulk_create(meals)
+            Notification.objects.bulk_create(notifications)
+            BookingStatusEvent.objects.bulk_create(events)
+            counts['bookings'] += len(created)
+            counts['services'] += len(services)
+            counts['meals'] += len(meals)
+            counts['notifications'] += len(notifications)
+            counts['events'] += len(events)
+    return counts
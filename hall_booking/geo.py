@@ -0,0 +1,69 @@
+"""
+بيانات المحافظات والمدن المرجعية.
+
+- ``geo_table()``: جدول داخل العملية يُحمَّل مرة واحدة ويُعاد تحميله فقط عند رفع إصدار الوسم ``geo``
+  (أي عند حفظ/حذف محافظة أو مدينة)، فلا تحتاج القوائم المنسدلة أي استعلام.
+- الحزمة: JSON لكل المحافظات والمدن (بالعربية والإنجليزية) معنونة ببصمة محتواها وتُقدَّم من الجدول نفسه
+  بتخزين دائم (``immutable``) على ``/api/geo/<البصمة>.json``.
+"""
+import hashlib
+import json
+import threading
+
+from django.urls import reverse
+
+from .invalidation import tag_versions
+from .models import City, Governorate
+
+GEO_TAG = 'geo'
+
+_current = None
+_lock = threading.Lock()
+
+
+class GeoTable:
+    """نسخة للقراءة فقط من المحافظات والمدن مع فهارس بحث ومحتوى الحزمة"""
+
+    def __init__(self, governorates, cities):
+        self.governorates = governorates
+        self.cities = cities
+        self.governorates_by_id = {governorate['id']: governorate for governorate in governorates}
+        self.cities_by_governorate = {}
+        for city in cities:
+            self.cities_by_governorate.setdefault(city['governorate_id'], []).append(city)
+        self.content = json.dumps(
+            {'governorates': governorates, 'cities': cities},
+            ensure_ascii=False,
+            separators=(',', ':'),
+        ).encode('utf-8')
+        self.digest = hashlib.sha256(self.content).hexdigest()[:16]
+
+    @classmethod
+    def load(cls):
+        governorates = list(Governorate.objects.order_by('name').values('id', 'name', 'name_en', 'code', 'region'))
+        cities = list(City.objects.order_by('name').values('id', 'governorate_id', 'name', 'name_en', 'is_capital'))
+        return cls(governorates, cities)
+
+    def cities_for(self, governorate_id):
+        try:
+            return self.cities_by_governorate.get(int(governorate_id), [])
+        except (TypeError, ValueError):
+            return []
+
+
+def geo_table():
+    """الجدول المرجعي الحالي لهذه العملية"""
+    global _current
+    version = tag_versions([GEO_TAG])[0]
+    current = _current
+    if current is None or current[0] != version:
+        with _lock:
+            if _current is None or _current[0] != version:
+                _current = (version, GeoTable.load())
+            current = _current
+    return current[1]
+
+
+def bundle_url():
+    return reverse('hall_booking:geo_bundle', args=[geo_table().digest])
+
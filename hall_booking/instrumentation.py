@@ -0,0 +1,281 @@
+"""
+قياس تكلفة كل طلب: الزمن الكلي، وعدد استعلامات SQL وزمنها، والاستعلامات المكررة (مؤشر N+1)،
+وزمن تقديم القوالب، وذروة التخصيص.
+
+- ``RequestInstrumentationMiddleware`` يقيس نسبة ``INSTRUMENTATION_SAMPLE_RATE`` من الطلبات فقط (كلها في وضع
+  التطوير ولا شيء خارجه افتراضياً)، ومؤقت القوالب لا يُركَّب إلا عند قياس أول طلب.
+- النتائج تُرسل في ترويسة ``Server-Timing`` (في وضع التطوير أو للموظفين) وفي سطر سجل JSON
+  على المسجّل ``hall_booking.requests``.
+- المجاميع لكل مسار تُجمع في الذاكرة وتُكتب إلى ``RouteStat`` كل ``INSTRUMENTATION_FLUSH_INTERVAL`` ثانية.
+- ذروة الذاكرة عبر tracemalloc مكلفة، فلا تُفعّل إلا مع ``INSTRUMENTATION_TRACEMALLOC``.
+- زمن كل الطلبات (داخل العينة وخارجها) يُسجل في مدرج ``hall_booking.metrics``.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils import timezone
+
+from .metrics import request_latency, request_queries
+
+logger = logging.getLogger('hall_booking.requests')
+
+_current = ContextVar('hall_booking_request_metrics', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:\?|%s|NULL)\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """شكل الاستعلام بعد حذف القيم، فتتطابق الاستعلامات التي لا تختلف إلا في معاملاتها"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """مقاييس طلب واحد؛ تُستخدم أيضاً كـ ``execute_wrapper`` لكل اتصالات قاعدة البيانات"""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.fingerprints = Counter()
+        self.peak_kb = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+            self.sql_count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, threshold=None):
+        """الاستعلامات المتكررة ``threshold`` مرة أو أكثر مرتبة تنازلياً"""
+        threshold = threshold or getattr(settings, 'INSTRUMENTATION_DUPLICATE_THRESHOLD', 3)
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def _timed_render(render):
+    def wrapper(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return render(self, context, request)
+        # القوالب المتداخلة (render_to_string داخل وسم مثلاً) تُحسب ضمن القالب الخارجي
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_depth -= 1
+            if metrics.template_depth == 0:
+                metrics.template_seconds += time.perf_counter() - started
+    wrapper._hb_timed = True
+    return wrapper
+
+
+_install_lock = threading.Lock()
+
+
+def install_template_timer():
+    with _install_lock:
+        if not getattr(DjangoTemplate.render, '_hb_timed', False):
+            DjangoTemplate.render = _timed_render(DjangoTemplate.render)
+
+
+def sample_rate():
+    return getattr(settings, 'INSTRUMENTATION_SAMPLE_RATE', 1.0 if settings.DEBUG else 0.0)
+
+
+class RouteStatsBuffer:
+    """تجميع مقاييس المسارات في الذاكرة وكتابتها دورياً إلى ``RouteStat`` بتحديثات تراكمية"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def add(self, route, method, view_name, status, total_ms, metrics, duplicates):
+        with self._lock:
+            entry = self._pending.setdefault((route, method), {
+                'view_name': view_name, 'requests': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'sql_queries': 0, 'sql_ms': 0.0, 'template_ms': 0.0, 'duplicate_queries': 0,
+                'peak_kb': 0.0, 'last_duplicate': '',
+            })
+            entry['requests'] += 1
+            entry['errors'] += int(status >= 500)
+            entry['total_ms'] += total_ms
+            entry['max_ms'] = max(entry['max_ms'], total_ms)
+            entry['sql_queries'] += metrics.sql_count
+            entry['sql_ms'] += metrics.sql_seconds * 1000
+            entry['template_ms'] += metrics.template_seconds * 1000
+            entry['duplicate_queries'] += sum(count - 1 for _, count in duplicates)
+            entry['peak_kb'] = max(entry['peak_kb'], metrics.peak_kb or 0.0)
+            if duplicates:
+                entry['last_duplicate'] = duplicates[0][0][:2000]
+
+    def due(self):
+        return time.monotonic() - self._last_flush >= getattr(settings, 'INSTRUMENTATION_FLUSH_INTERVAL', 30)
+
+    def flush(self):
+        from .models import RouteStat
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        now = timezone.now()
+        for (route, method), entry in pending.items():
+            changes = {
+                'view_name': entry['view_name'],
+                'requests': F('requests') + entry['requests'],
+                'errors': F('errors') + entry['errors'],
+                'total_ms': F('total_ms') + entry['total_ms'],
+                'max_ms': Greatest('max_ms', entry['max_ms']),
+                'sql_queries': F('sql_queries') + entry['sql_queries'],
+                'sql_ms': F('sql_ms') + entry['sql_ms'],
+                'template_ms': F('template_ms') + entry['template_ms'],
+                'duplicate_queries': F('duplicate_queries') + entry['duplicate_queries'],
+                'peak_kb': Greatest('peak_kb', entry['peak_kb']),
+                'last_seen': now,
+            }
+            if entry['last_duplicate']:
+                changes['last_duplicate'] = entry['last_duplicate']
+            rows = RouteStat.objects.filter(route=route, method=method)
+            if rows.update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    RouteStat.objects.create(route=route, method=method, last_seen=now,
+                                             **{name: value for name, value in entry.items()})
+            except IntegrityError:
+                # عملية أخرى أنشأت الصف في اللحظة نفسها
+                rows.update(**changes)
+
+    def clear(self):
+        with self._lock:
+            self._pending = {}
+
+
+route_stats = RouteStatsBuffer()
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>', ''
+    return f'/{match.route}', match.view_name or ''
+
+
+def _server_timing(total_ms, metrics, duplicates):
+    parts = [
+        f'total;dur={total_ms:.1f}',
+        f'sql;dur={metrics.sql_seconds * 1000:.1f};desc="{metrics.sql_count} queries"',
+        f'tpl;dur={metrics.template_seconds * 1000:.1f}',
+    ]
+    if duplicates:
+        parts.append(f'dup;desc="{sum(count for _, count in duplicates)} repeated queries"')
+    if metrics.peak_kb is not None:
+        parts.append(f'mem;desc="peak {metrics.peak_kb:.0f} KB"')
+    return ', '.join(parts)
+
+
+def _show_server_timing(request):
+    if settings.DEBUG:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+class RequestInstrumentationMiddleware:
+    """قياس عينة من الطلبات وإرسال النتائج في Server-Timing والسجل وجدول ``RouteStat``"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._timer_installed = False
+
+    def __call__(self, request):
+        rate = sample_rate()
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            # خارج العينة يُسجل الزمن فقط لمدرج زمن الاستجابة (``/metrics``)
+            started = time.perf_counter()
+            response = self.get_response(request)
+            request_latency.observe(time.perf_counter() - started, route=_route(request)[0], method=request.method)
+            return response
+
+        if not self._timer_installed:
+            # لا يُعدَّل Template.render في العمليات التي لا تقيس أي طلب
+            install_template_timer()
+            self._timer_installed = True
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        trace_memory = getattr(settings, 'INSTRUMENTATION_TRACEMALLOC', False) and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+            total_ms = (time.perf_counter() - started) * 1000
+            if trace_memory:
+                metrics.peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            _current.reset(token)
+
+        self._report(request, response, total_ms, metrics)
+        return response
+
+    def _report(self, request, response, total_ms, metrics):
+        route, view_name = _route(request)
+        duplicates = metrics.duplicates()
+        request_latency.observe(total_ms / 1000, route=route, method=request.method)
+        request_queries.observe(metrics.sql_count, route=route)
+
+        if _show_server_timing(request):
+            response['Server-Timing'] = _server_timing(total_ms, metrics, duplicates)
+
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'view': view_name,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'sql_count': metrics.sql_count,
+            'sql_ms': round(metrics.sql_seconds * 1000, 2),
+            'template_ms': round(metrics.template_seconds * 1000, 2),
+            'peak_kb': round(metrics.peak_kb, 1) if metrics.peak_kb is not None else None,
+            'duplicates': [{'sql': sql[:300], 'count': count} for sql, count in duplicates[:5]],
+        }, ensure_ascii=False))
+
+        if getattr(settings, 'INSTRUMENTATION_ROUTE_STATS', True):
+            route_stats.add(route, request.method, view_name, response.status_code, total_ms, metrics, duplicates)
+            if route_stats.due():
+                try:
+                    route_stats.flush()
+                except Exception:
+                    # جدول الإحصاءات لا يجب أن يُسقط الطلب (مثلاً قبل تطبيق الترحيل)
+                    logger.exception('Failed to flush route statistics')
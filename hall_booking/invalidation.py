@@ -0,0 +1,236 @@
+"""
+ناقل إبطال الذاكرة المؤقتة المعتمد على الوسوم.
+
+كل مدخل في الذاكرة المتدرجة موسوم بوسوم مثل ``catalogue`` أو ``hall:42`` أو
+``hall:42:availability`` أو ``stats``، ومفتاحه يتضمن أرقام إصدارات هذه الوسوم.
+حفظ/حذف النماذج (وعمليات ``update()`` الجماعية عبر ``InvalidatingQuerySet``) يرفع
+إصدارات الوسوم المتأثرة في جدول ``CacheTagVersion`` المشترك، فتتجاهل كل العمليات
+المدخلات القديمة خلال ``CACHE_TAG_CHECK_INTERVAL`` ثانية على الأكثر.
+داخل المعاملة تُجمع وسوم كل عمليات الحفظ وتُرفع برفع واحد عند نجاحها، وداخل ``batched_invalidation``
+تُجمع وتُرفع مرة واحدة عند الخروج (للعمليات الجماعية خارج المعاملات).
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.db.models.expressions import Col
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import (Booking, BookingArchive, CacheTagVersion, Category, City, Governorate, Hall,
+                     HallImage, HallMeal, HallService, Notification, NotificationArchive, SlotHold)
+from .routers import pin_to_primary
+
+# النموذج -> (الحقل الذي يحدد النطاق كالقاعة أو المستخدم، وسوم لكل قيمة منه، وسوم ثابتة)
+TAG_RULES = {
+    Governorate: (None, [], ['geo', 'catalogue', 'halls', 'stats']),
+    City: (None, [], ['geo', 'catalogue', 'halls', 'stats']),
+    Category: (None, [], ['catalogue', 'halls', 'stats']),
+    Hall: ('pk', ['hall:{}'], ['halls', 'stats']),
+    HallImage: ('hall_id', ['hall:{}'], ['halls']),
+    HallService: ('hall_id', ['hall:{}'], []),
+    HallMeal: ('hall_id', ['hall:{}'], []),
+    Booking: ('hall_id', ['hall:{}:availability'], ['bookings', 'stats']),
+    SlotHold: ('hall_id', ['hall:{}:availability'], []),
+    Notification: ('user_id', ['user:{}:notifications'], []),
+    BookingArchive: (None, [], ['archive', 'stats']),
+    NotificationArchive: ('user_id', ['user:{}:notifications'], []),
+}
+
+# حقول لا يؤثر تعديلها على أي محتوى مخزن
+IGNORED_FIELDS = {
+    Booking: {'reminder_sent_at'},
+}
+
+_local_versions = {}
+# الوسوم المجمعة داخل batched_invalidation (None خارجها)
+_pending = ContextVar('hall_booking_pending_tags', default=None)
+# وسوم المعاملات الجارية بانتظار نجاحها: {اسم الاتصال: الوسوم}
+_committing = ContextVar('hall_booking_committing_tags', default=None)
+
+
+def _check_interval():
+    return getattr(settings, 'CACHE_TAG_CHECK_INTERVAL', 1.0)
+
+
+def tag_versions(tags):
+    """أرقام إصدارات الوسوم بنفس الترتيب، من نسخة محلية تُحدَّث من الجدول المشترك دورياً"""
+    now = time.monotonic()
+    interval = _check_interval()
+    versions = {}
+    stale = []
+    for tag in tags:
+        cached = _local_versions.get(tag)
+        if cached and now - cached[1] < interval:
+            versions[tag] = cached[0]
+        else:
+            stale.append(tag)
+    if stale:
+        # الإصدارات من الرئيسية: نسخة قراءة متأخرة كانت ستعيد مفاتيح مدخلات أُبطلت للتو
+        with pin_to_primary():
+            found = dict(CacheTagVersion.objects.filter(tag__in=stale).values_list('tag', 'version'))
+        for tag in stale:
+            versions[tag] = found.get(tag, 0)
+            _local_versions[tag] = (versions[tag], now)
+    return [versions[tag] for tag in tags]
+
+
+def versions_visible_on(using, versions):
+    """هل وصلت إلى قاعدة ``using`` (نسخة القراءة) رفعات الإصدارات ``{الوسم: الإصدار}`` كلها"""
+    found = dict(CacheTagVersion.objects.using(using).filter(tag__in=list(versions)).values_list('tag', 'version'))
+    return all(found.get(tag, 0) >= version for tag, version in versions.items())
+
+
+def _bump(tags, using=DEFAULT_DB_ALIAS):
+    now = timezone.now()
+    connection = connections[using]
+    if connection.vendor in ('sqlite', 'postgresql'):
+        # جملة upsert واحدة بلا BEGIN/COMMIT: أقصر كتابة ممكنة بعد كل معاملة
+        table = connection.ops.quote_name(CacheTagVersion._meta.db_table)
+        updated_at = connection.ops.adapt_datetimefield_value(now)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (tag, version, updated_at) VALUES {", ".join(["(%s, 1, %s)"] * len(tags))} '
+                f'ON CONFLICT (tag) DO UPDATE SET version = {table}.version + 1, updated_at = excluded.updated_at',
+                [param for tag in tags for param in (tag, updated_at)],
+            )
+    else:
+        with transaction.atomic(using=using):
+            CacheTagVersion.objects.using(using).bulk_create(
+                [CacheTagVersion(tag=tag, version=0, updated_at=now) for tag in tags],
+                ignore_conflicts=True,
+            )
+            CacheTagVersion.objects.using(using).filter(tag__in=tags).update(
+                version=F('version') + 1, updated_at=now,
+            )
+    for tag in tags:
+        _local_versions.pop(tag, None)
+
+
+def _flush_committed(using):
+    # أول استدعاء بعد النجاح يرفع وسوم المعاملة كلها، والبقية تجد القائمة فارغة
+    tags = (_committing.get() or {}).pop(using, None)
+    if tags:
+        _bump(sorted(tags), using)
+
+
+def invalidate_tags(*tags, using=DEFAULT_DB_ALIAS):
+    """رفع إصدارات الوسوم بعد نجاح المعاملة الحالية (فوراً خارج المعاملات)، برفع واحد لكل معاملة"""
+    pending = _pending.get()
+    if pending is not None:
+        pending.update(tags)
+        return
+    if not tags:
+        return
+    if not connections[using].in_atomic_block:
+        _bump(sorted(set(tags)), using)
+        return
+    committing = _committing.get()
+    if committing is None:
+        committing = {}
+        _committing.set(committing)
+    committing.setdefault(using, set()).update(tags)
+    # استدعاء لكل عملية لا للمعاملة فقط: التراجع إلى نقطة حفظ يسقط استدعاءاتها، ووسومها الباقية
+    # في القائمة يرفعها استدعاء آخر أو المعاملة التالية (إبطال زائد لا ناقص)
+    transaction.on_commit(lambda: _flush_committed(using), using=using)
+
+
+@contextmanager
+def batched_invalidation():
+    """تجميع كل الإبطالات داخل الكتلة في رفع واحد عند الخروج بدل رفع لكل كائن محذوف أو محفوظ"""
+    if _pending.get() is not None:
+        yield
+        return
+    pending = set()
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+        invalidate_tags(*pending)
+
+
+def _tags(model, scope_ids):
+    rule = TAG_RULES.get(model)
+    if rule is None:
+        return set()
+    _, scoped, static = rule
+    tags = set(static)
+    for scope_id in scope_ids:
+        if scope_id is not None:
+            tags.update(template.format(scope_id) for template in scoped)
+    return tags
+
+
+def _is_ignored(model, fields):
+    fields = set(fields or ())
+    return bool(fields) and fields <= IGNORED_FIELDS.get(model, set())
+
+
+def tags_for_instances(model, objs, fields=None):
+    """الوسوم المتأثرة بحفظ مجموعة كائنات"""
+    rule = TAG_RULES.get(model)
+    if rule is None or _is_ignored(model, fields):
+        return set()
+    field = rule[0]
+    return _tags(model, {getattr(obj, field) for obj in objs} if field else ())
+
+
+def _filtered_scope(queryset, field):
+    """قيم حقل النطاق إن كانت شروط الاستعلام تحددها (``field=x`` أو ``field__in=[...]``)، وإلا None"""
+    where = queryset.query.where
+    if where.connector != 'AND' or where.negated:
+        return None
+    attname = queryset.model._meta.pk.attname if field == 'pk' else field
+    for lookup in where.children:
+        if not isinstance(getattr(lookup, 'lhs', None), Col) or lookup.lhs.target.attname != attname:
+            continue
+        if lookup.lookup_name == 'exact' and not hasattr(lookup.rhs, 'resolve_expression'):
+            return {lookup.rhs}
+        if lookup.lookup_name == 'in' and isinstance(lookup.rhs, (list, tuple, set)):
+            return set(lookup.rhs)
+    return None
+
+
+def tags_for_queryset(queryset, fields=None):
+    """الوسوم المتأثرة بتحديث جماعي؛ تُحسب قبل التحديث لأن الشروط قد تعتمد على الحقول المعدلة
+
+    إن حددت الشروط حقل النطاق (مثل ``filter(user=...)``) أُخذت قيمه منها بدل ``SELECT DISTINCT``.
+    """
+    model = queryset.model
+    rule = TAG_RULES.get(model)
+    if rule is None or _is_ignored(model, fields):
+        return set()
+    field = rule[0]
+    if field is None:
+        return _tags(model, ())
+    scope_ids = _filtered_scope(queryset, field)
+    if scope_ids is None:
+        scope_ids = set(queryset.order_by().values_list(field, flat=True).distinct())
+    return _tags(model, scope_ids)
+
+
+def _on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    tags = tags_for_instances(sender, [instance], update_fields)
+    previous_hall_id = getattr(instance, '_loaded_hall_id', None)
+    if tags and previous_hall_id is not None and previous_hall_id != instance.hall_id:
+        # نقل الحجز إلى قاعة أخرى يغير توفر القاعة القديمة أيضاً
+        tags |= _tags(sender, [previous_hall_id])
+    if hasattr(instance, '_loaded_hall_id'):
+        instance._loaded_hall_id = instance.hall_id
+    invalidate_tags(*tags)
+
+
+def _on_delete(sender, instance, **kwargs):
+    invalidate_tags(*tags_for_instances(sender, [instance]))
+
+
+def connect_signals():
+    for model in TAG_RULES:
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'hb_invalidate_save_{model.__name__}')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'hb_invalidate_delete_{model.__name__}')
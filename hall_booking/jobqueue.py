@@ -0,0 +1,221 @@
+"""
+طابور مهام خلفية خفيف يعتمد على قاعدة البيانات (بدون وسيط خارجي).
+
+- التسجيل: ``@task`` يربط اسماً ثابتاً بدالة تنفيذ.
+- الإضافة: ``enqueue(...)`` تكلف عملية INSERT واحدة فقط، لذا تصلح للمسارات الساخنة.
+- التنفيذ: ``Worker`` يحجز المهام بتحديث ذري واحد ويشغلها في مجمع خيوط أو عمليات.
+"""
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def task(name=None, max_attempts=None):
+    """تسجيل دالة كمهمة خلفية يمكن إضافتها للطابور باسمها"""
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        func.task_name = task_name
+        func.max_attempts = max_attempts
+        _registry[task_name] = func
+        return func
+    return decorator
+
+
+def get_task(task_name):
+    return _registry[task_name]
+
+
+def enqueue(task_name, payload=None, dedup_key=None, run_at=None, max_attempts=None):
+    """إضافة مهمة للطابور بعملية INSERT واحدة
+
+    عند تمرير ``dedup_key`` تُتجاهل الإضافة بصمت إذا وُجدت مهمة نشطة بنفس المفتاح.
+    """
+    if callable(task_name):
+        max_attempts = max_attempts or getattr(task_name, 'max_attempts', None)
+        task_name = task_name.task_name
+    job = BackgroundJob(
+        task_name=task_name,
+        payload=payload or {},
+        dedup_key=dedup_key,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or get_setting('JOB_QUEUE_MAX_ATTEMPTS', 5),
+    )
+    if dedup_key:
+        BackgroundJob.objects.bulk_create([job], ignore_conflicts=True)
+    else:
+        job.save(force_insert=True)
+    return job
+
+
+def _claimable(now):
+    # مهام مستحقة، أو مهام انتهت مهلة حجزها (عامل توقف فجأة) ولم تستنفد محاولاتها
+    return Q(status='queued', run_at__lte=now) | Q(
+        status='running', locked_until__lt=now, attempts__lt=F('max_attempts')
+    )
+
+
+def fail_abandoned_jobs(now=None):
+    """إنهاء المهام التي أوقفت عاملها (نفاد الذاكرة أو انهيار العملية) في كل محاولاتها كفشل نهائي"""
+    now = now or timezone.now()
+    failed = BackgroundJob.objects.filter(
+        status='running', locked_until__lt=now, attempts__gte=F('max_attempts')
+    ).update(
+        status='failed',
+        last_error='Worker stopped before finishing the job on every attempt (visibility timeout expired)',
+        finished_at=now,
+        locked_until=None,
+    )
+    if failed:
+        logger.error("Marked %s abandoned job(s) as failed after exhausting their attempts", failed)
+    return failed
+
+
+def claim_jobs(worker_id, limit, visibility_timeout=None):
+    """حجز حتى ``limit`` مهمة مستحقة بتحديث ذري واحد وإرجاعها"""
+    if limit <= 0:
+        return []
+    visibility_timeout = visibility_timeout or get_setting('JOB_QUEUE_VISIBILITY_TIMEOUT', 300)
+    now = timezone.now()
+    fail_abandoned_jobs(now)
+    token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+    candidates = BackgroundJob.objects.filter(_claimable(now)).order_by('run_at').values('pk')[:limit]
+    claimed = BackgroundJob.objects.filter(_claimable(now), pk__in=candidates).update(
+        status='running',
+        locked_by=token,
+        locked_until=now + timedelta(seconds=visibility_timeout),
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return []
+    return list(BackgroundJob.objects.filter(locked_by=token, status='running'))
+
+
+def retry_delay(attempts):
+    """تأخير تصاعدي أسي مع عشوائية بسيطة قبل إعادة المحاولة (بالثواني)"""
+    base = get_setting('JOB_QUEUE_RETRY_BACKOFF', 30)
+    cap = get_setting('JOB_QUEUE_MAX_BACKOFF', 3600)
+    delay = min(cap, base * (2 ** max(attempts - 1, 0)))
+    return delay + random.uniform(0, base)
+
+
+def run_job(job):
+    """تنفيذ مهمة محجوزة وتسجيل نتيجتها (نجاح، إعادة جدولة، أو فشل نهائي)"""
+    owned = BackgroundJob.objects.filter(pk=job.pk, locked_by=job.locked_by, status='running')
+    try:
+        func = get_task(job.task_name)
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts or job.task_name not in _registry:
+            owned.update(status='failed', last_error=error, finished_at=now, locked_until=None)
+            logger.error("Job %s (%s) failed permanently", job.pk, job.task_name)
+        else:
+            owned.update(
+                status='queued',
+                last_error=error,
+                locked_until=None,
+                run_at=now + timedelta(seconds=retry_delay(job.attempts)),
+            )
+            logger.warning("Job %s (%s) failed, retry scheduled", job.pk, job.task_name)
+        return False
+    owned.update(status='succeeded', finished_at=timezone.now(), locked_until=None, last_error='')
+    return True
+
+
+def _run_job_in_thread(job):
+    close_old_connections()
+    try:
+        return run_job(job)
+    finally:
+        connections.close_all()
+
+
+def _run_job_in_process(job_pk, token):
+    autodiscover_modules('tasks')
+    close_old_connections()
+    job = BackgroundJob.objects.filter(pk=job_pk, locked_by=token).first()
+    if job is None:
+        return False
+    return run_job(job)
+
+
+class Worker:
+    """عامل ينفذ المهام بتوازٍ محدد عبر مجمع خيوط أو عمليات"""
+
+    def __init__(self, concurrency=4, pool='thread', poll_interval=1.0, visibility_timeout=None):
+        self.concurrency = max(1, concurrency)
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stop_event = threading.Event()
+        autodiscover_modules('tasks')
+
+    def _make_executor(self):
+        if self.pool == 'process':
+            # spawn بدلاً من fork حتى لا ترث العمليات اتصالات قاعدة البيانات المفتوحة
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='hb-worker')
+
+    def _submit(self, executor, job):
+        if self.pool == 'process':
+            return executor.submit(_run_job_in_process, job.pk, job.locked_by)
+        return executor.submit(_run_job_in_thread, job)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self, burst=False):
+        """حلقة العامل؛ في وضع ``burst`` يتوقف عند فراغ الطابور"""
+        processed = 0
+        in_flight = set()
+        with self._make_executor() as executor:
+            while not self.stop_event.is_set():
+                free_slots = self.concurrency - len(in_flight)
+                jobs = claim_jobs(self.worker_id, free_slots, self.visibility_timeout) if free_slots else []
+                for job in jobs:
+                    in_flight.add(self._submit(executor, job))
+
+                if not in_flight:
+                    if burst:
+                        break
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+
+                done, in_flight = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    processed += 1
+                    if future.exception() is not None:
+                        logger.error("Worker crashed while running a job", exc_info=future.exception())
+            wait(in_flight)
+            processed += len(in_flight)
+        return processed
@@ -0,0 +1,96 @@
+"""عمليات دورية على الحجوزات تُشغَّل من أوامر الإدارة أو من طابور المهام الخلفية"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .availability import purge_expired_holds
+from .models import Booking, Notification, bulk_change_status
+
+
+def send_due_reminders(window=None, batch_size=500, now=None):
+    """إنشاء إشعارات تذكير للحجوزات الموافق عليها التي تبدأ خلال النافذة المحددة
+
+    العملية متكررة بأمان: كل حجز يُعلَّم بـ ``reminder_sent_at`` ضمن نفس المعاملة
+    التي تُنشأ فيها إشعاراته، فلا يُذكَّر به مرتين. يعتمد المسح على فهرس
+    ``(status, start_datetime)`` فتكون تكلفته بحجم الحجوزات المستحقة فقط.
+
+    تُعاد ``{'sent': عدد الإشعارات المنشأة, 'guests': حجوزات بلا حساب عُلّمت دون إشعار}``.
+    """
+    now = now or timezone.now()
+    if window is None:
+        window = timedelta(hours=getattr(settings, 'BOOKING_REMINDER_WINDOW_HOURS', 24))
+    due = Booking.objects.filter(
+        status='approved',
+        start_datetime__gte=now,
+        start_datetime__lte=now + window,
+        reminder_sent_at__isnull=True,
+    ).order_by('start_datetime')
+
+    sent = guests = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                due.values('pk', 'user_id', 'event_title', 'hall__name', 'start_datetime')[:batch_size]
+            )
+            if not batch:
+                break
+            created = Notification.objects.bulk_create([
+                Notification(
+                    user_id=row['user_id'],
+                    booking_id=row['pk'],
+                    notification_type='booking_reminder',
+                    title='تذكير بموعد حجزك',
+                    message=(
+                        f'نذكرك بموعد حجز "{row["event_title"]}" في قاعة {row["hall__name"]} '
+                        f'يوم {timezone.localtime(row["start_datetime"]):%Y-%m-%d} '
+                        f'الساعة {timezone.localtime(row["start_datetime"]):%H:%M}.'
+                    ),
+                )
+                for row in batch
+                if row['user_id']
+            ])
+            Booking.objects.filter(pk__in=[row['pk'] for row in batch]).update(reminder_sent_at=now)
+        sent += len(created)
+        guests += len(batch) - len(created)
+    return {'sent': sent, 'guests': guests}
+
+
+def _transition_in_chunks(queryset, new_status, chunk_size):
+    """نقل الحجوزات المطابقة إلى حالة جديدة على دفعات ``UPDATE ... WHERE id IN (...)``"""
+    total = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        total += bulk_change_status(Booking.objects.filter(pk__in=ids), new_status, notify=True)
+
+
+def complete_finished_bookings(chunk_size=500, now=None):
+    """تحويل الحجوزات الموافق عليها التي انتهى موعدها إلى مكتملة"""
+    now = now or timezone.now()
+    finished = Booking.objects.filter(status='approved', end_datetime__lte=now).order_by('pk')
+    return _transition_in_chunks(finished, 'completed', chunk_size)
+
+
+def expire_stale_pending(ttl=None, chunk_size=500, now=None):
+    """إلغاء الطلبات المعلقة الأقدم من المهلة أو التي فات موعد بدايتها حتى لا تحجب التوفر"""
+    now = now or timezone.now()
+    if ttl is None:
+        ttl = timedelta(hours=getattr(settings, 'BOOKING_PENDING_TTL_HOURS', 72))
+    stale = Booking.objects.filter(status='pending').filter(
+        Q(created_at__lt=now - ttl) | Q(start_datetime__lt=now)
+    ).order_by('pk')
+    return _transition_in_chunks(stale, 'cancelled', chunk_size)
+
+
+def run_booking_lifecycle(pending_ttl=None, chunk_size=500):
+    """تشغيل جميع انتقالات دورة حياة الحجز المجدولة"""
+    now = timezone.now()
+    return {
+        'completed': complete_finished_bookings(chunk_size=chunk_size, now=now),
+        'expired': expire_stale_pending(ttl=pending_ttl, chunk_size=chunk_size, now=now),
+        'holds_purged': purge_expired_holds(now=now),
+    }
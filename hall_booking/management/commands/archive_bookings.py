@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hall_booking.archive import (archivable_bookings, archivable_notifications, archive_bookings,
+                                  archive_cutoff, archive_notifications)
+from hall_booking.models import Notification
+
+
+class Command(BaseCommand):
+    help = ("Move finished bookings (with their services, meals, status history and notifications) and old "
+            "read notifications into the archive tables")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None,
+                            help='Archive rows older than this many months (default: ARCHIVE_AFTER_MONTHS)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows moved per write transaction (default: ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches of each kind (for off-peak windows)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['months'])
+        self.stdout.write(f'Archiving rows older than {cutoff:%Y-%m-%d %H:%M}')
+
+        if options['dry_run']:
+            bookings = archivable_bookings(cutoff)
+            attached = Notification.objects.filter(booking__in=bookings).count()
+            self.stdout.write(self.style.WARNING(
+                f'Would archive {bookings.count()} bookings with {attached} notifications, '
+                f'and {archivable_notifications(cutoff).count()} other read notifications.'
+            ))
+            return
+
+        started = time.monotonic()
+        bookings, attached = archive_bookings(cutoff, options['batch_size'], options['max_batches'])
+        notifications = archive_notifications(cutoff, options['batch_size'], options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {bookings} bookings with {attached} notifications, and {notifications} other read '
+            f'notifications in {time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hall_booking import bench_history
+
+
+class Command(BaseCommand):
+    help = "Compare two recorded benchmark runs with bootstrap confidence intervals and flag per-view regressions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('base', nargs='?', default='previous',
+                            help='Base run: id, git commit prefix, "latest" or "previous" (default: previous)')
+        parser.add_argument('head', nargs='?', default='latest',
+                            help='Head run: id, git commit prefix, "latest" or "previous" (default: latest)')
+        parser.add_argument('--profile', default=None, help='Only consider runs recorded with this dataset profile')
+        parser.add_argument('--threshold', type=float, default=0.05,
+                            help='Latency slowdown tolerated beyond the confidence interval (default: 0.05)')
+        parser.add_argument('--memory-threshold', type=float, default=0.10,
+                            help='Peak-memory growth tolerated beyond the confidence interval (default: 0.10)')
+        parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level (default: 0.95)')
+        parser.add_argument('--resamples', type=int, default=2000, help='Bootstrap resamples (default: 2000)')
+        parser.add_argument('--list', action='store_true', help='List recorded runs and exit')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error when any view regressed')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for run in bench_history.list_runs(profile=options['profile']):
+                dirty = '+dirty' if run['git_dirty'] else ''
+                self.stdout.write(
+                    f"#{run['id']:<5}{run['created_at'][:19]}  {run['git_commit'][:10]}{dirty:<7}"
+                    f"{run['profile']:<8}{run['iterations']:>4} it{'  cold' if run['cold'] else ''}"
+                )
+            return
+
+        base_run, base = self._load(options['base'], options['profile'])
+        head_run, head = self._load(options['head'], options['profile'])
+        if base_run['profile'] != head_run['profile']:
+            self.stderr.write(self.style.WARNING(
+                f"Comparing different dataset profiles ({base_run['profile']} vs {head_run['profile']})"
+            ))
+        self.stdout.write(
+            f"base #{base_run['id']} {base_run['git_commit'][:10]}  ->  head #{head_run['id']} {head_run['git_commit'][:10]}"
+        )
+
+        rows = bench_history.compare_runs(
+            base, head, threshold=options['threshold'], memory_threshold=options['memory_threshold'],
+            resamples=options['resamples'], confidence=options['confidence'],
+        )
+        self.stdout.write(f"{'scenario':<22}{'latency ratio [CI]':>26}{'queries':>12}{'peak ratio [CI]':>26}  verdict")
+        regressions = 0
+        for row in rows:
+            if 'missing' in row:
+                self.stdout.write(f"{row['scenario']:<22}  (missing in {row['missing']})")
+                continue
+            verdict = 'ok'
+            if row['regressions']:
+                regressions += 1
+                verdict = self.style.ERROR('REGRESSED: ' + ', '.join(row['regressions']))
+            elif row['improvements']:
+                verdict = self.style.SUCCESS('improved: ' + ', '.join(row['improvements']))
+            queries = f"{row['queries'][0]}->{row['queries'][1]}"
+            self.stdout.write(
+                f"{row['scenario']:<22}{self._ratio(row['latency']):>26}{queries:>12}"
+                f"{self._ratio(row['memory']):>26}  {verdict}"
+            )
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{regressions} view(s) regressed')
+        if regressions:
+            self.stdout.write(self.style.WARNING(f'{regressions} view(s) regressed.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def _load(self, ref, profile):
+        run_id = bench_history.resolve_run(ref, profile=profile)
+        if run_id is None:
+            raise CommandError(f'No recorded benchmark run matches "{ref}"; use benchmark_views --record')
+        return bench_history.load_run(run_id)
+
+    @staticmethod
+    def _ratio(interval):
+        if not interval:
+            return '-'
+        point, low, high = interval
+        return f'{point:.2f} [{low:.2f}, {high:.2f}]'
@@ -0,0 +1,95 @@
+import io
+import json
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from hall_booking import bench_history, benchmark
+from hall_booking.dataset import PROFILES, generate_dataset
+
+
+class Command(BaseCommand):
+    help = "Benchmark key views (p50/p95 latency, SQL count and time) and fail when a view exceeds its budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help='Scenario names or prefixes (default: all)')
+        parser.add_argument('--iterations', type=int, default=20, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per scenario')
+        parser.add_argument('--cold', action='store_true', help='Clear caches before every request')
+        parser.add_argument('--fresh-db', action='store_true',
+                            help='Run against a new test database filled by generate_dataset')
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='small',
+                            help='Dataset profile for --fresh-db (default: small)')
+        parser.add_argument('--seed', type=int, default=0, help='Dataset seed for --fresh-db')
+        parser.add_argument('--budgets', default=None, help='Budgets JSON file (default: BENCHMARK_BUDGETS_FILE)')
+        parser.add_argument('--update-budgets', action='store_true',
+                            help='Write budgets from this run instead of checking them')
+        parser.add_argument('--headroom', type=float, default=3.0,
+                            help='p95 multiplier used by --update-budgets (default: 3.0)')
+        parser.add_argument('--memory-samples', type=int, default=3,
+                            help='Extra tracemalloc requests per scenario for peak memory (default: 3)')
+        parser.add_argument('--record', action='store_true',
+                            help='Store this run in the benchmark history (BENCHMARK_HISTORY_FILE) for bench_compare')
+        parser.add_argument('--json', dest='json_path', default=None, help='Also write raw results to this file')
+
+    def handle(self, *args, **options):
+        if 'testserver' not in settings.ALLOWED_HOSTS and '*' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        if options['fresh_db']:
+            results = self._run_on_fresh_db(options)
+        else:
+            results = self._run(options)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(results, fh, indent=2, ensure_ascii=False)
+
+        if options['record']:
+            # خارج --fresh-db لا نعرف حجم البيانات، فتُجمع هذه التشغيلات تحت ملف "local"
+            profile = options['profile'] if options['fresh_db'] else 'local'
+            run_id = bench_history.record_run(results, profile, options['iterations'], cold=options['cold'])
+            self.stdout.write(self.style.SUCCESS(f'Recorded run #{run_id} ({profile}) in {bench_history.history_path()}'))
+
+        if options['update_budgets']:
+            path = benchmark.save_budgets(results, options['budgets'], headroom=options['headroom'])
+            self.stdout.write(self.style.SUCCESS(f'Budgets written to {path}'))
+            return
+
+        failures = benchmark.check_budgets(results, benchmark.load_budgets(options['budgets']))
+        if failures:
+            for name, metric, value, budget in failures:
+                self.stderr.write(f'{name}: {metric} {value} exceeds budget {budget}')
+            raise CommandError(f'{len(failures)} benchmark budget(s) exceeded')
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} scenarios within budget.'))
+
+    def _run(self, options):
+        self.stdout.write(f"{'scenario':<22}{'ok':>4}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'sql ms':>9}{'peak KB':>10}")
+
+        def progress(result):
+            self.stdout.write(
+                f"{result['name']:<22}{'yes' if result['ok'] else 'NO':>4}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{result['queries']:>9}{result['sql_ms']:>9.2f}{result['peak_kb'] or 0:>10.1f}"
+            )
+
+        try:
+            return benchmark.run_benchmarks(
+                names=options['scenarios'], iterations=options['iterations'], warmup=options['warmup'],
+                cold=options['cold'], memory_samples=options['memory_samples'], progress=progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+    def _run_on_fresh_db(self, options):
+        old_name = connection.settings_dict['NAME']
+        # مدخلات القياس منفصلة ببادئتها (benchmark.bench_cache) وتُحذف بعده، والقاعدة الحقيقية لا تُمس
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command('populate_egypt_locations', stdout=io.StringIO())
+            self.stdout.write(f"Generating '{options['profile']}' dataset...")
+            counts = generate_dataset(profile=options['profile'], seed=options['seed'])
+            self.stdout.write(f"{counts['halls']} halls, {counts['bookings']} bookings")
+            return self._run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
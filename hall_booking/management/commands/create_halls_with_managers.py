@@ -1,10 +1,11 @@
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
-from hall_booking.models import Category, Hall, HallImage, HallManager
+from hall_booking.models import Category, City, Hall, HallImage, HallManager
+from hall_booking.seeding import command_seeder
 import random
 import requests
-from io import BytesIO
 
 class Command(BaseCommand):
     help = 'إنشاء قاعات مع صور من الإنترنت ومديرين تجريبيين'
@@ -71,108 +72,133 @@ class Command(BaseCommand):
         if not categories:
             self.stdout.write(self.style.ERROR('لا توجد فئات قاعات في قاعدة البيانات!'))
             return
-        
-        halls_created = 0
-        managers_created = 0
-        
-        for i in range(count):
-            # إنشاء مستخدم جديد ليكون مدير القاعة
-            username = f'hall_manager_{i+1}'
-            email = f'manager{i+1}@example.com'
-            
-            # التحقق من عدم وجود المستخدم مسبقاً
-            if User.objects.filter(username=username).exists():
-                user = User.objects.get(username=username)
-            else:
-                user = User.objects.create_user(
-                    username=username,
-                    email=email,
-                    password='manager123',
-                    first_name=f'مدير',
+
+        cities = list(City.objects.select_related('governorate'))
+        if not cities:
+            self.stdout.write(self.style.ERROR('لا توجد مدن! يرجى تشغيل populate_egypt_locations أولاً'))
+            return
+
+        seeder = command_seeder(self)
+
+        # المستخدمون بمفتاح اسم المستخدم؛ تجزئة كلمة المرور مرة واحدة بدلاً من مرة لكل مستخدم
+        password = make_password('manager123')
+        existing_users = set(
+            User.objects.filter(username__startswith='hall_manager_').values_list('username', flat=True)
+        )
+        users = seeder.upsert(
+            User,
+            [
+                User(
+                    username=f'hall_manager_{i+1}',
+                    email=f'manager{i+1}@example.com',
+                    password=password,
+                    first_name='مدير',
                     last_name=f'القاعة {i+1}'
                 )
-                managers_created += 1
-            
-            # إنشاء القاعة
+                for i in range(count)
+            ],
+            unique_fields=['username'],
+            update_fields=['email', 'first_name', 'last_name'],
+        )
+        managers_created = len({key[0] for key in users} - existing_users)
+
+        halls = []
+        for i in range(count):
             hall_name = hall_names[i % len(hall_names)]
             unique_name = f"{hall_name} - {i+1}"
-            
-            category = random.choice(categories)
-            capacity = random.randint(50, 500)
-            price_per_hour = random.randint(100, 1000)
-            features = random.choice(features_list)
-            
-            description = f"قاعة {unique_name} - قاعة مجهزة بالكامل تناسب جميع أنواع المناسبات والفعاليات. تتميز بموقع مميز وخدمة عالية الجودة."
-            
-            # تحميل الصورة الرئيسية
-            main_image_url = image_urls[i % len(image_urls)]
-            try:
-                response = requests.get(main_image_url, timeout=10)
-                response.raise_for_status()
-                image_content = ContentFile(response.content)
-                image_name = f"hall_{i+1}_main.jpg"
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f'فشل تحميل الصورة الرئيسية: {e}'))
-                image_content = None
-                image_name = None
-            
-            # إنشاء القاعة
-            hall = Hall.objects.create(
+            city = random.choice(cities)
+            halls.append(Hall(
                 name=unique_name,
-                category=category,
-                description=description,
-                capacity=capacity,
-                price_per_hour=price_per_hour,
+                category=random.choice(categories),
+                governorate=city.governorate,
+                city=city,
+                address=f"{city.name}، {city.governorate.name}",
+                description=f"قاعة {unique_name} - قاعة مجهزة بالكامل تناسب جميع أنواع المناسبات والفعاليات. تتميز بموقع مميز وخدمة عالية الجودة.",
+                capacity=random.randint(50, 500),
+                price_per_hour=random.randint(100, 1000),
                 status='available',
-                features=features
-            )
-            
-            # إضافة الصورة الرئيسية
-            if image_content and image_name:
-                hall.image.save(image_name, image_content, save=True)
-            
-            # إضافة صور إضافية للمعرض
-            for j, gallery_url in enumerate(gallery_urls[:3]):  # إضافة 3 صور لكل قاعة
+                features=random.choice(features_list)
+            ))
+        # الصورة لا تُستبدل عند إعادة التشغيل
+        saved_halls = seeder.upsert(
+            Hall, halls, unique_fields=['name'],
+            update_fields=['category', 'governorate', 'city', 'address', 'description', 'capacity',
+                           'price_per_hour', 'status', 'features'],
+        )
+        hall_list = [saved_halls[(hall.name,)] for hall in halls]
+
+        # تحميل الصور للقاعات التي ليس لها صور بعد، وكل رابط يُحمّل مرة واحدة
+        downloads = {}
+
+        def download(url, label):
+            if url not in downloads:
                 try:
-                    response = requests.get(gallery_url, timeout=10)
+                    response = requests.get(url, timeout=10)
                     response.raise_for_status()
-                    gallery_image_content = ContentFile(response.content)
-                    gallery_image_name = f"hall_{i+1}_gallery_{j+1}.jpg"
-                    
-                    hall_image = HallImage.objects.create(
-                        hall=hall,
-                        image_type='gallery',
-                        title=f'صورة {j+1} لقاعة {hall.name}',
-                        order=j+1
-                    )
-                    hall_image.image.save(gallery_image_name, gallery_image_content, save=True)
-                    
+                    downloads[url] = response.content
                 except Exception as e:
-                    self.stdout.write(self.style.WARNING(f'فشل تحميل صورة المعرض {j+1}: {e}'))
-            
-            # تعيين المستخدم كمدير للقاعة
-            if not HallManager.objects.filter(user=user).exists():
-                HallManager.objects.create(
-                    user=user,
+                    self.stdout.write(self.style.WARNING(f'فشل تحميل {label}: {e}'))
+                    downloads[url] = None
+            return downloads[url]
+
+        with_gallery = set(
+            HallImage.objects.filter(hall__in=hall_list).values_list('hall_id', flat=True).distinct()
+        )
+        main_images = []
+        gallery_images = []
+        for i, hall in enumerate(hall_list):
+            if not hall.image:
+                content = download(image_urls[i % len(image_urls)], 'الصورة الرئيسية')
+                if content:
+                    hall.image.save(f"hall_{i+1}_main.jpg", ContentFile(content), save=False)
+                    main_images.append(hall)
+
+            if hall.pk in with_gallery:
+                continue
+            # إضافة 3 صور لكل قاعة
+            for j, gallery_url in enumerate(gallery_urls[:3]):
+                content = download(gallery_url, f'صورة المعرض {j+1}')
+                if not content:
+                    continue
+                hall_image = HallImage(
+                    hall=hall,
+                    image_type='gallery',
+                    title=f'صورة {j+1} لقاعة {hall.name}',
+                    order=j+1
+                )
+                hall_image.image.save(f"hall_{i+1}_gallery_{j+1}.jpg", ContentFile(content), save=False)
+                gallery_images.append(hall_image)
+
+        if main_images:
+            Hall.objects.bulk_update(main_images, ['image'])
+        seeder.create(HallImage, gallery_images)
+
+        # تعيين كل مستخدم مديراً لقاعته
+        seeder.upsert(
+            HallManager,
+            [
+                HallManager(
+                    user=users[(f'hall_manager_{i+1}',)],
                     hall=hall,
                     permission_level='manage',
                     is_active=True,
                     notes=f'مدير تجريبي للقاعة {hall.name}'
                 )
-            
-            halls_created += 1
-            if halls_created % 2 == 0:
-                self.stdout.write(f'تم إنشاء {halls_created} قاعة...')
-        
+                for i, hall in enumerate(hall_list)
+            ],
+            unique_fields=['user'],
+            update_fields=['hall', 'permission_level', 'is_active', 'notes'],
+        )
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'تم إنشاء {halls_created} قاعة و {managers_created} مدير قاعة بنجاح!'
+                f'تم تحديث {len(hall_list)} قاعة وإنشاء {managers_created} مدير قاعة بنجاح!'
             )
         )
         
         # عرض معلومات المديرين
         self.stdout.write('\n=== معلومات مديري القاعات ===')
-        for manager in HallManager.objects.filter(is_active=True):
+        for manager in HallManager.objects.filter(is_active=True).select_related('user', 'hall'):
             self.stdout.write(
                 f'المدير: {manager.user.username} | القاعة: {manager.hall.name} | كلمة المرور: manager123'
             )
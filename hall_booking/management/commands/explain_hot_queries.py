@@ -0,0 +1,97 @@
+import io
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from hall_booking import queryplan
+from hall_booking.dataset import PROFILES, generate_dataset
+
+
+class Command(BaseCommand):
+    help = ("Run EXPLAIN on the querysets behind the hot views and flag full table scans "
+            "and temporary sort B-trees")
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*',
+                            help=f"Hot query names or prefixes (default: all of "
+                                 f"{', '.join(query.name for query in queryplan.HOT_QUERIES)})")
+        parser.add_argument('--database', default='default', help='Database alias (default: default)')
+        parser.add_argument('--fresh-db', action='store_true',
+                            help='Run against a new test database filled by generate_dataset')
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='medium',
+                            help='Dataset profile for --fresh-db (default: medium)')
+        parser.add_argument('--seed', type=int, default=0, help='Dataset seed for --fresh-db')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Ignore full scans of tables smaller than this (default: 1000)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per hot query for the median (default: 5, 0 to skip)')
+        parser.add_argument('--plans', action='store_true', help='Print the plan of every statement, not only flagged ones')
+        parser.add_argument('--json', dest='json_path', default=None, help='Also write the report to this file')
+        parser.add_argument('--fail-on-flags', action='store_true',
+                            help='Exit with an error when any statement is flagged')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'EXPLAIN is not supported for the {connection.vendor} backend')
+        if options['fresh_db']:
+            report = self._audit_on_fresh_db(connection, options)
+        else:
+            report = self._audit(options)
+
+        flagged = self._print(report, options['plans'])
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Report written to {options['json_path']}")
+
+        if flagged and options['fail_on_flags']:
+            raise CommandError(f'{flagged} statement(s) flagged')
+        if flagged:
+            self.stdout.write(self.style.WARNING(f'{flagged} statement(s) flagged.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No full scans or temporary sorts.'))
+
+    def _audit(self, options):
+        try:
+            return queryplan.audit(options['queries'], using=options['database'], min_rows=options['min_rows'],
+                                   repeat=options['repeat'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+    def _audit_on_fresh_db(self, connection, options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command('populate_egypt_locations', stdout=io.StringIO())
+            self.stdout.write(f"Generating '{options['profile']}' dataset...")
+            counts = generate_dataset(profile=options['profile'], seed=options['seed'])
+            self.stdout.write(f"{counts['halls']} halls, {counts['bookings']} bookings")
+            # إحصاءات المخطِّط كما تكون في قاعدة عاملة، وإلا اختار خططاً لا تمثل الواقع
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            return self._audit(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _print(self, report, show_plans):
+        flagged = 0
+        for entry in report:
+            timing = f" (median {entry['median_ms']:.2f} ms)" if entry['median_ms'] is not None else ''
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{entry['name']}: {entry['description']}{timing}"))
+            for statement in entry['statements']:
+                flags = statement['flags']
+                flagged += bool(flags)
+                if not flags and not show_plans:
+                    continue
+                timing = f" [{statement['execution_ms']:.2f} ms]" if statement['execution_ms'] is not None else ''
+                self.stdout.write(f"  {statement['sql'][:160]}{timing}")
+                for line in statement['plan']:
+                    self.stdout.write(f'      {line}')
+                for kind, target in flags:
+                    self.stdout.write(self.style.WARNING(f'    ! {kind}: {target}'))
+            clean = sum(not statement['flags'] for statement in entry['statements'])
+            self.stdout.write(f"  {clean}/{len(entry['statements'])} statements clean")
+        return flagged
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from hall_booking.dataset import PROFILES, generate_dataset, resolve_profile
+from hall_booking.models import City
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic load/benchmark dataset (halls, users, non-overlapping bookings) without network access"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='small',
+                            help='Dataset size profile (default: small)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed yields the same rows')
+        parser.add_argument('--halls', type=int, default=None, help='Override the profile hall count')
+        parser.add_argument('--users', type=int, default=None, help='Override the profile user count')
+        parser.add_argument('--bookings', type=int, default=None, help='Override the profile booking count')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per transaction (default: SEED_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        if not City.objects.exists():
+            call_command('populate_egypt_locations', stdout=self.stdout)
+
+        sizes = resolve_profile(options['profile'], halls=options['halls'], users=options['users'],
+                                bookings=options['bookings'])
+        self.stdout.write(
+            f"Profile {options['profile']}: {sizes['halls']} halls, {sizes['users']} users, "
+            f"{sizes['bookings']} bookings (seed {options['seed']})"
+        )
+
+        last_report = [0.0]
+
+        def progress(label, done, total):
+            # الحجوزات تُكتب على آلاف الدفعات؛ سطر كل ثانيتين يكفي
+            now = time.monotonic()
+            if done >= total or now - last_report[0] >= 2:
+                last_report[0] = now
+                self.stdout.write(f'{label}: {done}/{total}')
+
+        started = time.monotonic()
+        counts = generate_dataset(
+            profile=options['profile'], seed=options['seed'], halls=options['halls'], users=options['users'],
+            bookings=options['bookings'], batch_size=options['batch_size'], progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['users']} users, {counts['images']} hall images, {counts['bookings']} bookings, "
+            f"{counts['services']} booking services, {counts['meals']} booking meals, "
+            f"{counts['notifications']} notifications and {counts['events']} status events "
+            f"({counts['halls']} halls) in {time.monotonic() - started:.1f}s."
+        ))
@@ -1,11 +1,13 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
 from hall_booking.models import (
     Governorate, City, Category, Hall, HallImage, HallManager, 
-    HallService, HallMeal, Booking, BookingService, BookingMeal
+    HallService, HallMeal, Booking, BookingService, BookingMeal, generate_reference
 )
-from datetime import datetime, timedelta
-import random
+from hall_booking.seeding import command_seeder, seed_uuid
+from datetime import datetime, time, timedelta
 
 class Command(BaseCommand):
     help = 'Load sample data for the hall booking system'
@@ -20,28 +22,30 @@ class Command(BaseCommand):
 
         # Create Governorates
         governorates_data = [
-            {'name': 'القاهرة', 'name_en': 'Cairo', 'code': 'C', 'region': 'cairo'},
-            {'name': 'الجيزة', 'name_en': 'Giza', 'code': 'GZ', 'region': 'cairo'},
-            {'name': 'الاسكندرية', 'name_en': 'Alexandria', 'code': 'ALX', 'region': 'delta'},
+            {'name': 'القاهرة', 'name_en': 'Cairo', 'code': 'CAI', 'region': 'cairo'},
+            {'name': 'الجيزة', 'name_en': 'Giza', 'code': 'GIZ', 'region': 'cairo'},
+            {'name': 'الإسكندرية', 'name_en': 'Alexandria', 'code': 'ALX', 'region': 'delta'},
         ]
-        governorates = {}
-        for data in governorates_data:
-            gov = Governorate.objects.create(**data)
-            governorates[gov.name] = gov
-            self.stdout.write(f'Created governorate: {gov.name}')
+        seeder = command_seeder(self)
+        # Codes match populate_egypt_locations so both commands upsert the same rows
+        governorates = {
+            gov.name: gov for gov in seeder.upsert(
+                Governorate, [Governorate(**data) for data in governorates_data], unique_fields=['code'],
+            ).values()
+        }
 
         # Create Cities
         cities_data = [
             {'name': 'مدينة نصر', 'name_en': 'Nasr City', 'governorate': governorates['القاهرة'], 'is_capital': False},
             {'name': 'المعادي', 'name_en': 'Maadi', 'governorate': governorates['القاهرة'], 'is_capital': False},
             {'name': 'الدقي', 'name_en': 'Dokki', 'governorate': governorates['الجيزة'], 'is_capital': False},
-            {'name': 'المنتزه', 'name_en': 'Montaza', 'governorate': governorates['الاسكندرية'], 'is_capital': False},
+            {'name': 'المنتزه', 'name_en': 'Montaza', 'governorate': governorates['الإسكندرية'], 'is_capital': False},
         ]
-        cities = {}
-        for data in cities_data:
-            city = City.objects.create(**data)
-            cities[city.name] = city
-            self.stdout.write(f'Created city: {city.name}')
+        cities = {
+            city.name: city for city in seeder.upsert(
+                City, [City(**data) for data in cities_data], unique_fields=['name', 'governorate'],
+            ).values()
+        }
 
         # Create Categories
         categories_data = [
@@ -49,11 +53,11 @@ class Command(BaseCommand):
             {'name': 'قاعات مؤتمرات', 'description': 'قاعات المؤتمرات والندوات'},
             {'name': 'قاعات اجتماعات', 'description': 'قاعات الاجتماعات والتدريب'},
         ]
-        categories = {}
-        for data in categories_data:
-            cat = Category.objects.create(**data)
-            categories[cat.name] = cat
-            self.stdout.write(f'Created category: {cat.name}')
+        categories = {
+            cat.name: cat for cat in seeder.upsert(
+                Category, [Category(**data) for data in categories_data], unique_fields=['name'],
+            ).values()
+        }
 
         # Create Halls
         halls_data = [
@@ -86,15 +90,13 @@ class Command(BaseCommand):
                 'email': 'info@conference-hall.com',
             },
         ]
-        halls = {}
-        for data in halls_data:
-            # Extract features before creating hall
-            features = data.pop('features')
-            hall = Hall.objects.create(**data)
-            hall.features = features  # Add features after creation
-            hall.save()
-            halls[hall.name] = hall
-            self.stdout.write(f'Created hall: {hall.name}')
+        halls = {
+            hall.name: hall for hall in seeder.upsert(
+                Hall, [Hall(**data) for data in halls_data], unique_fields=['name'],
+                update_fields=['category', 'governorate', 'city', 'address', 'description', 'capacity',
+                               'price_per_hour', 'status', 'features', 'phone', 'email'],
+            ).values()
+        }
 
         # Create Hall Services
         services_data = [
@@ -102,11 +104,11 @@ class Command(BaseCommand):
             {'name': 'خدمة الإضاءة', 'description': 'إضاءة احترافية مع مؤثرات ضوئية', 'price': 1500, 'hall': halls['قاعة النخيل الملكية']},
             {'name': 'خدمة الترجمة', 'description': 'ترجمة فورية بثلاث لغات', 'price': 2000, 'hall': halls['قاعة المؤتمرات الكبرى']},
         ]
-        services = {}
-        for data in services_data:
-            service = HallService.objects.create(**data)
-            services[service.name] = service
-            self.stdout.write(f'Created service: {service.name} for {service.hall.name}')
+        services = {
+            service.name: service for service in seeder.upsert(
+                HallService, [HallService(**data) for data in services_data], unique_fields=['hall', 'name'],
+            ).values()
+        }
 
         # Create Hall Meals
         meals_data = [
@@ -129,33 +131,49 @@ class Command(BaseCommand):
                 'hall': halls['قاعة المؤتمرات الكبرى']
             },
         ]
-        meals = {}
-        for data in meals_data:
-            meal = HallMeal.objects.create(**data)
-            meals[meal.name] = meal
-            self.stdout.write(f'Created meal: {meal.name} for {meal.hall.name}')
+        meals = {
+            meal.name: meal for meal in seeder.upsert(
+                HallMeal, [HallMeal(**data) for data in meals_data], unique_fields=['hall', 'name'],
+            ).values()
+        }
 
-        # Create Hall Managers
+        # Create Hall Managers (one password hash shared by both sample accounts)
+        password = make_password('manager123')
+        users = seeder.upsert(
+            User,
+            [
+                User(username='manager1', email='manager1@example.com', password=password,
+                     first_name='أحمد', last_name='محمد'),
+                User(username='manager2', email='manager2@example.com', password=password,
+                     first_name='محمد', last_name='علي'),
+            ],
+            unique_fields=['username'],
+            update_fields=['email', 'first_name', 'last_name'],
+        )
         managers_data = [
             {
-                'user': User.objects.create_user('manager1', 'manager1@example.com', 'manager123', first_name='أحمد', last_name='محمد'),
+                'user': users[('manager1',)],
                 'hall': halls['قاعة النخيل الملكية'],
                 'permission_level': 'manage'
             },
             {
-                'user': User.objects.create_user('manager2', 'manager2@example.com', 'manager123', first_name='محمد', last_name='علي'),
+                'user': users[('manager2',)],
                 'hall': halls['قاعة المؤتمرات الكبرى'],
                 'permission_level': 'manage'
             },
         ]
-        for data in managers_data:
-            manager = HallManager.objects.create(**data)
-            self.stdout.write(f'Created manager: {manager.user.username} for {manager.hall.name}')
+        seeder.upsert(
+            HallManager, [HallManager(**data) for data in managers_data], unique_fields=['user'],
+            update_fields=['hall', 'permission_level'],
+        )
 
-        # Create some bookings
-        now = datetime.now()
+        # Create some bookings (fixed ids and times so re-running updates the same rows)
+        start = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=7), time(18, 0)))
+        booking_id = seed_uuid('load_sample_data', 'booking', 1)
         bookings_data = [
             {
+                'booking_id': booking_id,
+                'reference': generate_reference(booking_id),
                 'hall': halls['قاعة النخيل الملكية'],
                 'user': User.objects.get(username='admin'),
                 'customer_name': 'أحمد السيد',
@@ -163,38 +181,45 @@ class Command(BaseCommand):
                 'customer_phone': '01001234567',
                 'event_title': 'حفل زفاف',
                 'event_description': 'حفل زفاف السيد/ أحمد والسيدة/ مريم',
-                'start_datetime': now + timedelta(days=7),
-                'end_datetime': now + timedelta(days=7, hours=6),
+                'start_datetime': start,
+                'end_datetime': start + timedelta(hours=6),
                 'attendees_count': 300,
                 'total_price': 30000,
                 'status': 'approved'
             },
         ]
-        for data in bookings_data:
-            booking = Booking.objects.create(**data)
-            
-            # Add services to booking
-            if booking.hall == halls['قاعة النخيل الملكية']:
-                BookingService.objects.create(
-                    booking=booking,
-                    service=services['خدمة الصوتيات'],
-                    quantity=1,
-                    price=1000,
-                    notes='مطلوب ميكروفونات لاسلكية'
-                )
-            
-            # Add meals to booking
-            if booking.hall == halls['قاعة النخيل الملكية']:
-                BookingMeal.objects.create(
-                    booking=booking,
-                    meal=meals['بوفيه فاخر'],
-                    quantity=300,
-                    price_per_person=250,
-                    total_price=75000,
-                    serving_time=(now + timedelta(days=7, hours=3)).time(),
-                    notes='يوجد 50 شخص نباتي'
-                )
-            
-            self.stdout.write(f'Created booking: {booking.event_title} at {booking.hall.name}')
+        bookings = seeder.upsert(
+            Booking, [Booking(**data) for data in bookings_data], unique_fields=['booking_id'],
+            update_fields=['hall', 'user', 'customer_name', 'customer_email', 'customer_phone', 'event_title',
+                           'event_description', 'start_datetime', 'end_datetime', 'attendees_count',
+                           'total_price', 'status'],
+        )
+        booking = bookings[(booking_id,)]
+
+        # Add services and meals to booking
+        seeder.upsert(
+            BookingService,
+            [BookingService(
+                booking=booking,
+                service=services['خدمة الصوتيات'],
+                quantity=1,
+                price=1000,
+                notes='مطلوب ميكروفونات لاسلكية'
+            )],
+            unique_fields=['booking', 'service'],
+        )
+        seeder.upsert(
+            BookingMeal,
+            [BookingMeal(
+                booking=booking,
+                meal=meals['بوفيه فاخر'],
+                quantity=300,
+                price_per_person=250,
+                total_price=75000,
+                serving_time=time(21, 0),
+                notes='يوجد 50 شخص نباتي'
+            )],
+            unique_fields=['booking', 'meal', 'serving_time'],
+        )
 
         self.stdout.write(self.style.SUCCESS('Successfully loaded sample data!'))
@@ -1,11 +1,21 @@
 from django.core.management.base import BaseCommand
-from hall_booking.models import Hall, Booking
-from datetime import datetime, timedelta
+from django.utils import timezone
+from hall_booking.models import Hall, Booking, generate_reference
+from hall_booking.seeding import command_seeder, seed_uuid
+from datetime import timedelta
 import random
 
 class Command(BaseCommand):
     help = 'إضافة حجوزات تجريبية'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='بذرة الأرقام العشوائية (افتراضي: 0)',
+        )
+
     def handle(self, *args, **options):
         # أسماء العملاء التجريبية
         customer_names = [
@@ -38,104 +48,55 @@ class Command(BaseCommand):
         ]
 
         # الحصول على جميع القاعات
-        halls = list(Hall.objects.all())
+        halls = list(Hall.objects.order_by('pk'))
         
         if not halls:
             self.stdout.write(self.style.ERROR('لا توجد قاعات متاحة. يرجى إنشاء القاعات أولاً.'))
             return
 
-        bookings_created = 0
-        
-        # إنشاء حجوزات في الماضي (مكتملة)
-        for i in range(20):
-            hall = random.choice(halls)
-            customer_name = random.choice(customer_names)
-            event_title = random.choice(event_titles)
-            event_description = random.choice(event_descriptions)
-            
-            # تاريخ في الماضي
-            start_date = datetime.now() - timedelta(days=random.randint(1, 30))
-            end_date = start_date + timedelta(hours=random.randint(2, 8))
-            
-            # حساب السعر الإجمالي
-            hours = (end_date - start_date).total_seconds() / 3600
-            total_price = float(hall.price_per_hour) * hours
-            
-            booking = Booking.objects.create(
-                hall=hall,
-                customer_name=customer_name,
-                customer_email=f"{customer_name.replace(' ', '.').lower()}@example.com",
-                customer_phone=f"01{random.randint(100000000, 999999999)}",
-                event_title=event_title,
-                event_description=event_description,
-                start_datetime=start_date,
-                end_datetime=end_date,
-                attendees_count=random.randint(10, hall.capacity),
-                total_price=total_price,
-                status='completed'
-            )
-            bookings_created += 1
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        bookings = []
+
+        # (الحالة، العدد، اتجاه التاريخ): مكتملة في الماضي، وموافق عليها ومعلقة في المستقبل
+        plan = [('completed', 20, -1), ('approved', 15, 1), ('pending', 10, 1)]
+        for status, count, direction in plan:
+            for i in range(count):
+                hall = rng.choice(halls)
+                customer_name = rng.choice(customer_names)
+
+                start_date = now + direction * timedelta(days=rng.randint(1, 30))
+                end_date = start_date + timedelta(hours=rng.randint(2, 8))
+
+                # حساب السعر الإجمالي
+                hours = (end_date - start_date).total_seconds() / 3600
+                total_price = float(hall.price_per_hour) * hours
 
-        # إنشاء حجوزات في المستقبل (موافق عليها)
-        for i in range(15):
-            hall = random.choice(halls)
-            customer_name = random.choice(customer_names)
-            event_title = random.choice(event_titles)
-            event_description = random.choice(event_descriptions)
-            
-            # تاريخ في المستقبل
-            start_date = datetime.now() + timedelta(days=random.randint(1, 30))
-            end_date = start_date + timedelta(hours=random.randint(2, 8))
-            
-            # حساب السعر الإجمالي
-            hours = (end_date - start_date).total_seconds() / 3600
-            total_price = float(hall.price_per_hour) * hours
-            
-            booking = Booking.objects.create(
-                hall=hall,
-                customer_name=customer_name,
-                customer_email=f"{customer_name.replace(' ', '.').lower()}@example.com",
-                customer_phone=f"01{random.randint(100000000, 999999999)}",
-                event_title=event_title,
-                event_description=event_description,
-                start_datetime=start_date,
-                end_datetime=end_date,
-                attendees_count=random.randint(10, hall.capacity),
-                total_price=total_price,
-                status='approved'
-            )
-            bookings_created += 1
+                # معرف ثابت لكل حجز تجريبي فإعادة التشغيل تحدّث نفس الحجوزات
+                booking_id = seed_uuid('populate_bookings', status, i)
+                bookings.append(Booking(
+                    booking_id=booking_id,
+                    reference=generate_reference(booking_id),
+                    hall=hall,
+                    customer_name=customer_name,
+                    customer_email=f"{customer_name.replace(' ', '.').lower()}@example.com",
+                    customer_phone=f"01{rng.randint(100000000, 999999999)}",
+                    event_title=rng.choice(event_titles),
+                    event_description=rng.choice(event_descriptions),
+                    start_datetime=start_date,
+                    end_datetime=end_date,
+                    attendees_count=rng.randint(10, hall.capacity),
+                    total_price=round(total_price, 2),
+                    status=status
+                ))
 
-        # إنشاء حجوزات معلقة
-        for i in range(10):
-            hall = random.choice(halls)
-            customer_name = random.choice(customer_names)
-            event_title = random.choice(event_titles)
-            event_description = random.choice(event_descriptions)
-            
-            # تاريخ في المستقبل
-            start_date = datetime.now() + timedelta(days=random.randint(1, 30))
-            end_date = start_date + timedelta(hours=random.randint(2, 8))
-            
-            # حساب السعر الإجمالي
-            hours = (end_date - start_date).total_seconds() / 3600
-            total_price = float(hall.price_per_hour) * hours
-            
-            booking = Booking.objects.create(
-                hall=hall,
-                customer_name=customer_name,
-                customer_email=f"{customer_name.replace(' ', '.').lower()}@example.com",
-                customer_phone=f"01{random.randint(100000000, 999999999)}",
-                event_title=event_title,
-                event_description=event_description,
-                start_datetime=start_date,
-                end_datetime=end_date,
-                attendees_count=random.randint(10, hall.capacity),
-                total_price=total_price,
-                status='pending'
-            )
-            bookings_created += 1
+        saved = command_seeder(self).upsert(
+            Booking, bookings, unique_fields=['booking_id'],
+            update_fields=['hall', 'customer_name', 'customer_email', 'customer_phone', 'event_title',
+                           'event_description', 'start_datetime', 'end_datetime', 'attendees_count',
+                           'total_price', 'status'],
+        )
 
         self.stdout.write(
-            self.style.SUCCESS(f'تم إنشاء {bookings_created} حجز تجريبي بنجاح!')
-        ) 
\ No newline at end of file
+            self.style.SUCCESS(f'تم تحديث {len(saved)} حجز تجريبي بنجاح!')
+        )
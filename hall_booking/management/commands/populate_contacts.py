@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from hall_booking.models import Contact
+from hall_booking.seeding import command_seeder
 import random
 
 class Command(BaseCommand):
@@ -41,32 +42,22 @@ class Command(BaseCommand):
             'أريد معرفة الشروط والأحكام للحجز.'
         ]
 
-        contacts_created = 0
-
-        # إنشاء رسائل مقروءة
-        for i in range(15):
-            contact = Contact.objects.create(
+        # رسائل التواصل ليس لها مفتاح طبيعي، لذا تُدرج على دفعات فقط
+        contacts = [
+            Contact(
                 name=random.choice(customer_names),
                 email=f"{random.choice(customer_names).replace(' ', '.').lower()}@example.com",
                 phone=f"01{random.randint(100000000, 999999999)}",
                 subject=random.choice(subjects),
                 message=random.choice(messages),
-                is_read=True
+                is_read=is_read
             )
-            contacts_created += 1
-
-        # إنشاء رسائل غير مقروءة
-        for i in range(8):
-            contact = Contact.objects.create(
-                name=random.choice(customer_names),
-                email=f"{random.choice(customer_names).replace(' ', '.').lower()}@example.com",
-                phone=f"01{random.randint(100000000, 999999999)}",
-                subject=random.choice(subjects),
-                message=random.choice(messages),
-                is_read=False
-            )
-            contacts_created += 1
+            # 15 رسالة مقروءة و 8 غير مقروءة
+            for is_read, count in ((True, 15), (False, 8))
+            for i in range(count)
+        ]
+        created = command_seeder(self).create(Contact, contacts)
 
         self.stdout.write(
-            self.style.SUCCESS(f'تم إنشاء {contacts_created} رسالة تواصل تجريبية بنجاح!')
-        ) 
\ No newline at end of file
+            self.style.SUCCESS(f'تم إنشاء {len(created)} رسالة تواصل تجريبية بنجاح!')
+        )
@@ -1,12 +1,21 @@
 from django.core.management.base import BaseCommand
 from django.core.files.base import ContentFile
 from hall_booking.models import Hall, Category, Governorate, City, HallImage
+from hall_booking.seeding import command_seeder
 import requests
 import random
 
 class Command(BaseCommand):
     help = 'إضافة قاعات مع صور في جميع محافظات مصر'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='بذرة الأرقام العشوائية؛ نفس البذرة تعيد نفس القاعات (افتراضي: 0)',
+        )
+
     def handle(self, *args, **options):
         # التأكد من وجود الفئات
         categories = list(Category.objects.all())
@@ -15,7 +24,7 @@ class Command(BaseCommand):
             return
 
         # التأكد من وجود المحافظات والمدن
-        governorates = list(Governorate.objects.all())
+        governorates = list(Governorate.objects.prefetch_related('cities'))
         if not governorates:
             self.stdout.write(self.style.ERROR('لا توجد محافظات! يرجى تشغيل populate_egypt_locations أولاً'))
             return
@@ -65,9 +74,6 @@ class Command(BaseCommand):
             ['قاعة VIP', 'غرف تبديل ملابس', 'منطقة استقبال', 'خدمة تصوير']
         ]
 
-        halls_created = 0
-        images_created = 0
-
         # URLs للصور التجريبية (يمكن استبدالها بصور حقيقية)
         sample_images = [
             'https://images.unsplash.com/photo-1519167758481-83f29c8e8d4b?w=800',
@@ -80,41 +86,38 @@ class Command(BaseCommand):
             'https://images.unsplash.com/photo-1540979388789-6cee28a1cdc9?w=800'
         ]
 
+        seeder = command_seeder(self)
+        rng = random.Random(options['seed'])
+        halls = []
+
         for governorate in governorates:
             cities = list(governorate.cities.all())
             if not cities:
                 continue
 
             # إنشاء 3-5 قاعات في كل محافظة
-            halls_per_governorate = random.randint(3, 5)
+            halls_per_governorate = rng.randint(3, 5)
             
             for i in range(halls_per_governorate):
                 # اختيار مدينة عشوائية في المحافظة
-                city = random.choice(cities)
+                city = rng.choice(cities)
                 
-                # اختيار اسم قاعة عشوائي
-                base_name = random.choice(hall_names)
-                hall_name = f"{base_name} - {city.name}"
-                
-                # التأكد من عدم تكرار الاسم
-                counter = 1
-                original_name = hall_name
-                while Hall.objects.filter(name=hall_name).exists():
-                    hall_name = f"{original_name} {counter}"
-                    counter += 1
+                # اختيار اسم قاعة عشوائي (البذرة الثابتة تعطي نفس الأسماء في كل تشغيل)
+                base_name = rng.choice(hall_names)
+                hall_name = f"{base_name} - {city.name} {i + 1}"
 
                 # اختيار فئة عشوائية
-                category = random.choice(categories)
+                category = rng.choice(categories)
                 
                 # اختيار وصف عشوائي
-                description = random.choice(descriptions)
+                description = rng.choice(descriptions)
                 
                 # تحديد السعة والسعر
-                capacity = random.choice([50, 75, 100, 150, 200, 250, 300, 400, 500])
-                price_per_hour = random.randint(200, 1000)
+                capacity = rng.choice([50, 75, 100, 150, 200, 250, 300, 400, 500])
+                price_per_hour = rng.randint(200, 1000)
                 
                 # اختيار مميزات عشوائية
-                features = random.choice(features_options)
+                features = rng.choice(features_options)
                 
                 # عنوان تفصيلي
                 addresses = [
@@ -125,65 +128,65 @@ class Command(BaseCommand):
                     f"ميدان التحرير، {city.name}",
                     f"شارع الجيش، {city.name}"
                 ]
-                address = random.choice(addresses)
-
-                try:
-                    # إنشاء القاعة
-                    hall = Hall.objects.create(
-                        name=hall_name,
-                        category=category,
-                        governorate=governorate,
-                        city=city,
-                        address=address,
-                        description=description,
-                        capacity=capacity,
-                        price_per_hour=price_per_hour,
-                        status='available',
-                        features=features,
-                        phone=f"0{random.randint(10, 15)}{random.randint(10000000, 99999999)}",
-                        email=f"info@{hall_name.replace(' ', '').lower()}.com"
-                    )
-                    
-                    halls_created += 1
-                    
-                    # إضافة صور للقاعة
-                    num_images = random.randint(2, 4)
-                    for j in range(num_images):
-                        try:
-                            image_url = random.choice(sample_images)
-                            response = requests.get(image_url, timeout=10)
-                            
-                            if response.status_code == 200:
-                                image_content = ContentFile(response.content)
-                                image_name = f"hall_{hall.id}_{j+1}.jpg"
-                                
-                                # تحديد نوع الصورة
-                                image_types = ['main', 'gallery', 'interior', 'exterior']
-                                image_type = 'main' if j == 0 else random.choice(image_types[1:])
-                                
-                                hall_image = HallImage.objects.create(
-                                    hall=hall,
-                                    image_type=image_type,
-                                    title=f"صورة {j+1} لقاعة {hall.name}",
-                                    is_featured=(j == 0),
-                                    order=j
-                                )
-                                hall_image.image.save(image_name, image_content, save=True)
-                                images_created += 1
-                                
-                        except Exception as e:
-                            self.stdout.write(f'خطأ في تحميل الصورة: {e}')
-                            continue
-                    
-                    if halls_created % 5 == 0:
-                        self.stdout.write(f'تم إنشاء {halls_created} قاعة...')
-                        
-                except Exception as e:
-                    self.stdout.write(f'خطأ في إنشاء القاعة {hall_name}: {e}')
+                address = rng.choice(addresses)
+
+                halls.append(Hall(
+                    name=hall_name,
+                    category=category,
+                    governorate=governorate,
+                    city=city,
+                    address=address,
+                    description=description,
+                    capacity=capacity,
+                    price_per_hour=price_per_hour,
+                    status='available',
+                    features=features,
+                    phone=f"0{rng.randint(10, 15)}{rng.randint(10000000, 99999999)}",
+                    email=f"info@hall{governorate.code.lower()}{i + 1}.com"
+                ))
+
+        saved = seeder.upsert(Hall, halls, unique_fields=['name'])
+
+        # الصور فقط للقاعات التي ليس لها صور بعد، وكل رابط يُحمّل مرة واحدة
+        with_images = set(
+            HallImage.objects.filter(hall__in=saved.values()).values_list('hall_id', flat=True).distinct()
+        )
+        downloads = {}
+        images = []
+        for hall in saved.values():
+            if hall.pk in with_images:
+                continue
+            num_images = rng.randint(2, 4)
+            for j in range(num_images):
+                image_url = rng.choice(sample_images)
+                if image_url not in downloads:
+                    try:
+                        response = requests.get(image_url, timeout=10)
+                        downloads[image_url] = response.content if response.status_code == 200 else None
+                    except Exception as e:
+                        self.stdout.write(f'خطأ في تحميل الصورة: {e}')
+                        downloads[image_url] = None
+                if downloads[image_url] is None:
                     continue
 
+                # تحديد نوع الصورة
+                image_types = ['main', 'gallery', 'interior', 'exterior']
+                image_type = 'main' if j == 0 else rng.choice(image_types[1:])
+
+                hall_image = HallImage(
+                    hall=hall,
+                    image_type=image_type,
+                    title=f"صورة {j+1} لقاعة {hall.name}",
+                    is_featured=(j == 0),
+                    order=j
+                )
+                hall_image.image.save(f"hall_{hall.id}_{j+1}.jpg", ContentFile(downloads[image_url]), save=False)
+                images.append(hall_image)
+
+        seeder.create(HallImage, images)
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'تم إنشاء {halls_created} قاعة و {images_created} صورة بنجاح في جميع محافظات مصر!'
+                f'تم تحديث {len(saved)} قاعة وإضافة {len(images)} صورة بنجاح في جميع محافظات مصر!'
             )
         )
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from hall_booking.models import Governorate, City
+from hall_booking.seeding import command_seeder
 
 class Command(BaseCommand):
     help = 'إضافة جميع محافظات ومدن مصر'
@@ -318,40 +319,34 @@ class Command(BaseCommand):
             },
         }
 
-        governorates_created = 0
-        cities_created = 0
+        seeder = command_seeder(self)
 
-        for gov_name, gov_data in egypt_data.items():
-            # إنشاء المحافظة
-            governorate, created = Governorate.objects.get_or_create(
-                name=gov_name,
-                defaults={
-                    'name_en': gov_data['name_en'],
-                    'code': gov_data['code'],
-                    'region': gov_data['region']
-                }
-            )
-            
-            if created:
-                governorates_created += 1
-                self.stdout.write(f'تم إنشاء محافظة: {gov_name}')
+        # المحافظات بمفتاحها الطبيعي (الكود)، ثم المدن بمفتاح (الاسم، المحافظة)
+        governorates = seeder.upsert(
+            Governorate,
+            [
+                Governorate(name=gov_name, name_en=gov_data['name_en'], code=gov_data['code'],
+                            region=gov_data['region'])
+                for gov_name, gov_data in egypt_data.items()
+            ],
+            unique_fields=['code'],
+            update_fields=['name', 'name_en', 'region'],
+        )
 
-            # إنشاء المدن
-            for city_data in gov_data['cities']:
-                city, created = City.objects.get_or_create(
-                    name=city_data['name'],
-                    governorate=governorate,
-                    defaults={
-                        'name_en': city_data['name_en'],
-                        'is_capital': city_data['is_capital']
-                    }
-                )
-                
-                if created:
-                    cities_created += 1
+        cities = seeder.upsert(
+            City,
+            [
+                City(name=city_data['name'], name_en=city_data['name_en'], is_capital=city_data['is_capital'],
+                     governorate=governorates[(gov_data['code'],)])
+                for gov_data in egypt_data.values()
+                for city_data in gov_data['cities']
+            ],
+            unique_fields=['name', 'governorate'],
+            update_fields=['name_en', 'is_capital'],
+        )
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'تم إنشاء {governorates_created} محافظة و {cities_created} مدينة بنجاح!'
+                f'تم تحديث {len(governorates)} محافظة و {len(cities)} مدينة بنجاح!'
             )
         )
@@ -1,13 +1,23 @@
 from django.core.management.base import BaseCommand
 from django.core.files.base import ContentFile
-from hall_booking.models import Category, Hall
+from hall_booking.models import Category, Governorate, Hall
+from hall_booking.seeding import command_seeder
 import random
 from datetime import datetime
 
 class Command(BaseCommand):
     help = 'إضافة 100 قاعة تجريبية في مختلف محافظات مصر'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='بذرة الأرقام العشوائية؛ نفس البذرة تعيد نفس القاعات (افتراضي: 0)',
+        )
+
     def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
         # إنشاء فئات القاعات
         categories_data = [
             {
@@ -37,19 +47,23 @@ class Command(BaseCommand):
             }
         ]
 
-        # إنشاء الفئات
-        categories = []
-        for cat_data in categories_data:
-            category, created = Category.objects.get_or_create(
-                name=cat_data['name'],
-                defaults={
-                    'description': cat_data['description'],
-                    'icon': cat_data['icon']
-                }
-            )
-            categories.append(category)
-            if created:
-                self.stdout.write(f'تم إنشاء فئة: {category.name}')
+        seeder = command_seeder(self)
+
+        # إنشاء الفئات أو تحديثها حسب الاسم
+        categories = list(seeder.upsert(
+            Category,
+            [Category(**cat_data) for cat_data in categories_data],
+            unique_fields=['name'],
+        ).values())
+
+        # المحافظات والمدن من قاعدة البيانات (populate_egypt_locations)
+        governorates_by_name = {
+            governorate.name: governorate
+            for governorate in Governorate.objects.prefetch_related('cities')
+        }
+        if not governorates_by_name:
+            self.stdout.write(self.style.ERROR('لا توجد محافظات! يرجى تشغيل populate_egypt_locations أولاً'))
+            return
 
         # بيانات محافظات مصر
         governorates = [
@@ -108,60 +122,73 @@ class Command(BaseCommand):
             ['شاشة LED كبيرة', 'نظام صوت احترافي', 'إضاءة مسرحية']
         ]
 
-        # إنشاء 100 قاعة
-        halls_created = 0
+        # إنشاء 100 قاعة (الاسم مفتاح طبيعي، فالأسماء المكررة تحدّث نفس القاعة)
+        halls = []
         for i in range(100):
             # اختيار محافظة ومنطقة عشوائية
-            governorate = random.choice(governorates)
-            area = random.choice(governorate['areas'])
+            governorate = rng.choice(governorates)
+            area = rng.choice(governorate['areas'])
+            governorate_obj = governorates_by_name.get(governorate['name']) or rng.choice(
+                list(governorates_by_name.values())
+            )
+            cities = list(governorate_obj.cities.all())
+            if not cities:
+                continue
+            city = next((c for c in cities if c.name == area), None) or next(
+                (c for c in cities if c.is_capital), cities[0]
+            )
             
             # اختيار فئة عشوائية
-            category = random.choice(categories)
+            category = rng.choice(categories)
             
             # اختيار اسم عشوائي
-            hall_name = random.choice(hall_names)
+            hall_name = rng.choice(hall_names)
             
             # إنشاء اسم فريد
             unique_name = f"{hall_name} - {area}"
             
             # تحديد السعة والسعر بناءً على الفئة
             if category.name == 'قاعات مؤتمرات':
-                capacity = random.randint(50, 500)
-                price_per_hour = random.randint(200, 800)
+                capacity = rng.randint(50, 500)
+                price_per_hour = rng.randint(200, 800)
             elif category.name == 'قاعات حفلات':
-                capacity = random.randint(30, 200)
-                price_per_hour = random.randint(150, 600)
+                capacity = rng.randint(30, 200)
+                price_per_hour = rng.randint(150, 600)
             elif category.name == 'قاعات اجتماعات':
-                capacity = random.randint(10, 50)
-                price_per_hour = random.randint(100, 400)
+                capacity = rng.randint(10, 50)
+                price_per_hour = rng.randint(100, 400)
             elif category.name == 'قاعات أفراح':
-                capacity = random.randint(100, 800)
-                price_per_hour = random.randint(300, 1200)
+                capacity = rng.randint(100, 800)
+                price_per_hour = rng.randint(300, 1200)
             else:  # قاعات معارض
-                capacity = random.randint(200, 1000)
-                price_per_hour = random.randint(250, 900)
+                capacity = rng.randint(200, 1000)
+                price_per_hour = rng.randint(250, 900)
 
             # إنشاء وصف للقاعة
             description = f"قاعة {hall_name} في {area} - {governorate['name']}. قاعة مجهزة بالكامل تناسب جميع أنواع المناسبات والفعاليات. تتميز بموقع مميز وخدمة عالية الجودة."
 
             # اختيار مميزات عشوائية
-            features = random.choice(features_list)
+            features = rng.choice(features_list)
 
-            # إنشاء القاعة
-            hall = Hall.objects.create(
+            halls.append(Hall(
                 name=unique_name,
                 category=category,
+                governorate=governorate_obj,
+                city=city,
+                address=f"{area}، {city.name}",
                 description=description,
                 capacity=capacity,
                 price_per_hour=price_per_hour,
                 status='available',
                 features=features
-            )
-            
-            halls_created += 1
-            if halls_created % 10 == 0:
-                self.stdout.write(f'تم إنشاء {halls_created} قاعة...')
+            ))
+
+        saved = seeder.upsert(
+            Hall, halls, unique_fields=['name'],
+            update_fields=['category', 'governorate', 'city', 'address', 'description', 'capacity',
+                           'price_per_hour', 'status', 'features'],
+        )
 
         self.stdout.write(
-            self.style.SUCCESS(f'تم إنشاء {halls_created} قاعة بنجاح في مختلف محافظات مصر!')
-        ) 
\ No newline at end of file
+            self.style.SUCCESS(f'تم تحديث {len(saved)} قاعة بنجاح في مختلف محافظات مصر!')
+        )
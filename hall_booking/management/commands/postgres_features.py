@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from hall_booking import pgfeatures
+
+
+class Command(BaseCommand):
+    help = ("Show which PostgreSQL-only constraints and indexes (overlap exclusion, BRIN, trigram, "
+            "full-text) exist, and optionally create the missing ones")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias (default: default)')
+        parser.add_argument('--install', action='store_true',
+                            help='Create missing features (e.g. after resolving overlapping bookings)')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'postgresql':
+            raise CommandError(f'{options["database"]} is a {connection.vendor} database; '
+                               f'these features only apply to PostgreSQL')
+
+        if options['install']:
+            for name, result in pgfeatures.install(connection).items():
+                style = self.style.SUCCESS if result in ('present', 'created') else self.style.WARNING
+                self.stdout.write(style(f'{name:<26}{result}'))
+            return
+
+        missing = 0
+        for name, present in pgfeatures.status(options['database']).items():
+            missing += not present
+            self.stdout.write(f"{name:<26}{'present' if present else self.style.WARNING('missing')}")
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} feature(s) missing; run with --install'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All PostgreSQL features present.'))
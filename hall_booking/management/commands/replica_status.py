@@ -0,0 +1,65 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from hall_booking.models import Booking, Notification, SlotHold
+from hall_booking.routers import replica_alias
+
+
+class Command(BaseCommand):
+    help = ("Compare the read replica with the primary (row counts and newest rows per table); "
+            "with --sync, copy a SQLite primary into the SQLite replica file")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync', action='store_true',
+                            help='SQLite only: overwrite the replica file with an online backup of the primary')
+
+    def handle(self, *args, **options):
+        replica = replica_alias()
+        if replica is None:
+            raise CommandError('No replica database configured (set DB_REPLICA_NAME or DB_REPLICA_HOST)')
+
+        if options['sync']:
+            self._sync(replica)
+
+        behind = 0
+        self.stdout.write(f"{'table':<28}{'primary':>12}{'replica':>12}{'newest id':>22}")
+        for model in (Booking, Notification, SlotHold):
+            primary = self._summary(model, DEFAULT_DB_ALIAS)
+            copy = self._summary(model, replica)
+            lagging = primary != copy
+            behind += lagging
+            line = (f'{model._meta.db_table:<28}{primary[0]:>12}{copy[0]:>12}'
+                    f"{f'{primary[1]} / {copy[1]}':>22}")
+            self.stdout.write(self.style.WARNING(line) if lagging else line)
+
+        if behind:
+            self.stdout.write(self.style.WARNING(f'Replica differs from the primary on {behind} table(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Replica matches the primary.'))
+
+    @staticmethod
+    def _summary(model, using):
+        rows = model.objects.using(using).order_by()
+        newest = rows.order_by('-pk').values_list('pk', flat=True).first()
+        return rows.count(), newest
+
+    def _sync(self, replica):
+        primary_settings = connections[DEFAULT_DB_ALIAS].settings_dict
+        replica_settings = connections[replica].settings_dict
+        if primary_settings['ENGINE'] != 'django.db.backends.sqlite3' or \
+                replica_settings['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('--sync only copies SQLite files; use the server\'s replication otherwise')
+        if str(primary_settings['NAME']) == str(replica_settings['NAME']):
+            raise CommandError('The replica and the primary are the same file')
+
+        connections[replica].close()
+        source = sqlite3.connect(primary_settings['NAME'])
+        target = sqlite3.connect(replica_settings['NAME'])
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f"Copied {primary_settings['NAME']} to {replica_settings['NAME']}"))
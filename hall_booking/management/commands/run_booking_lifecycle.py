@@ -0,0 +1,29 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from hall_booking.lifecycle import run_booking_lifecycle
+
+
+class Command(BaseCommand):
+    help = "Complete finished approved bookings and expire stale pending requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pending-ttl-hours', type=float, default=None,
+                            help='Expire pending requests older than this (default: BOOKING_PENDING_TTL_HOURS)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Bookings updated per UPDATE statement')
+        parser.add_argument('--loop', action='store_true', help='Keep running every --interval seconds')
+        parser.add_argument('--interval', type=int, default=600, help='Seconds between runs in --loop mode')
+
+    def handle(self, *args, **options):
+        ttl = timedelta(hours=options['pending_ttl_hours']) if options['pending_ttl_hours'] else None
+        while True:
+            result = run_booking_lifecycle(pending_ttl=ttl, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Completed {result['completed']} bookings, expired {result['expired']} pending requests, "
+                f"purged {result['holds_purged']} expired slot holds."
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from hall_booking.jobqueue import Worker
+
+
+class Command(BaseCommand):
+    help = "Run the database-backed background job worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Number of jobs executed in parallel')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread', help='Executor pool type')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--visibility-timeout', type=int, default=None,
+                            help='Seconds a claimed job stays invisible to other workers')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            pool=options['pool'],
+            poll_interval=options['poll_interval'],
+            visibility_timeout=options['visibility_timeout'],
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write(self.style.WARNING("Stopping worker after in-flight jobs finish..."))
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        self.stdout.write(self.style.NOTICE(
+            f"Worker {worker.worker_id} started ({options['pool']} pool, concurrency={worker.concurrency})"
+        ))
+        processed = worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs."))
@@ -0,0 +1,28 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from hall_booking.lifecycle import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Create reminder notifications for approved bookings starting soon"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-hours', type=float, default=None,
+                            help='Remind bookings starting within this many hours (default: BOOKING_REMINDER_WINDOW_HOURS)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Bookings processed per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping every --interval seconds')
+        parser.add_argument('--interval', type=int, default=300, help='Seconds between sweeps in --loop mode')
+
+    def handle(self, *args, **options):
+        window = timedelta(hours=options['window_hours']) if options['window_hours'] else None
+        while True:
+            result = send_due_reminders(window=window, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Sent {result['sent']} reminders; skipped {result['guests']} guest bookings with no account."
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,160 @@
+import random
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from hall_booking import writelock
+
+PROBE_ALIAS = 'hb_lock_probe'
+OPERATIONS = ('confirm', 'mark_read', 'read')
+
+
+class Command(BaseCommand):
+    help = ("Reproduce SQLite write contention (confirm_booking inserts, marking notifications read, "
+            "report reads) from concurrent threads and compare connection profiles")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent worker threads (default: 8)')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration per profile (default: 5)')
+        parser.add_argument('--profile', choices=['legacy', 'tuned', 'both'], default='both',
+                            help='legacy = Django defaults (DEFERRED writes, 5s timeout); '
+                                 'tuned = OPTIONS of --database with BEGIN IMMEDIATE writes (default: both)')
+        parser.add_argument('--database', default='default',
+                            help='Alias whose OPTIONS form the tuned profile (default: default)')
+        parser.add_argument('--no-serialize', action='store_true',
+                            help='Do not queue tuned-profile writes behind the in-process write lock')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['database'] not in settings.DATABASES:
+            raise CommandError(f"Unknown database alias {options['database']}")
+        tuned_options = settings.DATABASES[options['database']].get('OPTIONS', {})
+        if settings.DATABASES[options['database']]['ENGINE'] != 'django.db.backends.sqlite3':
+            self.stderr.write(self.style.WARNING('The selected alias is not SQLite; its OPTIONS are ignored'))
+            tuned_options = {}
+
+        profiles = ['legacy', 'tuned'] if options['profile'] == 'both' else [options['profile']]
+        self.stdout.write(f"{'profile':<10}{'op':<11}{'ok':>7}{'locked':>8}{'p50 ms':>10}{'p95 ms':>10}")
+        failed = {}
+        for profile in profiles:
+            db_options = {} if profile == 'legacy' else tuned_options
+            if profile == 'legacy':
+                write = lambda: transaction.atomic(using=PROBE_ALIAS)
+            elif options['no_serialize']:
+                write = lambda: writelock.immediate_atomic(PROBE_ALIAS)
+            else:
+                write = lambda: writelock.serialized_write(PROBE_ALIAS)
+            with tempfile.TemporaryDirectory(prefix='hb-lock-probe-') as directory:
+                results = self._probe(Path(directory) / 'probe.sqlite3', db_options, write, options)
+            for op in OPERATIONS:
+                latencies, locked = results[op]
+                p50 = statistics.median(latencies) if latencies else 0.0
+                p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else p50
+                self.stdout.write(f"{profile:<10}{op:<11}{len(latencies):>7}{locked:>8}{p50:>10.2f}{p95:>10.2f}")
+            failed[profile] = sum(locked for _, locked in results.values())
+
+        for profile, locked in failed.items():
+            style = self.style.ERROR if locked else self.style.SUCCESS
+            self.stdout.write(style(f'{profile}: {locked} "database is locked" error(s)'))
+
+    @contextmanager
+    def _probe_alias(self, path, db_options):
+        connections.settings[PROBE_ALIAS] = connections.configure_settings({
+            'default': connections.settings['default'],
+            PROBE_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(path), 'OPTIONS': dict(db_options)},
+        })[PROBE_ALIAS]
+        try:
+            yield
+        finally:
+            connections[PROBE_ALIAS].close()
+            del connections[PROBE_ALIAS]
+            del connections.settings[PROBE_ALIAS]
+
+    def _probe(self, path, db_options, write, options):
+        with self._probe_alias(path, db_options):
+            with connections[PROBE_ALIAS].cursor() as cursor:
+                cursor.execute('CREATE TABLE probe_booking (id INTEGER PRIMARY KEY, hall_id INTEGER, '
+                               'start_at INTEGER, end_at INTEGER, total REAL)')
+                cursor.execute('CREATE INDEX probe_booking_hall ON probe_booking (hall_id, start_at)')
+                cursor.execute('CREATE TABLE probe_notification (id INTEGER PRIMARY KEY, user_id INTEGER, '
+                               'is_read INTEGER)')
+                cursor.execute('CREATE INDEX probe_notification_user ON probe_notification (user_id, is_read)')
+            connections[PROBE_ALIAS].close()
+
+            results = {op: ([], 0) for op in OPERATIONS}
+            results_lock = threading.Lock()
+            deadline = time.monotonic() + options['seconds']
+            workers = [
+                threading.Thread(target=self._worker, args=(index, deadline, write, results, results_lock,
+                                                            options['seed']))
+                for index in range(options['threads'])
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            return results
+
+    def _worker(self, index, deadline, write, results, results_lock, seed):
+        rng = random.Random(seed * 1000 + index)
+        try:
+            while time.monotonic() < deadline:
+                op = rng.choices(OPERATIONS, weights=(5, 3, 2))[0]
+                started = time.perf_counter()
+                try:
+                    if op == 'confirm':
+                        self._confirm(write, rng)
+                    elif op == 'mark_read':
+                        self._mark_read(write, rng)
+                    else:
+                        self._read()
+                except OperationalError as exc:
+                    if 'locked' not in str(exc) and 'busy' not in str(exc):
+                        raise
+                    with results_lock:
+                        latencies, locked = results[op]
+                        results[op] = (latencies, locked + 1)
+                    continue
+                with results_lock:
+                    results[op][0].append((time.perf_counter() - started) * 1000)
+        finally:
+            connections[PROBE_ALIAS].close()
+
+    @staticmethod
+    def _confirm(write, rng):
+        # مثل confirm_booking: فحص التداخل ثم الإدراج في المعاملة نفسها (قراءة تتحول إلى كتابة)
+        hall_id = rng.randint(1, 20)
+        start = rng.randint(0, 10_000) * 3600
+        with write():
+            with connections[PROBE_ALIAS].cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM probe_booking WHERE hall_id = %s AND start_at < %s AND end_at > %s',
+                               [hall_id, start + 7200, start])
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute('INSERT INTO probe_booking (hall_id, start_at, end_at, total) VALUES (%s, %s, %s, %s)',
+                                   [hall_id, start, start + 7200, rng.random() * 1000])
+
+    @staticmethod
+    def _mark_read(write, rng):
+        # إشعار جديد ثم update(is_read=True) كما في user_notifications
+        user_id = rng.randint(1, 200)
+        with connections[PROBE_ALIAS].cursor() as cursor:
+            cursor.execute('INSERT INTO probe_notification (user_id, is_read) VALUES (%s, 0)', [user_id])
+        with write():
+            with connections[PROBE_ALIAS].cursor() as cursor:
+                cursor.execute('UPDATE probe_notification SET is_read = 1 WHERE user_id = %s AND is_read = 0', [user_id])
+
+    @staticmethod
+    def _read():
+        # قراءات التقارير في وضع autocommit كما في العروض
+        with connections[PROBE_ALIAS].cursor() as cursor:
+            cursor.execute('SELECT hall_id, COUNT(*), SUM(total) FROM probe_booking GROUP BY hall_id')
+            cursor.fetchall()
+            cursor.execute('SELECT COUNT(*) FROM probe_notification WHERE is_read = 0')
+            cursor.fetchone()
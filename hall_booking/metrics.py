@@ -0,0 +1,236 @@
+"""
+سجل مقاييس محلي بدون اعتماديات خارجية (عدّادات ومدرجات تكرارية بحدود ثابتة) بصيغة Prometheus النصية.
+
+- آمن بين الخيوط: قفل واحد لكل سجل، والتحديث عملية جمع على قاموس فقط.
+- تعدد العمليات: عند ضبط ``METRICS_DIR`` تكتب كل عملية لقطة JSON باسم رقمها كل
+  ``METRICS_FLUSH_INTERVAL`` ثانية (كتابة ذرية)، ونقطة ``/metrics`` تجمع لقطات كل العمليات.
+  القيم تراكمية منذ بدء كل عملية، لذا تبقى لقطات العمليات المنتهية ضمن المجموع كما في Prometheus.
+- بدون ``METRICS_DIR`` تعرض النقطة مقاييس العملية الحالية فقط.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.samples = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def describe(self):
+        return {'kind': self.kind, 'help': self.documentation, 'labels': list(self.labelnames)}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+    def dump(self):
+        return [[list(key), value] for key, value in self.samples.items()]
+
+    @staticmethod
+    def merge(into, samples):
+        for key, value in samples:
+            into[tuple(key)] = into.get(tuple(key), 0) + value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # عدد كل فئة على حدة (غير تراكمي)؛ الأخيرة لما فوق أكبر حد (+Inf)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self.registry.lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                sample = self.samples[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            sample['buckets'][index] += 1
+            sample['sum'] += value
+            sample['count'] += 1
+        self.registry.maybe_flush()
+
+    def describe(self):
+        return {**super().describe(), 'buckets': list(self.buckets)}
+
+    def dump(self):
+        return [[list(key), {**sample, 'buckets': list(sample['buckets'])}] for key, sample in self.samples.items()]
+
+    @staticmethod
+    def merge(into, samples):
+        for key, sample in samples:
+            current = into.get(tuple(key))
+            if current is None:
+                into[tuple(key)] = {**sample, 'buckets': list(sample['buckets'])}
+                continue
+            current['buckets'] = [a + b for a, b in zip(current['buckets'], sample['buckets'])]
+            current['sum'] += sample['sum']
+            current['count'] += sample['count']
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._last_flush = 0.0
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} already registered')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        with self.lock:
+            return {name: {**metric.describe(), 'samples': metric.dump()} for name, metric in self.metrics.items()}
+
+    # ---- تعدد العمليات ----
+
+    @staticmethod
+    def directory():
+        path = getattr(settings, 'METRICS_DIR', None)
+        return Path(path) if path else None
+
+    def maybe_flush(self):
+        if self.directory() is None:
+            return
+        if time.monotonic() - self._last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+            self.flush()
+
+    def flush(self):
+        """كتابة لقطة هذه العملية إلى ``METRICS_DIR/<pid>.json`` بشكل ذري"""
+        directory = self.directory()
+        if directory is None:
+            return
+        self._last_flush = time.monotonic()
+        directory.mkdir(parents=True, exist_ok=True)
+        # لاحقة مختلفة فلا يلتقط collect ملفاً مؤقتاً مكتملاً قبل استبداله باللقطة القديمة
+        handle, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.partial')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as fh:
+                json.dump(self.snapshot(), fh)
+            os.replace(tmp_path, directory / f'{os.getpid()}.json')
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def collect(self):
+        """لقطات كل العمليات مدمجة (أو لقطة هذه العملية فقط بدون ``METRICS_DIR``)"""
+        directory = self.directory()
+        if directory is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for path in directory.glob('[0-9]*.json'):
+                try:
+                    snapshots.append(json.loads(path.read_text(encoding='utf-8')))
+                except (OSError, ValueError):
+                    # لقطة تُكتب الآن أو تالفة؛ تُقرأ في الجمع التالي
+                    continue
+        merged = {}
+        for snapshot in snapshots:
+            for name, data in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                entry = merged.setdefault(name, {'metric': metric, 'samples': {}})
+                type(metric).merge(entry['samples'], data['samples'])
+        return merged
+
+    def render(self):
+        """المقاييس بصيغة Prometheus النصية (الإصدار 0.0.4)"""
+        lines = []
+        for name, entry in sorted(self.collect().items()):
+            metric = entry['metric']
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(entry['samples'].items()):
+                if metric.kind == 'counter':
+                    lines.append(f'{name}{_labels(metric.labelnames, key)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip((*metric.buckets, float('inf')), value['buckets']):
+                    cumulative += count
+                    labels = _labels(metric.labelnames, key, [('le', _number(bound))])
+                    lines.append(f'{name}_bucket{labels} {cumulative}')
+                lines.append(f'{name}_sum{_labels(metric.labelnames, key)} {_number(value["sum"])}')
+                lines.append(f'{name}_count{_labels(metric.labelnames, key)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+request_latency = registry.histogram(
+    'hb_http_request_duration_seconds', 'Request latency by route.', ['route', 'method'],
+)
+request_queries = registry.histogram(
+    'hb_http_request_db_queries', 'SQL queries per sampled request by route.', ['route'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+cache_requests = registry.counter(
+    'hb_cache_requests_total', 'Tiered cache lookups by namespace and result (hit, stale, miss).',
+    ['namespace', 'result'],
+)
+booking_funnel = registry.counter(
+    'hb_booking_funnel_total', 'Booking wizard steps reached (step1 .. step6, confirmed).', ['step'],
+)
+booking_conflicts = registry.counter(
+    'hb_booking_conflicts_total', 'Booking attempts rejected because the slot was taken.', ['stage'],
+)
+notifications_created = registry.counter(
+    'hb_notifications_created_total', 'Notifications created by type.', ['type'],
+)
+db_write_wait = registry.histogram(
+    'hb_db_write_lock_wait_seconds', 'Time spent queued for the in-process SQLite write lock.', ['database'],
+)
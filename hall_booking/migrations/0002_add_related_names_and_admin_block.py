@@ -10,10 +10,16 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.AddField(
-            model_name='booking',
-            name='is_admin_block',
-            field=models.BooleanField(default=False, verbose_name='حجب إداري'),
+        # 0002_booking_is_admin_block (الفرع الآخر قبل الدمج في 0004) يضيف العمود نفسه، فهنا للحالة فقط:
+        # SQLite كان يعيد بناء الجدول بصمت، لكن ALTER TABLE ADD COLUMN على PostgreSQL يفشل لأن العمود موجود
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='booking',
+                    name='is_admin_block',
+                    field=models.BooleanField(default=False, verbose_name='حجب إداري'),
+                ),
+            ],
         ),
         migrations.AlterField(
             model_name='booking',
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0005_sitesettings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('pending', 'في الانتظار'), ('approved', 'موافق عليه'), ('rejected', 'مرفوض'), ('cancelled', 'ملغي'), ('completed', 'مكتمل')], max_length=20, verbose_name='الحالة السابقة')),
+                ('to_status', models.CharField(choices=[('pending', 'في الانتظار'), ('approved', 'موافق عليه'), ('rejected', 'مرفوض'), ('cancelled', 'ملغي'), ('completed', 'مكتمل')], max_length=20, verbose_name='الحالة الجديدة')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='وقت الانتقال')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='booking_status_events', to=settings.AUTH_USER_MODEL, verbose_name='المنفّذ')),
+                ('booking', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='hall_booking.booking', verbose_name='الحجز')),
+            ],
+            options={
+                'verbose_name': 'انتقال حالة حجز',
+                'verbose_name_plural': 'سجل انتقالات الحجوزات',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['booking', 'created_at'], name='hb_bse_booking_created_idx'), models.Index(fields=['to_status', 'created_at'], name='hb_bse_to_created_idx'), models.Index(fields=['created_at'], name='hb_bse_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0006_bookingstatusevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=200, verbose_name='اسم المهمة')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='المعاملات')),
+                ('status', models.CharField(choices=[('queued', 'في الانتظار'), ('running', 'قيد التنفيذ'), ('succeeded', 'نجحت'), ('failed', 'فشلت')], default='queued', max_length=20, verbose_name='الحالة')),
+                ('dedup_key', models.CharField(blank=True, max_length=200, null=True, verbose_name='مفتاح منع التكرار')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='عدد المحاولات')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='الحد الأقصى للمحاولات')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='موعد التنفيذ')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='محجوزة حتى')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='العامل المنفّذ')),
+                ('last_error', models.TextField(blank=True, verbose_name='آخر خطأ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الانتهاء')),
+            ],
+            options={
+                'verbose_name': 'مهمة خلفية',
+                'verbose_name_plural': 'المهام الخلفية',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='hb_job_status_run_at_idx'), models.Index(fields=['locked_by'], name='hb_job_locked_by_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('dedup_key',), name='hb_job_active_dedup_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0008_booking_reminder_sent_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.CharField(max_length=40, verbose_name='مفتاح الجلسة')),
+                ('start_datetime', models.DateTimeField(verbose_name='تاريخ ووقت البداية')),
+                ('end_datetime', models.DateTimeField(verbose_name='تاريخ ووقت النهاية')),
+                ('expires_at', models.DateTimeField(verbose_name='ينتهي في')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('hall', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to='hall_booking.hall', verbose_name='القاعة')),
+            ],
+            options={
+                'verbose_name': 'حجز مؤقت',
+                'verbose_name_plural': 'الحجوزات المؤقتة',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['hall', 'start_datetime'], name='hb_hold_hall_start_idx'), models.Index(fields=['session_key'], name='hb_hold_session_idx'), models.Index(fields=['expires_at'], name='hb_hold_expires_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+import base64
+import uuid
+
+from django.db import migrations, models
+
+
+def backfill_references(apps, schema_editor):
+    Booking = apps.get_model('hall_booking', 'Booking')
+    batch = []
+    for booking in Booking.objects.only('pk', 'booking_id').iterator(chunk_size=1000):
+        booking.reference = base64.b32encode(booking.booking_id.bytes).decode('ascii')[:12]
+        batch.append(booking)
+        if len(batch) >= 1000:
+            Booking.objects.bulk_update(batch, ['reference'])
+            batch = []
+    if batch:
+        Booking.objects.bulk_update(batch, ['reference'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0009_slothold'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='booking_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='رقم الحجز'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='reference',
+            field=models.CharField(editable=False, max_length=12, null=True, verbose_name='الرقم المرجعي'),
+        ),
+        migrations.RunPython(backfill_references, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='reference',
+            field=models.CharField(editable=False, max_length=12, unique=True, verbose_name='الرقم المرجعي'),
+        ),
+    ]
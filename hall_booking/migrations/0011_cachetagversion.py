@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0010_booking_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheTagVersion',
+            fields=[
+                ('tag', models.CharField(max_length=200, primary_key=True, serialize=False, verbose_name='الوسم')),
+                ('version', models.BigIntegerField(default=0, verbose_name='الإصدار')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+            ],
+            options={
+                'verbose_name': 'إصدار وسم الذاكرة المؤقتة',
+                'verbose_name_plural': 'إصدارات وسوم الذاكرة المؤقتة',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0011_cachetagversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('route', models.CharField(max_length=255, verbose_name='المسار')),
+                ('method', models.CharField(max_length=10, verbose_name='الطريقة')),
+                ('view_name', models.CharField(blank=True, max_length=200, verbose_name='العرض')),
+                ('requests', models.PositiveBigIntegerField(default=0, verbose_name='عدد الطلبات')),
+                ('errors', models.PositiveBigIntegerField(default=0, verbose_name='أخطاء الخادم')),
+                ('total_ms', models.FloatField(default=0, verbose_name='مجموع الزمن (مللي ثانية)')),
+                ('max_ms', models.FloatField(default=0, verbose_name='أطول زمن (مللي ثانية)')),
+                ('sql_queries', models.PositiveBigIntegerField(default=0, verbose_name='مجموع الاستعلامات')),
+                ('sql_ms', models.FloatField(default=0, verbose_name='مجموع زمن SQL (مللي ثانية)')),
+                ('template_ms', models.FloatField(default=0, verbose_name='مجموع زمن القوالب (مللي ثانية)')),
+                ('duplicate_queries', models.PositiveBigIntegerField(default=0, verbose_name='الاستعلامات المكررة')),
+                ('last_duplicate', models.TextField(blank=True, verbose_name='آخر استعلام مكرر')),
+                ('peak_kb', models.FloatField(default=0, verbose_name='ذروة الذاكرة (كيلوبايت)')),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now, verbose_name='آخر طلب')),
+            ],
+            options={
+                'verbose_name': 'إحصاءات مسار',
+                'verbose_name_plural': 'إحصاءات المسارات',
+                'ordering': ['-total_ms'],
+                'constraints': [models.UniqueConstraint(fields=('route', 'method'), name='hb_routestat_route_method')],
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0012_routestat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['created_at'], name='hb_booking_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'created_at', 'total_price'], name='hb_booking_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'created_at'], name='hb_booking_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer_email', 'created_at'], name='hb_booking_email_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['is_read', 'created_at'], name='hb_contact_read_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hall',
+            index=models.Index(fields=['status', 'governorate', 'city', 'capacity'], name='hb_hall_status_geo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hall',
+            index=models.Index(fields=['status', 'category', 'capacity'], name='hb_hall_status_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hallimage',
+            index=models.Index(fields=['hall', 'order', '-uploaded_at'], name='hb_hallimage_hall_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at'], name='hb_notif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', 'created_at'], name='hb_notif_user_unread_idx'),
+        ),
+        # فهارس المفاتيح الأجنبية أصبحت بادئة للفهارس المركبة أعلاه فتُحذف بعد إنشائها.
+        # تعديل الحقل مباشرة يعيد بناء الجدول كاملاً على SQLite، لذا يُحذف الفهرس بـ DROP INDEX فقط.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='booking',
+                    name='user',
+                    field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='user_bookings', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'DROP INDEX IF EXISTS "hall_booking_booking_user_id_b09283be"',
+                    reverse_sql='CREATE INDEX IF NOT EXISTS "hall_booking_booking_user_id_b09283be" ON "hall_booking_booking" ("user_id")',
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='hallimage',
+                    name='hall',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='images', to='hall_booking.hall', verbose_name='القاعة'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'DROP INDEX IF EXISTS "hall_booking_hallimage_hall_id_ebf6c1e2"',
+                    reverse_sql='CREATE INDEX IF NOT EXISTS "hall_booking_hallimage_hall_id_ebf6c1e2" ON "hall_booking_hallimage" ("hall_id")',
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='notification',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'DROP INDEX IF EXISTS "hall_booking_notification_user_id_ddd2e366"',
+                    reverse_sql='CREATE INDEX IF NOT EXISTS "hall_booking_notification_user_id_ddd2e366" ON "hall_booking_notification" ("user_id")',
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from hall_booking import pgfeatures
+
+
+def install_postgres_features(apps, schema_editor):
+    # لا شيء على SQLite؛ ما يتعذر إنشاؤه يُتخطى بتحذير ويمكن إعادته بـ postgres_features --install
+    pgfeatures.install(schema_editor.connection)
+
+
+def remove_postgres_features(apps, schema_editor):
+    pgfeatures.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0013_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_postgres_features, remove_postgres_features),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0014_postgres_features'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='رقم الحجز الأصلي')),
+                ('booking_id', models.UUIDField(editable=False, unique=True, verbose_name='رقم الحجز')),
+                ('reference', models.CharField(editable=False, max_length=12, unique=True, verbose_name='الرقم المرجعي')),
+                ('customer_name', models.CharField(max_length=200, verbose_name='اسم العميل')),
+                ('customer_email', models.EmailField(max_length=254, verbose_name='البريد الإلكتروني')),
+                ('customer_phone', models.CharField(max_length=20, verbose_name='رقم الهاتف')),
+                ('event_title', models.CharField(max_length=200, verbose_name='عنوان الحدث')),
+                ('event_description', models.TextField(verbose_name='وصف الحدث')),
+                ('start_datetime', models.DateTimeField(verbose_name='تاريخ ووقت البداية')),
+                ('end_datetime', models.DateTimeField(verbose_name='تاريخ ووقت النهاية')),
+                ('attendees_count', models.PositiveIntegerField(verbose_name='عدد الحضور')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='السعر الإجمالي')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('approved', 'موافق عليه'), ('rejected', 'مرفوض'), ('cancelled', 'ملغي'), ('completed', 'مكتمل')], max_length=20, verbose_name='الحالة')),
+                ('admin_notes', models.TextField(blank=True, null=True, verbose_name='ملاحظات الإدارة')),
+                ('is_admin_block', models.BooleanField(default=False, verbose_name='حجب إداري')),
+                ('reminder_sent_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ إرسال التذكير')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الطلب')),
+                ('updated_at', models.DateTimeField(verbose_name='تاريخ التحديث')),
+                ('approved_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الموافقة')),
+                ('services', models.JSONField(default=list, verbose_name='الخدمات')),
+                ('meals', models.JSONField(default=list, verbose_name='الوجبات')),
+                ('status_history', models.JSONField(default=list, verbose_name='سجل الحالات')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الأرشفة')),
+                ('hall', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='hall_booking.hall', verbose_name='القاعة')),
+                ('user', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم')),
+            ],
+            options={
+                'verbose_name': 'حجز مؤرشف',
+                'verbose_name_plural': 'الحجوزات المؤرشفة',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='رقم الإشعار الأصلي')),
+                ('notification_type', models.CharField(choices=[('booking_approved', 'تم الموافقة على الحجز'), ('booking_rejected', 'تم رفض الحجز'), ('booking_cancelled', 'تم إلغاء الحجز'), ('booking_completed', 'تم إكمال الحجز'), ('booking_reminder', 'تذكير بالحجز'), ('general', 'إشعار عام')], max_length=20, verbose_name='نوع الإشعار')),
+                ('title', models.CharField(max_length=200, verbose_name='العنوان')),
+                ('message', models.TextField(verbose_name='الرسالة')),
+                ('is_read', models.BooleanField(default=False, verbose_name='مقروء')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الإنشاء')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ الأرشفة')),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='hall_booking.bookingarchive', verbose_name='الحجز')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم')),
+            ],
+            options={
+                'verbose_name': 'إشعار مؤرشف',
+                'verbose_name_plural': 'الإشعارات المؤرشفة',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bookingarchive',
+            index=models.Index(fields=['created_at'], name='hb_barchive_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingarchive',
+            index=models.Index(fields=['status', 'created_at', 'total_price'], name='hb_barchive_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingarchive',
+            index=models.Index(fields=['hall', 'start_datetime'], name='hb_barchive_hall_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingarchive',
+            index=models.Index(fields=['user', 'created_at'], name='hb_barchive_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationarchive',
+            index=models.Index(fields=['user', 'created_at'], name='hb_narchive_user_created_idx'),
+        ),
+    ]
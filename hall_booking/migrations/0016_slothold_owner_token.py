@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_booking', '0015_archive_tables'),
+    ]
+
+    operations = [
+        # RenameField لا يحدّث حقول Meta.indexes في الحالة، فيُحذف الفهرس ويُعاد بالاسم الجديد
+        migrations.RemoveIndex(
+            model_name='slothold',
+            name='hb_hold_session_idx',
+        ),
+        # الحقل يحمل رمز معالج الحجز (availability.wizard_token) لا مفتاح جلسة Django
+        migrations.RenameField(
+            model_name='slothold',
+            old_name='session_key',
+            new_name='owner_token',
+        ),
+        migrations.AlterField(
+            model_name='slothold',
+            name='owner_token',
+            field=models.CharField(max_length=40, verbose_name='رمز معالج الحجز'),
+        ),
+        migrations.AddIndex(
+            model_name='slothold',
+            index=models.Index(fields=['owner_token'], name='hb_hold_owner_idx'),
+        ),
+    ]
@@ -2,11 +2,43 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import DurationField, ExpressionWrapper, F, Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from contextlib import nullcontext
+from datetime import timedelta
+import base64
+import secrets
 import uuid
 from django.utils.text import slugify
 
+class InvalidatingQuerySet(models.QuerySet):
+    """QuerySet يبطل وسوم الذاكرة المؤقتة في العمليات الجماعية التي لا تطلق post_save"""
+
+    def update(self, **kwargs):
+        from .invalidation import invalidate_tags, tags_for_queryset
+        tags = tags_for_queryset(self, kwargs.keys())
+        rows = super().update(**kwargs)
+        if rows:
+            invalidate_tags(*tags)
+        return rows
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .invalidation import invalidate_tags, tags_for_instances
+        objs = super().bulk_create(objs, *args, **kwargs)
+        invalidate_tags(*tags_for_instances(self.model, objs))
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        from .invalidation import invalidate_tags, tags_for_instances
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if rows:
+            invalidate_tags(*tags_for_instances(self.model, objs, fields))
+        return rows
+    bulk_update.alters_data = True
+
 # نموذج المحافظات المصرية
 class Governorate(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name="اسم المحافظة")
@@ -23,6 +55,8 @@ class Governorate(models.Model):
     ])
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "محافظة"
         verbose_name_plural = "المحافظات"
@@ -39,6 +73,8 @@ class City(models.Model):
     is_capital = models.BooleanField(default=False, verbose_name="عاصمة المحافظة")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "مدينة/مركز"
         verbose_name_plural = "المدن والمراكز"
@@ -53,6 +89,8 @@ class Category(models.Model):
     description = models.TextField(verbose_name="الوصف")
     icon = models.CharField(max_length=50, default="fas fa-building", verbose_name="الأيقونة")
     
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "فئة القاعة"
         verbose_name_plural = "فئات القاعات"
@@ -89,9 +127,16 @@ class Hall(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="تاريخ التحديث")
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "قاعة"
         verbose_name_plural = "القاعات"
+        indexes = [
+            # فلاتر قائمة القاعات: الحالة ثم الموقع أو الفئة، والسعة كنطاق في النهاية
+            models.Index(fields=['status', 'governorate', 'city', 'capacity'], name='hb_hall_status_geo_idx'),
+            models.Index(fields=['status', 'category', 'capacity'], name='hb_hall_status_category_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -140,7 +185,8 @@ class HallImage(models.Model):
         ('facilities', 'صور المرافق'),
     ]
 
-    hall = models.ForeignKey(Hall, on_delete=models.CASCADE, related_name='images', verbose_name="القاعة")
+    # الفهرس المركب (hall, order) في Meta يغني عن فهرس المفتاح الأجنبي
+    hall = models.ForeignKey(Hall, on_delete=models.CASCADE, related_name='images', db_index=False, verbose_name="القاعة")
     image = models.ImageField(upload_to='halls/gallery/', verbose_name="الصورة")
     image_type = models.CharField(
         max_length=20,
@@ -154,14 +200,35 @@ class HallImage(models.Model):
     order = models.PositiveIntegerField(default=0, verbose_name="ترتيب العرض")
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الرفع")
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "صورة قاعة"
         verbose_name_plural = "صور القاعات"
         ordering = ['order', '-uploaded_at']
+        indexes = [
+            # معرض القاعة بترتيب العرض الافتراضي دون فرز مؤقت
+            models.Index(fields=['hall', 'order', '-uploaded_at'], name='hb_hallimage_hall_order_idx'),
+        ]
 
     def __str__(self):
         return f"صورة لـ {self.hall.name} - {self.get_image_type_display()}"
 
+REFERENCE_ATTEMPTS = 5
+
+
+def generate_reference(source=None):
+    """رقم مرجعي قصير للعميل: 12 حرفاً base32 (60 بتاً عشوائية)
+
+    ``source`` معرّف UUID ثابت للبيانات المولّدة (``seed_uuid``) فيبقى رقمها واحداً في كل تشغيل؛
+    يُتخطى منه نصف البايت الخاص بالإصدار وبتّا النوع لأنها ثابتة في كل المعرّفات.
+    """
+    if source is None:
+        raw = secrets.token_bytes(8)
+    else:
+        raw = source.bytes[:6] + source.bytes[7:8] + source.bytes[9:10]
+    return base64.b32encode(raw).decode('ascii')[:12]
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('pending', 'في الانتظار'),
@@ -171,9 +238,10 @@ class Booking(models.Model):
         ('completed', 'مكتمل'),
     ]
     
-    booking_id = models.UUIDField(default=uuid.uuid4, editable=False, verbose_name="رقم الحجز")
+    booking_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name="رقم الحجز")
+    reference = models.CharField(max_length=12, unique=True, editable=False, verbose_name="الرقم المرجعي")
     hall = models.ForeignKey(Hall, on_delete=models.CASCADE, related_name='bookings', verbose_name="القاعة")
-    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='user_bookings', verbose_name="المستخدم")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='user_bookings', db_index=False, verbose_name="المستخدم")
     customer_name = models.CharField(max_length=200, verbose_name="اسم العميل")
     customer_email = models.EmailField(verbose_name="البريد الإلكتروني")
     customer_phone = models.CharField(max_length=20, verbose_name="رقم الهاتف")
@@ -186,16 +254,64 @@ class Booking(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="الحالة")
     admin_notes = models.TextField(blank=True, null=True, verbose_name="ملاحظات الإدارة")
     is_admin_block = models.BooleanField(default=False, verbose_name="حجب إداري")
+    reminder_sent_at = models.DateTimeField(blank=True, null=True, editable=False, verbose_name="تاريخ إرسال التذكير")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الطلب")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="تاريخ التحديث")
     
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "حجز"
         verbose_name_plural = "الحجوزات"
         ordering = ['-created_at']
+        indexes = [
+            # مسح الحجوزات المستحقة حسب الحالة وموعد البداية (التذكيرات والحجوزات القادمة)
+            models.Index(fields=['status', 'start_datetime'], name='hb_booking_status_start_idx'),
+            # أحدث الحجوزات (قائمة الإدارة ومخطط الحجوزات الشهري)
+            models.Index(fields=['created_at'], name='hb_booking_created_idx'),
+            # التقارير حسب الحالة والفترة؛ total_price في آخر الفهرس ليغطي مجاميع الإيرادات دون قراءة الجدول
+            models.Index(fields=['status', 'created_at', 'total_price'], name='hb_booking_status_created_idx'),
+            # حجوزات المستخدم بالأحدث أولاً (يغني عن فهرس المفتاح الأجنبي user)
+            models.Index(fields=['user', 'created_at'], name='hb_booking_user_created_idx'),
+            # حجوزات الضيف بالبريد (الملف الشخصي وتفاصيل المستخدم في الإدارة وbackfill_booking_users)
+            models.Index(fields=['customer_email', 'created_at'], name='hb_booking_email_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.customer_name} - {self.hall.name} - {self.event_title}"
+
+    def save(self, *args, **kwargs):
+        if self.reference:
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(Booking, instance=self)
+        connection = connections[using]
+        # خطأ جملة واحدة يُفسد معاملة PostgreSQL كلها فتلزمه نقطة حفظ؛ SQLite وغيره يلغي الجملة وحدها
+        savepoint = connection.vendor == 'postgresql' and connection.in_atomic_block
+        for attempt in range(1, REFERENCE_ATTEMPTS + 1):
+            self.reference = generate_reference()
+            try:
+                with transaction.atomic(using=using) if savepoint else nullcontext():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if connection.in_atomic_block and not savepoint:
+                    # save_base علّم المعاملة للتراجع، والجملة المرفوضة وحدها هي التي أُلغيت
+                    transaction.set_rollback(False, using=using)
+                if attempt == REFERENCE_ATTEMPTS or not Booking.objects.using(using).filter(
+                        reference=self.reference).exists():
+                    raise
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # حفظ الحالة كما حُمّلت لرصد الانتقالات عند الحفظ دون استعلام إضافي
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_hall_id = instance.__dict__.get('hall_id')
+        return instance
+
+    def change_status(self, new_status, actor=None):
+        """تغيير حالة الحجز مع تحديد منفّذ التغيير لسجل الانتقالات (يتطلب save)"""
+        self.status = new_status
+        self._status_actor = actor if actor is not None and actor.is_authenticated else None
     
     def get_duration_hours(self):
         duration = self.end_datetime - self.start_datetime
@@ -214,6 +330,106 @@ class Booking(models.Model):
             return float(self.hall.price_per_hour) * 24 * days  # noqa
         return float(self.hall.price_per_hour) * hours  # noqa
 
+class BookingStatusEvent(models.Model):
+    """سجل إلحاقي لانتقالات حالة الحجز لأغراض التحليل"""
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='status_events', db_index=False, verbose_name="الحجز")
+    from_status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES, blank=True, verbose_name="الحالة السابقة")
+    to_status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES, verbose_name="الحالة الجديدة")
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='booking_status_events', verbose_name="المنفّذ")
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="وقت الانتقال")
+
+    class Meta:
+        verbose_name = "انتقال حالة حجز"
+        verbose_name_plural = "سجل انتقالات الحجوزات"
+        ordering = ['-created_at']
+        indexes = [
+            # مسح السجل حسب الحجز ثم الزمن (يغني عن فهرس المفتاح الأجنبي)
+            models.Index(fields=['booking', 'created_at'], name='hb_bse_booking_created_idx'),
+            # مسح نطاقات زمنية لانتقال بعينه (مثل الموافقات خلال فترة)
+            models.Index(fields=['to_status', 'created_at'], name='hb_bse_to_created_idx'),
+            models.Index(fields=['created_at'], name='hb_bse_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_id}: {self.from_status or '-'} → {self.to_status}"
+
+    # الوسيط في SQL: ترقيم أزمنة كل قاعة مرتبة ثم متوسط الصف الأوسط (أو الصفين الأوسطين)
+    MEDIAN_SQL = (
+        'SELECT approval_hall, AVG(approval_latency) FROM ('
+        ' SELECT approval_hall, approval_latency,'
+        ' ROW_NUMBER() OVER (PARTITION BY approval_hall ORDER BY approval_latency) AS position,'
+        ' COUNT(*) OVER (PARTITION BY approval_hall) AS total'
+        ' FROM ({source}) latencies'
+        ') ranked WHERE position IN ((total + 1) / 2, (total + 2) / 2) GROUP BY approval_hall'
+    )
+
+    @classmethod
+    def median_approval_hours_by_hall(cls, hall_ids=None, since=None):
+        """وسيط زمن الموافقة بالساعات لكل قاعة من استعلام مجمّع واحد (مع الأرشيف إن لزم)"""
+        events = cls.objects.filter(from_status='pending', to_status='approved')
+        if hall_ids is not None:
+            events = events.filter(booking__hall_id__in=hall_ids)
+        if since is not None:
+            events = events.filter(created_at__gte=since)
+        sources = [events.annotate(
+            approval_hall=F('booking__hall_id'),
+            approval_latency=ExpressionWrapper(F('created_at') - F('booking__created_at'), output_field=DurationField()),
+        ).order_by().values('approval_hall', 'approval_latency')]
+        # الحجوزات المؤرشفة تحفظ وقت أول موافقة في approved_at
+        from .archive import archived_approval_latencies
+        archived = archived_approval_latencies(hall_ids, since)
+        if archived is not None:
+            sources.append(archived)
+
+        using = events.db
+        connection = connections[using]
+        compiled = [source.query.get_compiler(using).as_sql() for source in sources]
+        sql = cls.MEDIAN_SQL.format(source=' UNION ALL '.join(part for part, _ in compiled))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [param for _, params in compiled for param in params])
+            rows = cursor.fetchall()
+
+        medians = {}
+        for hall_id, median in rows:
+            if not connection.features.has_native_duration_field:
+                # SQLite يعيد الفرق بالميكروثانية
+                median = timedelta(microseconds=median)
+            medians[hall_id] = median.total_seconds() / 3600
+        return medians
+
+
+def bulk_change_status(queryset, new_status, actor=None, notify=False):
+    """تحديث حالة مجموعة حجوزات بتحديث واحد مع تسجيل انتقالاتها (وإشعاراتها) دفعة واحدة"""
+    actor = actor if actor is not None and actor.is_authenticated else None
+    with transaction.atomic():
+        bookings = list(
+            queryset.exclude(status=new_status)
+            .select_related('hall')
+            .only('status', 'user', 'event_title', 'hall__name')
+        )
+        if not bookings:
+            return 0
+        now = timezone.now()
+        updated = Booking.objects.filter(pk__in=[b.pk for b in bookings]).update(status=new_status, updated_at=now)
+        BookingStatusEvent.objects.bulk_create([
+            BookingStatusEvent(booking_id=b.pk, from_status=b.status, to_status=new_status, actor=actor, created_at=now)
+            for b in bookings
+        ])
+        if notify:
+            notifications = []
+            for b in bookings:
+                data = get_notification_data(new_status, b)
+                if data and b.user_id:
+                    notifications.append(Notification(
+                        user_id=b.user_id,
+                        booking_id=b.pk,
+                        notification_type=data['type'],
+                        title=data['title'],
+                        message=data['message'],
+                    ))
+            Notification.objects.bulk_create(notifications)
+    return updated
+
 # نموذج مدير القاعة
 class HallManager(models.Model):
     PERMISSION_CHOICES = [
@@ -260,6 +476,8 @@ class HallService(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإضافة")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="تاريخ التحديث")
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "خدمة القاعة"
         verbose_name_plural = "خدمات القاعات"
@@ -290,6 +508,8 @@ class HallMeal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإضافة")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="تاريخ التحديث")
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "وجبة القاعة"
         verbose_name_plural = "وجبات القاعات"
@@ -351,10 +571,24 @@ class Contact(models.Model):
         verbose_name = "رسالة تواصل"
         verbose_name_plural = "رسائل التواصل"
         ordering = ['-created_at']
+        indexes = [
+            # الرسائل غير المقروءة بالأحدث أولاً في لوحة الإدارة
+            models.Index(fields=['is_read', 'created_at'], name='hb_contact_read_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.subject}"
 
+class NotificationQuerySet(InvalidatingQuerySet):
+    """يحسب الإشعارات المنشأة جماعياً في مقياس ``hb_notifications_created_total``"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .metrics import notifications_created
+        objs = super().bulk_create(objs, *args, **kwargs)
+        for obj in objs:
+            notifications_created.inc(type=obj.notification_type)
+        return objs
+
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
         ('booking_approved', 'تم الموافقة على الحجز'),
@@ -365,7 +599,7 @@ class Notification(models.Model):
         ('general', 'إشعار عام'),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', verbose_name="المستخدم")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False, verbose_name="المستخدم")
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, null=True, blank=True, verbose_name="الحجز")
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, verbose_name="نوع الإشعار")
     title = models.CharField(max_length=200, verbose_name="العنوان")
@@ -373,10 +607,18 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False, verbose_name="مقروء")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
 
+    objects = NotificationQuerySet.as_manager()
+
     class Meta:
         verbose_name = "إشعار"
         verbose_name_plural = "الإشعارات"
         ordering = ['-created_at']
+        indexes = [
+            # إشعارات المستخدم بالأحدث أولاً (يغني عن فهرس المفتاح الأجنبي user)
+            models.Index(fields=['user', 'created_at'], name='hb_notif_user_created_idx'),
+            # عداد غير المقروءة: فهرس جزئي صغير لا يضم إلا غير المقروء
+            models.Index(fields=['user', 'created_at'], condition=Q(is_read=False), name='hb_notif_user_unread_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -386,6 +628,13 @@ class Notification(models.Model):
         self.is_read = True
         self.save()
 
+@receiver(post_save, sender=Notification)
+def count_created_notification(sender, instance, created, raw=False, **kwargs):
+    """احتساب الإشعار المنشأ فردياً في مقياس ``hb_notifications_created_total``"""
+    if created and not raw:
+        from .metrics import notifications_created
+        notifications_created.inc(type=instance.notification_type)
+
 # إشارات لإنشاء الإشعارات تلقائياً
 @receiver(post_save, sender=Booking)
 def create_booking_notification(sender, instance, created, **kwargs):
@@ -409,6 +658,22 @@ def create_booking_notification(sender, instance, created, **kwargs):
             except Booking.DoesNotExist:
                 pass
 
+@receiver(post_save, sender=Booking)
+def record_booking_status_event(sender, instance, created, raw=False, **kwargs):
+    """تسجيل انتقال الحالة في السجل عند إنشاء الحجز أو تغيير حالته"""
+    if raw:
+        return
+    previous = '' if created else getattr(instance, '_loaded_status', None)
+    if previous is None or previous == instance.status:
+        return
+    BookingStatusEvent.objects.create(
+        booking=instance,
+        from_status=previous,
+        to_status=instance.status,
+        actor=getattr(instance, '_status_actor', None),
+    )
+    instance._loaded_status = instance.status
+
 def get_notification_data(status, booking):
     """الحصول على بيانات الإشعار حسب حالة الحجز"""
     status_messages = {
@@ -501,4 +766,211 @@ class SiteSettings(models.Model):
                 'address': 'القاهرة، مصر',
             }
         )
-        return settings
\ No newline at end of file
+        return settings
+
+class BackgroundJob(models.Model):
+    """مهمة خلفية في طابور المهام المعتمد على قاعدة البيانات"""
+    STATUS_CHOICES = [
+        ('queued', 'في الانتظار'),
+        ('running', 'قيد التنفيذ'),
+        ('succeeded', 'نجحت'),
+        ('failed', 'فشلت'),
+    ]
+
+    task_name = models.CharField(max_length=200, verbose_name="اسم المهمة")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="المعاملات")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', verbose_name="الحالة")
+    dedup_key = models.CharField(max_length=200, blank=True, null=True, verbose_name="مفتاح منع التكرار")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="عدد المحاولات")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="الحد الأقصى للمحاولات")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="موعد التنفيذ")
+    locked_until = models.DateTimeField(blank=True, null=True, verbose_name="محجوزة حتى")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="العامل المنفّذ")
+    last_error = models.TextField(blank=True, verbose_name="آخر خطأ")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="تاريخ الانتهاء")
+
+    class Meta:
+        verbose_name = "مهمة خلفية"
+        verbose_name_plural = "المهام الخلفية"
+        ordering = ['-created_at']
+        indexes = [
+            # بحث العامل عن المهام المستحقة
+            models.Index(fields=['status', 'run_at'], name='hb_job_status_run_at_idx'),
+            models.Index(fields=['locked_by'], name='hb_job_locked_by_idx'),
+        ]
+        constraints = [
+            # مهمة نشطة واحدة فقط لكل مفتاح منع تكرار
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=Q(status__in=['queued', 'running']),
+                name='hb_job_active_dedup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} ({self.get_status_display()})"
+
+class SlotHold(models.Model):
+    """حجز مؤقت قصير العمر لفترة زمنية أثناء إكمال خطوات معالج الحجز"""
+    hall = models.ForeignKey(Hall, on_delete=models.CASCADE, related_name='slot_holds', verbose_name="القاعة")
+    # رمز معالج الحجز المحفوظ في الجلسة (availability.wizard_token)، لا مفتاح الجلسة الذي يتغير عند الدخول
+    owner_token = models.CharField(max_length=40, verbose_name="رمز معالج الحجز")
+    start_datetime = models.DateTimeField(verbose_name="تاريخ ووقت البداية")
+    end_datetime = models.DateTimeField(verbose_name="تاريخ ووقت النهاية")
+    expires_at = models.DateTimeField(verbose_name="ينتهي في")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
+
+    objects = InvalidatingQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "حجز مؤقت"
+        verbose_name_plural = "الحجوزات المؤقتة"
+        ordering = ['-created_at']
+        indexes = [
+            # فحص التداخل ضمن استعلام التوفر
+            models.Index(fields=['hall', 'start_datetime'], name='hb_hold_hall_start_idx'),
+            models.Index(fields=['owner_token'], name='hb_hold_owner_idx'),
+            models.Index(fields=['expires_at'], name='hb_hold_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.hall.name} - {self.start_datetime.strftime('%Y-%m-%d %H:%M')}"
+
+
+class CacheTagVersion(models.Model):
+    """رقم إصدار مشترك لكل وسم في الذاكرة المؤقتة؛ رفعه يبطل كل المدخلات الموسومة به في جميع العمليات"""
+    tag = models.CharField(max_length=200, primary_key=True, verbose_name="الوسم")
+    version = models.BigIntegerField(default=0, verbose_name="الإصدار")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="تاريخ التحديث")
+
+    class Meta:
+        verbose_name = "إصدار وسم الذاكرة المؤقتة"
+        verbose_name_plural = "إصدارات وسوم الذاكرة المؤقتة"
+
+    def __str__(self):
+        return f"{self.tag} (v{self.version})"
+
+
+class RouteStat(models.Model):
+    """مجاميع مقاييس الطلبات لكل مسار (تكتبها ``hall_booking.instrumentation`` دورياً)"""
+    route = models.CharField(max_length=255, verbose_name="المسار")
+    method = models.CharField(max_length=10, verbose_name="الطريقة")
+    view_name = models.CharField(max_length=200, blank=True, verbose_name="العرض")
+    requests = models.PositiveBigIntegerField(default=0, verbose_name="عدد الطلبات")
+    errors = models.PositiveBigIntegerField(default=0, verbose_name="أخطاء الخادم")
+    total_ms = models.FloatField(default=0, verbose_name="مجموع الزمن (مللي ثانية)")
+    max_ms = models.FloatField(default=0, verbose_name="أطول زمن (مللي ثانية)")
+    sql_queries = models.PositiveBigIntegerField(default=0, verbose_name="مجموع الاستعلامات")
+    sql_ms = models.FloatField(default=0, verbose_name="مجموع زمن SQL (مللي ثانية)")
+    template_ms = models.FloatField(default=0, verbose_name="مجموع زمن القوالب (مللي ثانية)")
+    duplicate_queries = models.PositiveBigIntegerField(default=0, verbose_name="الاستعلامات المكررة")
+    last_duplicate = models.TextField(blank=True, verbose_name="آخر استعلام مكرر")
+    peak_kb = models.FloatField(default=0, verbose_name="ذروة الذاكرة (كيلوبايت)")
+    last_seen = models.DateTimeField(default=timezone.now, verbose_name="آخر طلب")
+
+    class Meta:
+        verbose_name = "إحصاءات مسار"
+        verbose_name_plural = "إحصاءات المسارات"
+        ordering = ['-total_ms']
+        constraints = [
+            models.UniqueConstraint(fields=['route', 'method'], name='hb_routestat_route_method'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.route}"
+
+    def _average(self, total):
+        return total / self.requests if self.requests else 0
+
+    @property
+    def avg_ms(self):
+        return self._average(self.total_ms)
+
+    @property
+    def avg_queries(self):
+        return self._average(self.sql_queries)
+
+    @property
+    def avg_sql_ms(self):
+        return self._average(self.sql_ms)
+
+    @property
+    def avg_template_ms(self):
+        return self._average(self.template_ms)
+
+
+class BookingArchive(models.Model):
+    """حجز منتهٍ نقله ``archive_bookings`` من ``Booking`` (انظر ``hall_booking.archive``)
+
+    نفس الحقول والمفتاح الأساسي؛ الخدمات والوجبات وسجل الحالات لقطة JSON وقت الأرشفة.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name="رقم الحجز الأصلي")
+    booking_id = models.UUIDField(unique=True, editable=False, verbose_name="رقم الحجز")
+    reference = models.CharField(max_length=12, unique=True, editable=False, verbose_name="الرقم المرجعي")
+    hall = models.ForeignKey(Hall, on_delete=models.CASCADE, related_name='archived_bookings', db_index=False, verbose_name="القاعة")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_bookings', db_index=False, verbose_name="المستخدم")
+    customer_name = models.CharField(max_length=200, verbose_name="اسم العميل")
+    customer_email = models.EmailField(verbose_name="البريد الإلكتروني")
+    customer_phone = models.CharField(max_length=20, verbose_name="رقم الهاتف")
+    event_title = models.CharField(max_length=200, verbose_name="عنوان الحدث")
+    event_description = models.TextField(verbose_name="وصف الحدث")
+    start_datetime = models.DateTimeField(verbose_name="تاريخ ووقت البداية")
+    end_datetime = models.DateTimeField(verbose_name="تاريخ ووقت النهاية")
+    attendees_count = models.PositiveIntegerField(verbose_name="عدد الحضور")
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="السعر الإجمالي")
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES, verbose_name="الحالة")
+    admin_notes = models.TextField(blank=True, null=True, verbose_name="ملاحظات الإدارة")
+    is_admin_block = models.BooleanField(default=False, verbose_name="حجب إداري")
+    reminder_sent_at = models.DateTimeField(blank=True, null=True, verbose_name="تاريخ إرسال التذكير")
+    created_at = models.DateTimeField(verbose_name="تاريخ الطلب")
+    updated_at = models.DateTimeField(verbose_name="تاريخ التحديث")
+    # أول موافقة في سجل الحالات، لوسيط زمن الموافقة في التقارير
+    approved_at = models.DateTimeField(blank=True, null=True, verbose_name="تاريخ الموافقة")
+    services = models.JSONField(default=list, verbose_name="الخدمات")
+    meals = models.JSONField(default=list, verbose_name="الوجبات")
+    status_history = models.JSONField(default=list, verbose_name="سجل الحالات")
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name="تاريخ الأرشفة")
+
+    objects = InvalidatingQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "حجز مؤرشف"
+        verbose_name_plural = "الحجوزات المؤرشفة"
+        ordering = ['-created_at']
+        indexes = [
+            # نفس فهارس التقارير في Booking
+            models.Index(fields=['created_at'], name='hb_barchive_created_idx'),
+            models.Index(fields=['status', 'created_at', 'total_price'], name='hb_barchive_status_created_idx'),
+            models.Index(fields=['hall', 'start_datetime'], name='hb_barchive_hall_start_idx'),
+            models.Index(fields=['user', 'created_at'], name='hb_barchive_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.reference} - {self.customer_name} - {self.event_title}"
+
+
+class NotificationArchive(models.Model):
+    """إشعار قديم نقله ``archive_bookings`` من ``Notification`` مع حجزه أو لأنه مقروء وقديم"""
+    id = models.BigIntegerField(primary_key=True, verbose_name="رقم الإشعار الأصلي")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications', db_index=False, verbose_name="المستخدم")
+    booking = models.ForeignKey(BookingArchive, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications', verbose_name="الحجز")
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES, verbose_name="نوع الإشعار")
+    title = models.CharField(max_length=200, verbose_name="العنوان")
+    message = models.TextField(verbose_name="الرسالة")
+    is_read = models.BooleanField(default=False, verbose_name="مقروء")
+    created_at = models.DateTimeField(verbose_name="تاريخ الإنشاء")
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name="تاريخ الأرشفة")
+
+    objects = InvalidatingQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "إشعار مؤرشف"
+        verbose_name_plural = "الإشعارات المؤرشفة"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='hb_narchive_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.title}"
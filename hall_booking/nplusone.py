@@ -0,0 +1,198 @@
+"""
+اكتشاف استعلامات N+1 في التطوير والاختبارات، وميزانيات عدد الاستعلامات لكل عرض.
+
+- ``detect_n_plus_one`` يتتبع التحميل الكسول للعلاقات (``booking.hall`` و ``hall.city`` ...) لكل
+  (النموذج، الحقل، موضع الاستدعاء) وينبه أو يرفع ``NPlusOneError`` عند تكرار التحميل نفسه
+  ``NPLUSONE_THRESHOLD`` مرة.
+- ``NPlusOneMiddleware`` يطبقه على كل طلب حسب ``NPLUSONE_MODE`` (``off`` أو ``log`` أو ``warn`` أو ``raise``).
+- ``assertMaxQueries`` سياق يفشل إذا تجاوز عدد الاستعلامات الحد، مع عرض الاستعلامات المكررة؛
+  متاح كـ ``MaxQueriesMixin`` لـ ``TestCase`` وكـ fixture باسم ``max_queries`` لـ pytest
+  (``pytest_plugins = ['hall_booking.nplusone']``).
+"""
+import logging
+import sys
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.fields.related_descriptors import (
+    ForwardManyToOneDescriptor,
+    ReverseOneToOneDescriptor,
+)
+from django.template.base import Node
+from django.test.utils import CaptureQueriesContext
+
+from .instrumentation import fingerprint
+
+logger = logging.getLogger('hall_booking.nplusone')
+
+MODES = ('off', 'log', 'warn', 'raise')
+
+_tracker = ContextVar('hall_booking_nplusone', default=None)
+_DJANGO_DIR = str(Path(sys.modules['django'].__file__).parent)
+_THIS_FILE = __file__
+
+
+class NPlusOneError(AssertionError):
+    """تحميل كسول متكرر للعلاقة نفسها من الموضع نفسه"""
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+def _call_site():
+    """أقرب موضع في كود المشروع أو في قالب تسبب في التحميل"""
+    frame = sys._getframe(2)
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if isinstance(node, Node) and getattr(node, 'origin', None) is not None and getattr(node, 'token', None):
+            return f"{node.origin.template_name}:{node.token.lineno}"
+        filename = frame.f_code.co_filename
+        if (filename.startswith(base_dir) and filename != _THIS_FILE and 'site-packages' not in filename
+                and not filename.startswith(_DJANGO_DIR)):
+            return f"{Path(filename).relative_to(base_dir)}:{frame.f_lineno}"
+        frame = frame.f_back
+    return '<unknown>'
+
+
+class LazyLoadTracker:
+    """عدّاد التحميلات الكسولة لكل (النموذج، الحقل، موضع الاستدعاء)"""
+
+    def __init__(self, threshold, mode):
+        self.threshold = threshold
+        self.mode = mode
+        self.loads = Counter()
+
+    def record(self, model, field):
+        key = (model._meta.label, field, _call_site())
+        self.loads[key] += 1
+        if self.mode == 'raise' and self.loads[key] == self.threshold:
+            raise NPlusOneError(self.describe(key, self.loads[key]))
+
+    def offenders(self):
+        return [(key, count) for key, count in self.loads.most_common() if count >= self.threshold]
+
+    @staticmethod
+    def describe(key, count):
+        model, field, site = key
+        return (f"{model}.{field} loaded lazily {count} times from {site}; "
+                f"use select_related('{field}') or prefetch_related('{field}')")
+
+    def report(self, label=''):
+        for key, count in self.offenders():
+            message = f"{label}{self.describe(key, count)}"
+            if self.mode == 'warn':
+                warnings.warn(message, NPlusOneWarning, stacklevel=2)
+            else:
+                logger.warning(message)
+
+
+def _forward_get_object(get_object):
+    def wrapper(self, instance):
+        tracker = _tracker.get()
+        if tracker is not None:
+            tracker.record(type(instance), self.field.name)
+        return get_object(self, instance)
+    wrapper._hb_tracked = True
+    return wrapper
+
+
+def _reverse_one_to_one_get(get):
+    def wrapper(self, instance, cls=None):
+        tracker = _tracker.get()
+        if tracker is not None and instance is not None and not self.related.is_cached(instance):
+            tracker.record(type(instance), self.related.get_accessor_name())
+        return get(self, instance, cls)
+    wrapper._hb_tracked = True
+    return wrapper
+
+
+def install():
+    """ربط التتبع بواصفات العلاقات مرة واحدة (لا تكلفة تُذكر خارج ``detect_n_plus_one``)"""
+    if not getattr(ForwardManyToOneDescriptor.get_object, '_hb_tracked', False):
+        ForwardManyToOneDescriptor.get_object = _forward_get_object(ForwardManyToOneDescriptor.get_object)
+    if not getattr(ReverseOneToOneDescriptor.__get__, '_hb_tracked', False):
+        ReverseOneToOneDescriptor.__get__ = _reverse_one_to_one_get(ReverseOneToOneDescriptor.__get__)
+
+
+@contextmanager
+def detect_n_plus_one(threshold=None, mode='raise'):
+    """تتبع التحميلات الكسولة داخل السياق؛ ``raise`` يفشل عند أول تكرار يبلغ الحد"""
+    install()
+    tracker = LazyLoadTracker(threshold or getattr(settings, 'NPLUSONE_THRESHOLD', 3), mode)
+    token = _tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _tracker.reset(token)
+    if mode != 'raise':
+        tracker.report()
+
+
+class NPlusOneMiddleware:
+    """تطبيق ``detect_n_plus_one`` على كل طلب في التطوير حسب ``NPLUSONE_MODE``"""
+
+    def __init__(self, get_response):
+        self.mode = getattr(settings, 'NPLUSONE_MODE', 'off')
+        if self.mode not in MODES:
+            raise ValueError(f"NPLUSONE_MODE must be one of {MODES}")
+        if self.mode == 'off':
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if _tracker.get() is not None:
+            # داخل ``detect_n_plus_one`` في اختبار: يتولى السياق الخارجي التتبع والإبلاغ
+            return self.get_response(request)
+        tracker = LazyLoadTracker(getattr(settings, 'NPLUSONE_THRESHOLD', 3), self.mode)
+        token = _tracker.set(tracker)
+        try:
+            response = self.get_response(request)
+        finally:
+            _tracker.reset(token)
+        tracker.report(label=f"{request.method} {request.path}: ")
+        return response
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assertMaxQueries(limit, using=DEFAULT_DB_ALIAS):
+    """فشل إذا نُفذ أكثر من ``limit`` استعلاماً داخل السياق، مع قائمة الاستعلامات المكررة"""
+    with CaptureQueriesContext(connections[using]) as captured:
+        yield captured
+    executed = len(captured.captured_queries)
+    if executed > limit:
+        repeated = Counter(fingerprint(query['sql']) for query in captured.captured_queries)
+        lines = [f"{executed} queries executed, budget is {limit}"]
+        lines += [f"  {count}x {sql[:200]}" for sql, count in repeated.most_common(5) if count > 1]
+        raise QueryBudgetExceeded('\n'.join(lines))
+
+
+class MaxQueriesMixin:
+    """``self.assertMaxQueries(n)`` لفئات ``TestCase``"""
+
+    def assertMaxQueries(self, limit, using=DEFAULT_DB_ALIAS):
+        return assertMaxQueries(limit, using=using)
+
+
+try:
+    import pytest
+except ImportError:  # pytest اختياري
+    pytest = None
+
+if pytest is not None:
+    @pytest.fixture
+    def max_queries():
+        """``with max_queries(5): client.get(url)``"""
+        return assertMaxQueries
@@ -0,0 +1,124 @@
+"""
+تخزين الصفحات العامة كاملة للزوار غير المسجلين.
+
+- المفتاح: المسار + معاملات الاستعلام المسموح بها فقط بعد ترتيبها وتنظيفها.
+- الصلاحية: وسوم الذاكرة المتدرجة (``hall:N`` و ``halls`` و ``catalogue`` ...) فأي تعديل يبطل الصفحة.
+- رمز CSRF يُستبدل في المحتوى المخزن بعلامة تُملأ برمز جديد لكل طلب عند التقديم.
+- لا تُخدم ولا تُخزن الصفحة إذا كانت للزائر رسائل معلقة (``django.contrib.messages``).
+- ترويسات ``ETag`` (من إصدارات الوسوم) و ``Last-Modified`` (من ``Hall.updated_at`` وقت العرض، مخزن مع الصفحة)
+  مع ردود 304؛ الطلب المخدوم من الذاكرة لا يكلف أي استعلام.
+
+المستخدمون المسجلون يمرون إلى العرض مباشرة ويستفيدون من تخزين البيانات في ``hall_booking.catalogue``.
+"""
+import hashlib
+import re
+from calendar import timegm
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import SkipCache, tiered_cache
+from .invalidation import tag_versions
+
+NAMESPACE = 'pages'
+CSRF_PLACEHOLDER = b'__hb_csrf_token__'
+_CSRF_INPUT_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([A-Za-z0-9]+)"')
+
+
+def _has_pending_messages(request):
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def page_key(request, params):
+    """مفتاح الصفحة من المسار ومعاملات الاستعلام المعروفة فقط (يُتجاهل ما سواها مثل utm_*)"""
+    query = sorted(
+        (name, value.strip())
+        for name in params
+        for value in request.GET.getlist(name)
+        if value.strip()
+    )
+    return f"{request.path}?{urlencode(query)}"
+
+
+def _strip_csrf_tokens(content, token_used):
+    """استبدال رمز CSRF بعلامة ثابتة؛ يعيد None إذا استُخدم الرمز في موضع لا يمكن تحديده"""
+    tokens = set(_CSRF_INPUT_RE.findall(content))
+    for token in tokens:
+        content = content.replace(token, CSRF_PLACEHOLDER)
+    if token_used and not tokens:
+        return None
+    return content
+
+
+def _finalize(response, etag, last_modified, has_csrf):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    if has_csrf:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'PAGE_CACHE_MAX_AGE', 0),
+                            must_revalidate=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def cache_anonymous_page(tags=(), params=(), ttl=None, last_modified=None):
+    """تخزين الصفحة المعروضة للزوار غير المسجلين
+
+    ``tags`` وسوم الصفحة أو دالة ``(request, *args, **kwargs)`` تبنيها.
+    ``params`` معاملات الاستعلام التي تؤثر على المحتوى.
+    ``last_modified`` دالة اختيارية بنفس المعاملات تعيد تاريخ آخر تعديل أو None (تُستدعى عند العرض فقط).
+    """
+    ttl = ttl if ttl is not None else getattr(settings, 'PAGE_CACHE_TTL', 600)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD') or request.user.is_authenticated
+                    or _has_pending_messages(request)):
+                return view(request, *args, **kwargs)
+
+            page_tags = list(tags(request, *args, **kwargs) if callable(tags) else tags)
+            key = page_key(request, params)
+            versions = tag_versions([NAMESPACE, *page_tags])
+            etag = quote_etag(hashlib.sha1(f"{key}:{versions}".encode('utf-8')).hexdigest()[:20])
+
+            def render_page():
+                token_used_before = request.META.get('CSRF_COOKIE_NEEDS_UPDATE', False)
+                response = view(request, *args, **kwargs)
+                if (response.status_code != 200 or response.streaming or response.cookies
+                        or _has_pending_messages(request) or request.session.modified):
+                    raise SkipCache(response)
+                token_used = request.META.get('CSRF_COOKIE_NEEDS_UPDATE', False) or token_used_before
+                content = _strip_csrf_tokens(response.content, token_used)
+                if content is None:
+                    raise SkipCache(response)
+                # يُحسب مرة مع العرض ويُخزن مع الصفحة فلا يكلف الطلب المخدوم من الذاكرة استعلاماً
+                modified = last_modified(request, *args, **kwargs) if last_modified else None
+                return {'content': content, 'content_type': response['Content-Type'],
+                        'modified': timegm(modified.utctimetuple()) if modified else None}
+
+            result = tiered_cache.get_or_set(NAMESPACE, key, render_page, ttl=ttl, tags=page_tags)
+            if isinstance(result, HttpResponse):
+                return result
+
+            modified = result.get('modified')
+            not_modified = get_conditional_response(request, etag=etag, last_modified=modified)
+            if not_modified is not None:
+                return _finalize(not_modified, etag, modified, has_csrf=False)
+
+            content = result['content']
+            has_csrf = CSRF_PLACEHOLDER in content
+            if has_csrf:
+                content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode('ascii'))
+            response = HttpResponse(content, content_type=result['content_type'])
+            return _finalize(response, etag, modified, has_csrf)
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+"""
+ميزات خاصة بـ PostgreSQL تُضاف فوق المخطط المشترك مع SQLite.
+
+- قيدا استبعاد (btree_gist) يمنعان تداخل فترتين على نفس القاعة: للحجوزات المعلقة والموافق عليها
+  (``hb_booking_no_overlap``) وللحجوزات المؤقتة (``hb_slothold_no_overlap``). الفحص في
+  ``availability`` يبقى لرسالة الخطأ، والقيد يحسم السباق بين معاملتين متزامنتين.
+- فهرس BRIN على ``Booking.created_at`` لمسح الفترات في جدول يُضاف إليه بترتيب الزمن تقريباً.
+- فهارس GIN بالثلاثيات (pg_trgm) على تعبير ``UPPER(col::text)`` الذي يولده Django لـ ``icontains``.
+- فهرس ``tsvector`` لبحث القاعات بالكلمات مع الترتيب بالصلة (``search_halls``).
+
+``install`` ينشئ كل ميزة في نقطة حفظ مستقلة ويتخطى ما لا يتوفر امتداده أو ما تمنعه البيانات
+الحالية (حجوزات متداخلة قديمة مثلاً) مع تحذير. يستدعيه الترحيل 0014 والأمر ``postgres_features``.
+على SQLite وغيره لا يفعل شيئاً.
+"""
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger('hall_booking.pgfeatures')
+
+BOOKING_OVERLAP_CONSTRAINT = 'hb_booking_no_overlap'
+SLOTHOLD_OVERLAP_CONSTRAINT = 'hb_slothold_no_overlap'
+
+# نفس التعبير في الفهرس والاستعلام (الأعمدة في الاستعلام بأسمائها الكاملة)، وإلا لا يستخدم المخطِّط الفهرس
+_DOCUMENT = "to_tsvector('simple'::regconfig, {t}\"name\" || ' ' || {t}\"address\" || ' ' || {t}\"description\")"
+HALL_DOCUMENT = _DOCUMENT.format(t='"hall_booking_hall".')
+HALL_QUERY = "plainto_tsquery('simple'::regconfig, %s)"
+
+
+class Feature:
+    """كائن واحد في القاعدة: امتداد أو قيد أو فهرس"""
+
+    def __init__(self, name, kind, create_sql, drop_sql, requires=()):
+        self.name = name
+        self.kind = kind
+        self.create_sql = create_sql
+        self.drop_sql = drop_sql
+        self.requires = requires
+
+
+def _trigram_index(name, table, column):
+    return Feature(
+        name, 'index',
+        f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)',
+        f'DROP INDEX IF EXISTS "{name}"',
+        requires=('pg_trgm',),
+    )
+
+
+def _overlap_constraint(name, table, predicate=''):
+    where = f' WHERE ({predicate})' if predicate else ''
+    return Feature(
+        name, 'constraint',
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" EXCLUDE USING gist '
+        f"(hall_id WITH =, tstzrange(start_datetime, end_datetime, '[)') WITH &&){where}",
+        f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "{name}"',
+        requires=('btree_gist',),
+    )
+
+
+FEATURES = [
+    Feature('btree_gist', 'extension', 'CREATE EXTENSION IF NOT EXISTS btree_gist', None),
+    Feature('pg_trgm', 'extension', 'CREATE EXTENSION IF NOT EXISTS pg_trgm', None),
+    _overlap_constraint(BOOKING_OVERLAP_CONSTRAINT, 'hall_booking_booking', "status IN ('approved', 'pending')"),
+    # الحجوزات المؤقتة المنتهية تُحذف قبل إنشاء حجز جديد (availability.hold_slot)
+    _overlap_constraint(SLOTHOLD_OVERLAP_CONSTRAINT, 'hall_booking_slothold'),
+    Feature(
+        'hb_booking_created_brin', 'index',
+        'CREATE INDEX IF NOT EXISTS "hb_booking_created_brin" ON "hall_booking_booking" USING brin ("created_at")',
+        'DROP INDEX IF EXISTS "hb_booking_created_brin"',
+    ),
+    _trigram_index('hb_hall_name_trgm', 'hall_booking_hall', 'name'),
+    _trigram_index('hb_hall_address_trgm', 'hall_booking_hall', 'address'),
+    _trigram_index('hb_booking_title_trgm', 'hall_booking_booking', 'event_title'),
+    _trigram_index('hb_booking_name_trgm', 'hall_booking_booking', 'customer_name'),
+    _trigram_index('hb_booking_phone_trgm', 'hall_booking_booking', 'customer_phone'),
+    _trigram_index('hb_booking_email_trgm', 'hall_booking_booking', 'customer_email'),
+    Feature(
+        'hb_hall_search_idx', 'index',
+        f'CREATE INDEX IF NOT EXISTS "hb_hall_search_idx" ON "hall_booking_hall" USING gin (({_DOCUMENT.format(t="")}))',
+        'DROP INDEX IF EXISTS "hb_hall_search_idx"',
+    ),
+]
+
+
+def is_postgresql(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'postgresql'
+
+
+def _exists(cursor, feature):
+    if feature.kind == 'extension':
+        cursor.execute('SELECT 1 FROM pg_extension WHERE extname = %s', [feature.name])
+    elif feature.kind == 'constraint':
+        cursor.execute('SELECT 1 FROM pg_constraint WHERE conname = %s', [feature.name])
+    else:
+        cursor.execute('SELECT 1 FROM pg_class WHERE relname = %s AND relkind = %s', [feature.name, 'i'])
+    return cursor.fetchone() is not None
+
+
+def status(using=DEFAULT_DB_ALIAS):
+    """الميزات الموجودة فعلاً في القاعدة: ``{name: bool}`` (فارغ لغير PostgreSQL)"""
+    if not is_postgresql(using):
+        return {}
+    with connections[using].cursor() as cursor:
+        return {feature.name: _exists(cursor, feature) for feature in FEATURES}
+
+
+def install(connection):
+    """إنشاء الميزات الناقصة؛ يعيد ``{name: 'present' | 'created' | سبب التخطي}``"""
+    if connection.vendor != 'postgresql':
+        return {}
+    results = {}
+    with connection.cursor() as cursor:
+        for feature in FEATURES:
+            missing = [name for name in feature.requires if results.get(name) not in ('present', 'created')]
+            if missing:
+                results[feature.name] = f"requires {', '.join(missing)}"
+            elif _exists(cursor, feature):
+                results[feature.name] = 'present'
+            else:
+                try:
+                    with transaction.atomic(using=connection.alias):
+                        cursor.execute(feature.create_sql)
+                except DatabaseError as exc:
+                    # امتداد غير مثبت على الخادم أو بلا صلاحية، أو بيانات تخالف القيد
+                    results[feature.name] = str(exc).strip().splitlines()[0]
+                else:
+                    results[feature.name] = 'created'
+            if results[feature.name] not in ('present', 'created'):
+                logger.warning('PostgreSQL feature %s skipped: %s', feature.name, results[feature.name])
+    return results
+
+
+def uninstall(connection):
+    """حذف القيود والفهارس (الامتدادات تبقى لأنها قد تخدم غير هذا التطبيق)"""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for feature in reversed(FEATURES):
+            if feature.drop_sql:
+                cursor.execute(feature.drop_sql)
+
+
+def is_overlap_violation(exc):
+    """هل ``IntegrityError`` انتهاك لأحد قيدي منع التداخل"""
+    diag = getattr(exc.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) in (BOOKING_OVERLAP_CONSTRAINT, SLOTHOLD_OVERLAP_CONSTRAINT)
+
+
+def search_halls(queryset, term, substring_filter):
+    """تصفية القاعات بـ ``substring_filter``، ويُضاف على PostgreSQL بحث الكلمات والترتيب بالصلة
+
+    بحث الكلمات يطابق كلمات العبارة بأي ترتيب عبر الاسم والعنوان والوصف، والفلتر الجزئي
+    يبقى لأجزاء الكلمات وأسماء الفئة والموقع.
+    """
+    if not is_postgresql(queryset.db):
+        return queryset.filter(substring_filter)
+    match = RawSQL(f'{HALL_DOCUMENT} @@ {HALL_QUERY}', [term], output_field=BooleanField())
+    rank = RawSQL(f'ts_rank({HALL_DOCUMENT}, {HALL_QUERY})', [term], output_field=FloatField())
+    return queryset.filter(Q(match) | substring_filter).annotate(search_rank=rank).order_by('-search_rank', 'pk')
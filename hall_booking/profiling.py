@@ -0,0 +1,207 @@
+"""
+تحليل أداء طلب بعينه عند الطلب، للموظفين فقط.
+
+- التفعيل: معامل الاستعلام ``__profile`` أو الترويسة ``X-HB-Profile`` يحمل رمزاً موقّعاً
+  (``make_token``) صالحاً لمدة ``PROFILER_TOKEN_MAX_AGE``، ويجب أن يكون المستخدم من الموظفين.
+- الأنماط: ``cprofile`` (ملف pstats كامل) أو ``sample`` (عينات دورية للمكدس بتكلفة منخفضة تُحفظ
+  كمكدسات مطوية ``collapsed`` تقرؤها أدوات flamegraph و speedscope).
+- الالتقاطات تُحفظ في ``PROFILER_DIR`` مع ملف وصف JSON، ويُحذف الأقدم عند تجاوز
+  ``PROFILER_MAX_CAPTURES`` أو ``PROFILER_MAX_BYTES``.
+- تُعرض من لوحة الإدارة المخصصة (``HallBookingAdminSite``) في ``profiles/``.
+"""
+import cProfile
+import io
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+MODES = ('cprofile', 'sample')
+QUERY_PARAM = '__profile'
+HEADER = 'HTTP_X_HB_PROFILE'
+_SALT = 'hall_booking.profiling'
+_CAPTURE_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+_EXTENSIONS = {'cprofile': 'pstats', 'sample': 'collapsed'}
+
+
+def profiles_dir():
+    return Path(getattr(settings, 'PROFILER_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def make_token(mode='cprofile', path=None):
+    """رمز تفعيل موقّع؛ ``path`` يقصره على مسار واحد"""
+    if mode not in MODES:
+        raise ValueError(f'Unknown profiler mode: {mode}')
+    return signing.TimestampSigner(salt=_SALT).sign_object({'mode': mode, 'path': path})
+
+
+def read_token(request):
+    """نمط التحليل المطلوب في الطلب، أو None إذا لم يكن هناك رمز صالح"""
+    token = request.GET.get(QUERY_PARAM) or request.META.get(HEADER)
+    if not token:
+        return None
+    try:
+        data = signing.TimestampSigner(salt=_SALT).unsign_object(
+            token, max_age=getattr(settings, 'PROFILER_TOKEN_MAX_AGE', 3600),
+        )
+    except signing.BadSignature:
+        return None
+    if data.get('mode') not in MODES or (data.get('path') and data['path'] != request.path):
+        return None
+    return data['mode']
+
+
+class StackSampler:
+    """عينات دورية لمكدس خيط واحد من خيط جانبي (بدون تتبع كل استدعاء كما يفعل cProfile)"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='hb-stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def _prune(directory):
+    """حذف أقدم الالتقاطات حتى يعود المجلد ضمن حدود العدد والحجم"""
+    max_captures = getattr(settings, 'PROFILER_MAX_CAPTURES', 50)
+    max_bytes = getattr(settings, 'PROFILER_MAX_BYTES', 100 * 1024 * 1024)
+    captures = sorted(directory.glob('*.json'), key=lambda meta: meta.stat().st_mtime, reverse=True)
+    total = 0
+    for index, meta in enumerate(captures):
+        files = [meta, *(meta.with_suffix(f'.{ext}') for ext in _EXTENSIONS.values())]
+        size = sum(path.stat().st_size for path in files if path.exists())
+        total += size
+        if index >= max_captures or total > max_bytes:
+            for path in files:
+                path.unlink(missing_ok=True)
+
+
+def _save(request, response, mode, elapsed, write_data):
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    capture_id = uuid.uuid4().hex
+    data_path = directory / f'{capture_id}.{_EXTENSIONS[mode]}'
+    write_data(data_path)
+    meta = {
+        'id': capture_id,
+        'mode': mode,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'user': request.user.get_username(),
+        'duration_ms': round(elapsed * 1000, 2),
+        'created_at': timezone.now().isoformat(),
+        'file': data_path.name,
+        'size': data_path.stat().st_size,
+    }
+    (directory / f'{capture_id}.json').write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+    _prune(directory)
+    return meta
+
+
+def profile_request(get_response, request, mode):
+    """تنفيذ الطلب تحت المحلل المطلوب وحفظ الالتقاط"""
+    started = time.perf_counter()
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        response = profiler.runcall(get_response, request)
+        elapsed = time.perf_counter() - started
+        meta = _save(request, response, mode, elapsed, lambda path: profiler.dump_stats(path))
+    else:
+        interval = getattr(settings, 'PROFILER_SAMPLE_INTERVAL', 0.005)
+        with StackSampler(threading.get_ident(), interval) as sampler:
+            response = get_response(request)
+        elapsed = time.perf_counter() - started
+        meta = _save(request, response, mode, elapsed,
+                     lambda path: path.write_text(sampler.collapsed(), encoding='utf-8'))
+    response['X-HB-Profile-Id'] = meta['id']
+    return response
+
+
+def list_captures():
+    directory = profiles_dir()
+    if not directory.exists():
+        return []
+    captures = []
+    for meta_path in directory.glob('*.json'):
+        try:
+            captures.append(json.loads(meta_path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            continue
+    return sorted(captures, key=lambda meta: meta['created_at'], reverse=True)
+
+
+def get_capture(capture_id):
+    """(الوصف، مسار الملف) أو None؛ المعرف يُتحقق منه لمنع الخروج من المجلد"""
+    if not _CAPTURE_ID_RE.match(capture_id or ''):
+        return None
+    meta_path = profiles_dir() / f'{capture_id}.json'
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text(encoding='utf-8'))
+    data_path = profiles_dir() / f"{capture_id}.{_EXTENSIONS[meta['mode']]}"
+    return (meta, data_path) if data_path.exists() else None
+
+
+def summarize(meta, data_path, limit=60):
+    """ملخص نصي للعرض: أعلى الدوال بالزمن التراكمي لـ cProfile، أو أكثر المكدسات تكراراً للعينات"""
+    if meta['mode'] == 'cprofile':
+        out = io.StringIO()
+        pstats.Stats(str(data_path), stream=out).strip_dirs().sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+    leaves = Counter()
+    total = 0
+    for line in data_path.read_text(encoding='utf-8').splitlines():
+        stack, _, count = line.rpartition(' ')
+        leaves[stack.rsplit(';', 1)[-1]] += int(count)
+        total += int(count)
+    lines = [f'{total} samples; hottest frames (self):']
+    lines += [f'{count:>7}  {count * 100 / total:5.1f}%  {frame}' for frame, count in leaves.most_common(limit)]
+    return '\n'.join(lines)
+
+
+class ProfilingMiddleware:
+    """تحليل الطلب إذا حمل رمزاً موقّعاً صالحاً وكان المستخدم من الموظفين (بعد ``AuthenticationMiddleware``)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, 'user', None)
+        if (QUERY_PARAM in request.GET or HEADER in request.META) and user is not None and user.is_staff:
+            mode = read_token(request)
+            if mode:
+                return profile_request(self.get_response, request, mode)
+        return self.get_response(request)
@@ -0,0 +1,262 @@
+"""
+تدقيق خطط تنفيذ الاستعلامات الساخنة.
+
+كل استعلام ساخن دالة تنفذ نفس الاستعلامات التي تنفذها العروض (``halls_list`` وفحص التوفر و
+``hall_reports`` و ``admin_bookings_list`` و ``user_bookings`` وواجهات المخططات) على عينة من
+البيانات الحالية. تُلتقط جمل SELECT الناتجة ويُطلب لكل شكل منها:
+
+- SQLite: ``EXPLAIN QUERY PLAN`` ثم تنفيذ الجملة لقياس زمنها؛ يُعلَّم ``SCAN`` على جدول كامل
+  و ``USE TEMP B-TREE``.
+- PostgreSQL: ``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)``؛ يُعلَّم ``Seq Scan`` والفرز (``Sort``).
+
+المسح الكامل لجدول أصغر من ``min_rows`` صف لا يُحسب مشكلة (الفهرس لا يفيد فيه).
+``repeat`` يقيس وسيط زمن تنفيذ كل استعلام ساخن لمقارنة الفهارس قبل التغيير وبعده.
+"""
+import json
+import re
+import statistics
+import time
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import Count, Q, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import stats
+from .availability import busy_slots, is_slot_available
+from .instrumentation import fingerprint
+from .models import Booking, BookingService, BookingStatusEvent, Hall, HallImage, Notification
+
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(.*)$')
+
+
+class HotQuery:
+    """مجموعة استعلامات عرض واحد؛ ``run`` تنفذها على العينة"""
+
+    def __init__(self, name, description, run):
+        self.name = name
+        self.description = description
+        self.run = run
+
+
+def sample():
+    """قيم تمثيلية من البيانات الحالية: القاعة والمستخدم الأكثر حجوزات وأقرب يوم مشغول"""
+    hall = (Hall.objects.filter(status='available').annotate(bookings_count=Count('bookings'))
+            .order_by('-bookings_count', 'pk').first())
+    if hall is None:
+        raise ValueError('No available halls; run generate_dataset first')
+    user_id = (Booking.objects.filter(user__isnull=False).values('user').annotate(n=Count('pk'))
+               .order_by('-n').values_list('user', flat=True).first())
+    upcoming = (Booking.objects.filter(hall=hall, start_datetime__gte=timezone.now())
+                .order_by('start_datetime').first())
+    start = upcoming.start_datetime if upcoming else timezone.now().replace(hour=10, minute=0, second=0, microsecond=0)
+    email = (Booking.objects.filter(user_id=user_id).values_list('customer_email', flat=True).first()
+             if user_id else None)
+    return {
+        'hall': hall,
+        'user_id': user_id,
+        'email': email or 'nobody@example.com',
+        'start': start,
+        'end': start + timedelta(hours=3),
+    }
+
+
+def _halls_list(s):
+    hall = s['hall']
+    base = Hall.objects.filter(status='available').select_related('category', 'governorate', 'city')
+    list(base.prefetch_related('images'))
+    list(base.filter(category_id=hall.category_id, governorate_id=hall.governorate_id,
+                     capacity__gte=101, capacity__lte=200))
+    term = hall.name.split(' - ')[0]
+    list(base.filter(
+        Q(name__icontains=term) | Q(description__icontains=term) | Q(category__name__icontains=term)
+        | Q(governorate__name__icontains=term) | Q(city__name__icontains=term) | Q(address__icontains=term)
+    ))
+    list(HallImage.objects.filter(hall=hall))
+
+
+def _availability(s):
+    is_slot_available(s['hall'].pk, s['start'], s['end'], owner='queryplan')
+    busy_slots(s['hall'], s['start'].date(), owner='queryplan')
+
+
+def _hall_reports(s):
+    hall = s['hall']
+    bookings = Booking.objects.filter(hall=hall)
+    bookings.count()
+    bookings.filter(status='approved').count()
+    today = timezone.now().date()
+    recent = bookings.filter(created_at__date__range=[today - timedelta(days=30), today])
+    recent.filter(status='approved').aggregate(Sum('total_price'))
+    bookings.filter(status='approved').aggregate(Sum('total_price'))
+    list(BookingService.objects.filter(booking__hall=hall, booking__status='approved')
+         .values('service__name').annotate(count=Count('service')).order_by('-count')[:5])
+    month_start = today.replace(day=1)
+    bookings.filter(start_datetime__date__range=[month_start, today], status='approved').count()
+    BookingStatusEvent.median_approval_hours_by_hall(hall_ids=[hall.pk])
+
+
+def _admin_bookings_list(s):
+    bookings = Booking.objects.all().order_by('-created_at')
+    list(bookings[:50])
+    list(bookings.filter(status='pending')[:50])
+    list(bookings.filter(hall=s['hall'])[:50])
+    bookings.filter(status='pending').count()
+    term = s['hall'].name.split(' - ')[0]
+    list(bookings.filter(Q(event_title__icontains=term) | Q(customer_name__icontains=term)
+                         | Q(customer_phone__icontains=term))[:50])
+
+
+def _user_bookings(s):
+    bookings = Booking.objects.filter(user_id=s['user_id']).select_related('hall').order_by('-created_at')
+    bookings.count()
+    list(bookings[:10])
+    list(bookings.filter(status='approved')[:10])
+    list(Booking.objects.filter(customer_email=s['email'], user__isnull=True)[:10])
+    list(Notification.objects.filter(user_id=s['user_id']).select_related('booking__hall')[:20])
+    Notification.objects.filter(user_id=s['user_id'], is_read=False).count()
+
+
+def _charts(s):
+    stats.monthly_bookings.uncached()
+    stats.monthly_revenue.uncached()
+    stats.halls_per_category.uncached()
+    now = timezone.now()
+    Booking.objects.filter(created_at__year=now.year, created_at__month=now.month).count()
+
+
+HOT_QUERIES = [
+    HotQuery('halls_list', 'Hall listing, filters, search and gallery', _halls_list),
+    HotQuery('availability', 'is_slot_available and busy_slots', _availability),
+    HotQuery('hall_reports', 'Per-hall counts, revenue, popular services, approval time', _hall_reports),
+    HotQuery('admin_bookings_list', 'Newest bookings with status/hall filters and search', _admin_bookings_list),
+    HotQuery('user_bookings', 'A user\'s bookings, guest bookings by email, notifications', _user_bookings),
+    HotQuery('charts', 'Monthly bookings/revenue and halls per category', _charts),
+]
+
+
+def select_queries(names=None):
+    if not names:
+        return list(HOT_QUERIES)
+    selected = [query for query in HOT_QUERIES if any(query.name.startswith(name) for name in names)]
+    if not selected:
+        raise ValueError(f"No hot query matches {', '.join(names)}")
+    return selected
+
+
+def capture(hot_query, s, using='default'):
+    """جمل SELECT التي ينفذها الاستعلام الساخن، مرة واحدة لكل شكل"""
+    with CaptureQueriesContext(connections[using]) as captured:
+        hot_query.run(s)
+    statements = {}
+    for query in captured.captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            continue
+        statements.setdefault(fingerprint(sql), sql)
+    return list(statements.values())
+
+
+def _table_rows(connection, table, cache):
+    if table not in cache:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            cache[table] = cursor.fetchone()[0]
+    return cache[table]
+
+
+def _explain_sqlite(connection, sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        rows = cursor.fetchall()
+        # لا يوجد EXPLAIN ANALYZE في SQLite، فيُقاس زمن الجملة بتنفيذها
+        started = time.perf_counter()
+        cursor.execute(sql)
+        cursor.fetchall()
+        execution_ms = (time.perf_counter() - started) * 1000
+    depth = {0: -1}
+    plan, findings = [], []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        plan.append('  ' * depth[node_id] + detail)
+        match = _SQLITE_SCAN_RE.match(detail)
+        if match and 'INDEX' not in match.group(2):
+            findings.append(('full_scan', match.group(1)))
+        elif 'USE TEMP B-TREE' in detail:
+            findings.append(('temp_btree', detail.split('FOR ', 1)[-1]))
+    return plan, findings, execution_ms
+
+
+def _explain_postgresql(connection, sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}')
+        document = cursor.fetchone()[0]
+    if isinstance(document, str):
+        document = json.loads(document)
+    root = document[0]
+    plan, findings = [], []
+
+    def walk(node, level):
+        relation = f" on {node['Relation Name']}" if 'Relation Name' in node else ''
+        index = f" using {node['Index Name']}" if 'Index Name' in node else ''
+        plan.append(f"{'  ' * level}{node['Node Type']}{relation}{index} "
+                    f"(rows={node.get('Actual Rows')} time={node.get('Actual Total Time')} ms)")
+        if node['Node Type'] == 'Seq Scan':
+            findings.append(('full_scan', node['Relation Name']))
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            findings.append(('sort', f"{', '.join(node.get('Sort Key', []))} "
+                                     f"({node.get('Sort Space Type', '?')})"))
+        for child in node.get('Plans', []):
+            walk(child, level + 1)
+
+    walk(root['Plan'], 0)
+    return plan, findings, root.get('Execution Time')
+
+
+def explain(sql, using='default', min_rows=1000, _rows_cache=None):
+    """خطة جملة واحدة مع الملاحظات: ``full_scan`` و ``temp_btree`` (SQLite) أو ``sort`` (PostgreSQL)"""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        plan, findings, execution_ms = _explain_sqlite(connection, sql)
+    elif connection.vendor == 'postgresql':
+        plan, findings, execution_ms = _explain_postgresql(connection, sql)
+    else:
+        raise ValueError(f'EXPLAIN is not supported for {connection.vendor}')
+    rows_cache = {} if _rows_cache is None else _rows_cache
+    flags = []
+    for kind, target in findings:
+        if kind == 'full_scan':
+            rows = _table_rows(connection, target, rows_cache)
+            if rows < min_rows:
+                continue
+            target = f'{target} ({rows} rows)'
+        flags.append((kind, target))
+    return {'sql': sql, 'plan': plan, 'flags': flags, 'execution_ms': execution_ms}
+
+
+def time_query(hot_query, s, repeat=5):
+    """وسيط زمن تنفيذ الاستعلام الساخن بالمللي ثانية (بعد تنفيذ تمهيدي يدفئ ذاكرة الصفحات)"""
+    hot_query.run(s)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        hot_query.run(s)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def audit(names=None, using='default', min_rows=1000, repeat=5):
+    """تنفيذ الاستعلامات الساخنة وإرجاع خطة كل جملة مع ملاحظاتها ووسيط الزمن"""
+    s = sample()
+    rows_cache = {}
+    report = []
+    for hot_query in select_queries(names):
+        statements = [explain(sql, using, min_rows, rows_cache) for sql in capture(hot_query, s, using)]
+        report.append({
+            'name': hot_query.name,
+            'description': hot_query.description,
+            'median_ms': time_query(hot_query, s, repeat) if repeat else None,
+            'statements': statements,
+        })
+    return report
@@ -0,0 +1,129 @@
+"""
+توجيه قراءات التقارير إلى نسخة القراءة (``replica``) وإبقاء كل ما عداها على القاعدة الرئيسية.
+
+- ``ReplicaRouter`` (في ``DATABASE_ROUTERS``) لا يرسل إلى ``REPLICA_DATABASE`` إلا قراءات نماذج
+  ``REPLICA_APP_LABELS`` داخل ``use_replica`` (مزخرف أو مدير سياق). الجلسات والمستخدمون والكتابات
+  والقراءات داخل معاملة تبقى على ``default``.
+- ``pin_to_primary`` يلغي ``use_replica`` لعرض أو جزء منه، وتستخدمه الذاكرة المتدرجة (``hall_booking.cache``)
+  لحساب القيم المخزنة حين تكون النسخة متأخرة عن إصدارات وسومها.
+- بعد أول INSERT/UPDATE/DELETE في الطلب تُقرأ بقيته من الرئيسية، ويضع ``ReplicaStickinessMiddleware`` ملف
+  تعريف ارتباط يبقي طلبات المستخدم على الرئيسية ``REPLICA_STICKY_SECONDS`` ثانية فيرى ما كتبه
+  حتى لو تأخرت النسخة.
+- بدون ``replica`` في ``DATABASES`` لا يغيّر الموجه شيئاً.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_mode = ContextVar('hall_booking_replica_mode', default=None)
+# هل كتب الطلب الحالي شيئاً، وهل كتب المستخدم قبل ثوانٍ (ملف تعريف الارتباط)
+_wrote = ContextVar('hall_booking_replica_wrote', default=False)
+_sticky = ContextVar('hall_booking_replica_sticky', default=False)
+
+
+def replica_alias():
+    """اسم نسخة القراءة إن كانت معرّفة، وإلا None"""
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def use_replica():
+    """قراءات نماذج التطبيق من نسخة القراءة؛ يُستخدم كمدير سياق أو كمزخرف ``@use_replica()``"""
+    # pin_to_primary الخارجي يغلب
+    token = _mode.set('primary' if _mode.get() == 'primary' else 'replica')
+    try:
+        yield
+    finally:
+        _mode.reset(token)
+
+
+@contextmanager
+def pin_to_primary():
+    """كل القراءات من القاعدة الرئيسية ولو داخل ``use_replica``"""
+    token = _mode.set('primary')
+    try:
+        yield
+    finally:
+        _mode.reset(token)
+
+
+def reads_from_replica(model=None):
+    """هل تُقرأ بيانات النموذج الآن من نسخة القراءة"""
+    if _mode.get() != 'replica' or _wrote.get() or _sticky.get() or replica_alias() is None:
+        return False
+    if model is not None and model._meta.app_label not in getattr(settings, 'REPLICA_APP_LABELS', ['hall_booking']):
+        return False
+    # القراءة داخل معاملة على الرئيسية يجب أن ترى ما كُتب فيها
+    return not connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = replica_alias()
+        if reads_from_replica(model):
+            return replica
+        instance = hints.get('instance')
+        if replica and instance is not None and instance._state.db == replica:
+            # العلاقات المحمّلة من كائن قُرئ من النسخة تعود للرئيسية خارج use_replica
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # وإلا كُتب الكائن المقروء من النسخة إلى النسخة
+        return DEFAULT_DB_ALIAS if replica_alias() else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # النسخة تُملأ بالنسخ المتماثل (أو replica_status --sync على SQLite) لا بالترحيلات
+        if db == replica_alias():
+            return False
+        return None
+
+
+_WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def _watch_writes(execute, sql, params, many, context):
+    # db_for_write لا يصلح مؤشراً: Django يستدعيه لقراءات get_or_create و select_for_update أيضاً
+    if not _wrote.get() and sql.lstrip()[:7].upper().startswith(_WRITE_STATEMENTS):
+        _wrote.set(True)
+    return execute(sql, params, many, context)
+
+
+class ReplicaStickinessMiddleware:
+    """إبقاء طلبات المستخدم على القاعدة الرئيسية لثوانٍ بعد أن يكتب شيئاً"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if replica_alias() is None:
+            return self.get_response(request)
+        cookie = getattr(settings, 'REPLICA_STICKY_COOKIE', 'hb_primary')
+        try:
+            sticky = float(request.COOKIES.get(cookie, 0)) > time.time()
+        except ValueError:
+            sticky = False
+        sticky_token = _sticky.set(sticky)
+        wrote_token = _wrote.set(False)
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(_watch_writes):
+                response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _wrote.reset(wrote_token)
+            _sticky.reset(sticky_token)
+        if wrote:
+            seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+            response.set_cookie(cookie, f'{time.time() + seconds:.3f}', max_age=seconds, httponly=True,
+                                samesite='Lax')
+        return response
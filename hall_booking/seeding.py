@@ -0,0 +1,210 @@
+"""
+إطار مشترك لتعبئة البيانات التجريبية دفعة واحدة وبشكل قابل للتكرار.
+
+- كل صف يُعرّف بمفتاح طبيعي (مثل ``Governorate.code`` أو ``(City.name, governorate)``)
+  فإعادة التشغيل تحدّث الصفوف الموجودة بدلاً من تكرارها أو الفشل.
+- الكتابة على دفعات (``SEED_BATCH_SIZE``) وكل دفعة في معاملة واحدة.
+- إذا كان المفتاح الطبيعي قيداً فريداً في قاعدة البيانات يُستخدم
+  ``bulk_create(update_conflicts=True)``، وإلا تُجلب الصفوف الموجودة بالمفتاح
+  ويُقسم العمل إلى ``bulk_update`` و ``bulk_create``.
+
+``bulk_create`` لا يستدعي ``save()`` ولا إشارات ``post_save``؛ إبطال الذاكرة المؤقتة
+يتم عبر ``InvalidatingQuerySet`` والحقول المحسوبة في ``save()`` (مثل ``Booking.reference``)
+يجب أن يضبطها المستدعي.
+"""
+import uuid
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+# نطاق ثابت لمعرفات الصفوف التجريبية التي ليس لها مفتاح طبيعي غير المعرف نفسه (مثل الحجوزات)
+SEED_NAMESPACE = uuid.UUID('6f1c2b8e-3d4a-4f5e-9a7b-1c2d3e4f5a6b')
+
+
+def seed_uuid(*parts):
+    """معرف UUID ثابت لنفس الأجزاء في كل تشغيل"""
+    return uuid.uuid5(SEED_NAMESPACE, ':'.join(map(str, parts)))
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _has_unique_constraint(model, fields):
+    fields = set(fields)
+    opts = model._meta
+    if len(fields) == 1:
+        field = opts.get_field(next(iter(fields)))
+        if field.unique:
+            return True
+    if any(set(together) == fields for together in opts.unique_together):
+        return True
+    return any(
+        set(getattr(constraint, 'fields', ())) == fields and getattr(constraint, 'condition', None) is None
+        for constraint in opts.constraints
+    )
+
+
+def _ensure_pks(model, objs, attname):
+    """ضبط المفاتيح الأساسية بعد ``bulk_create`` في القواعد التي لا تعيدها (مثل MySQL)"""
+    missing = [obj for obj in objs if obj.pk is None]
+    if missing:
+        pks = dict(model.objects.filter(
+            **{f'{attname}__in': [getattr(obj, attname) for obj in missing]}
+        ).values_list(attname, 'pk'))
+        for obj in missing:
+            obj.pk = pks[getattr(obj, attname)]
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    """تعطيل ``auto_now`` و ``auto_now_add`` مؤقتاً لإدراج تواريخ تاريخية واقعية كما هي"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Seeder:
+    """كتابة الصفوف التجريبية على دفعات مع تقرير التقدم
+
+    ``progress`` دالة اختيارية ``(label, done, total)`` تُستدعى بعد كل دفعة.
+    """
+
+    def __init__(self, batch_size=None, progress=None):
+        self.batch_size = batch_size or getattr(settings, 'SEED_BATCH_SIZE', 500)
+        self.progress = progress
+
+    def _report(self, label, done, total):
+        if self.progress is not None:
+            self.progress(label, done, total)
+
+    def _natural_key(self, obj, unique_fields):
+        return tuple(getattr(obj, obj._meta.get_field(name).attname) for name in unique_fields)
+
+    def upsert(self, model, objs, unique_fields, update_fields=None, label=None):
+        """إدراج الكائنات أو تحديثها حسب المفتاح الطبيعي ``unique_fields``
+
+        ``update_fields`` الحقول التي تُحدّث للصفوف الموجودة؛ افتراضياً كل الحقول
+        المحلية عدا المفتاح الأساسي والمفتاح الطبيعي و ``auto_now_add``.
+        يعيد قاموساً: المفتاح الطبيعي -> الكائن المحفوظ (مع المفتاح الأساسي).
+        """
+        objs = list(objs)
+        label = label or model._meta.verbose_name_plural
+        if update_fields is None:
+            update_fields = [
+                field.name for field in model._meta.concrete_fields
+                if not field.primary_key and field.name not in unique_fields
+                and not getattr(field, 'auto_now_add', False)
+            ]
+        # حقول auto_now (مثل ``Hall.updated_at`` المستخدم في Last-Modified) تُحدّث دائماً
+        auto_now = [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        update_fields = list(update_fields) + [name for name in auto_now if name not in update_fields]
+        # آخر ظهور للمفتاح يفوز، كما لو حُفظت الصفوف واحداً تلو الآخر
+        by_key = {self._natural_key(obj, unique_fields): obj for obj in objs}
+        objs = list(by_key.values())
+        native = _has_unique_constraint(model, unique_fields)
+
+        done = 0
+        for batch in _batches(objs, self.batch_size):
+            with transaction.atomic():
+                if native:
+                    model.objects.bulk_create(
+                        batch, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields,
+                    )
+                else:
+                    self._split_upsert(model, batch, unique_fields, update_fields)
+            done += len(batch)
+            self._report(label, done, len(objs))
+        return self._fetch(model, by_key, unique_fields)
+
+    def _split_upsert(self, model, batch, unique_fields, update_fields):
+        existing = self._fetch(model, {self._natural_key(obj, unique_fields): obj for obj in batch}, unique_fields)
+        to_create, to_update = [], []
+        now = timezone.now()
+        for obj in batch:
+            current = existing.get(self._natural_key(obj, unique_fields))
+            if current is None:
+                to_create.append(obj)
+            else:
+                obj.pk = current.pk
+                for field in model._meta.concrete_fields:
+                    if getattr(field, 'auto_now', False):
+                        setattr(obj, field.attname, now)
+                to_update.append(obj)
+        if to_create:
+            model.objects.bulk_create(to_create)
+        if to_update and update_fields:
+            model.objects.bulk_update(to_update, update_fields)
+
+    def _fetch(self, model, by_key, unique_fields):
+        """الكائنات المحفوظة لمجموعة مفاتيح طبيعية (استعلام واحد لكل دفعة)"""
+        attnames = [model._meta.get_field(name).attname for name in unique_fields]
+        found = {}
+        keys = list(by_key)
+        for batch in _batches(keys, self.batch_size):
+            if len(attnames) == 1:
+                queryset = model.objects.filter(**{f'{attnames[0]}__in': [key[0] for key in batch]})
+            else:
+                values = {name: {key[i] for key in batch} for i, name in enumerate(attnames)}
+                queryset = model.objects.filter(**{f'{name}__in': value for name, value in values.items()})
+            for obj in queryset:
+                key = tuple(getattr(obj, name) for name in attnames)
+                if key in by_key:
+                    found.setdefault(key, obj)
+        return found
+
+    def insert_missing(self, model, objs, key, label=None, total=None):
+        """إدراج الكائنات التي لا يوجد مفتاحها ``key`` بعد، مع قراءة ``objs`` كتيار على دفعات
+
+        مناسبة للجداول الضخمة (ملايين الحجوزات) لأنها لا تحتفظ إلا بدفعة واحدة في الذاكرة.
+        تُرجع مولداً يعطي قائمة الكائنات المُدرجة (بمفاتيحها الأساسية) لكل دفعة.
+        """
+        label = label or model._meta.verbose_name_plural
+        attname = model._meta.get_field(key).attname
+        iterator = iter(objs)
+        done = 0
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                existing = set(model.objects.filter(
+                    **{f'{attname}__in': [getattr(obj, attname) for obj in batch]}
+                ).values_list(attname, flat=True))
+                new = [obj for obj in batch if getattr(obj, attname) not in existing]
+                if new:
+                    model.objects.bulk_create(new)
+                    _ensure_pks(model, new, attname)
+                done += len(batch)
+                self._report(label, done, total or done)
+                yield new
+
+    def create(self, model, objs, label=None):
+        """إدراج كائنات ليس لها مفتاح طبيعي (مثل رسائل التواصل) على دفعات"""
+        objs = list(objs)
+        label = label or model._meta.verbose_name_plural
+        created = []
+        for batch in _batches(objs, self.batch_size):
+            with transaction.atomic():
+                created.extend(model.objects.bulk_create(batch))
+            self._report(label, len(created), len(objs))
+        return created
+
+
+def command_seeder(command, batch_size=None):
+    """``Seeder`` يكتب التقدم إلى مخرجات أمر الإدارة"""
+    def progress(label, done, total):
+        command.stdout.write(f'{label}: {done}/{total}')
+    return Seeder(batch_size=batch_size, progress=progress)
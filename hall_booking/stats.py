@@ -0,0 +1,115 @@
+"""إحصائيات لوحة الإدارة؛ تُحسب بعدد ثابت من الاستعلامات وتُخزن عبر الذاكرة المتدرجة"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .archive import archived_counts, booking_sources
+from .cache import cached
+from .models import Category, Governorate, Hall
+
+BOOKING_STATUSES = ['pending', 'approved', 'completed', 'cancelled', 'rejected']
+
+
+@cached('stats', ttl=600, stale_ttl=300)
+def site_totals():
+    """إجمالي القاعات والحجوزات والإيرادات وتوزيع الحجوزات حسب الحالة (مع الأرشيف)"""
+    by_status = Counter()
+    total_revenue = 0
+    for bookings in booking_sources():
+        by_status.update(dict(bookings.order_by().values_list('status').annotate(count=Count('pk'))))
+        total_revenue += bookings.filter(status='completed').aggregate(total=Sum('total_price'))['total'] or 0
+    return {
+        'total_halls': Hall.objects.count(),
+        'total_bookings': sum(by_status.values()),
+        'total_revenue': total_revenue,
+        'booking_stats': {status: by_status.get(status, 0) for status in BOOKING_STATUSES},
+    }
+
+
+def _with_archived(rows, group_by):
+    """إضافة الحجوزات المؤرشفة إلى ``booking_count`` لكل صف (المفتاح ``pk`` يُحذف من النتيجة)"""
+    archived = archived_counts(group_by)
+    rows = list(rows)
+    for row in rows:
+        row['booking_count'] += archived.get(row.pop('pk'), 0)
+    return rows
+
+
+@cached('stats', ttl=600, stale_ttl=300)
+def category_stats():
+    rows = Category.objects.annotate(
+        hall_count=Count('hall', distinct=True),
+        booking_count=Count('hall__bookings')
+    ).values('pk', 'name', 'hall_count', 'booking_count')
+    return _with_archived(rows, 'hall__category')
+
+
+@cached('stats', ttl=600, stale_ttl=300)
+def governorate_stats():
+    rows = Governorate.objects.annotate(
+        hall_count=Count('hall', distinct=True),
+        booking_count=Count('hall__bookings')
+    ).values('pk', 'name', 'hall_count', 'booking_count')
+    return _with_archived(rows, 'hall__governorate')
+
+
+@cached('stats', ttl=600, stale_ttl=300)
+def top_halls(limit=10):
+    """القاعات الأكثر حجزاً"""
+    halls = Hall.objects.select_related('category').annotate(booking_count=Count('bookings'))
+    archived = archived_counts('hall')
+    if not archived:
+        return list(halls.order_by('-booking_count')[:limit])
+    counts = Counter(dict(Hall.objects.annotate(count=Count('bookings')).values_list('pk', 'count')))
+    counts.update(archived)
+    top = [pk for pk, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]]
+    by_pk = halls.in_bulk(top)
+    for pk in top:
+        by_pk[pk].booking_count = counts[pk]
+    return [by_pk[pk] for pk in top]
+
+
+def _last_months(count=12):
+    now = timezone.now()
+    return [(now - timedelta(days=30 * i)).strftime('%Y-%m') for i in range(count)][::-1]
+
+
+@cached('stats', ttl=600, stale_ttl=300)
+def monthly_bookings(months=12):
+    """عدد الحجوزات لكل شهر في آخر ``months`` شهراً (استعلام واحد لكل من الجدول الحي والأرشيف)"""
+    labels = _last_months(months)
+    since = timezone.now() - timedelta(days=31 * months)
+    counts = Counter()
+    for bookings in booking_sources(since=since):
+        rows = bookings.filter(
+            created_at__gte=since
+        ).annotate(month=TruncMonth('created_at')).order_by().values('month').annotate(count=Count('pk'))
+        counts.update({row['month'].strftime('%Y-%m'): row['count'] for row in rows})
+    return {'labels': labels, 'data': [counts.get(label, 0) for label in labels]}
+
+
+@cached('stats', ttl=600, stale_ttl=300)
+def monthly_revenue(months=12):
+    """إيرادات الحجوزات المكتملة لكل شهر في آخر ``months`` شهراً (استعلام واحد لكل من الجدول الحي والأرشيف)"""
+    labels = _last_months(months)
+    since = timezone.now() - timedelta(days=31 * months)
+    totals = Counter()
+    for bookings in booking_sources(since=since):
+        rows = bookings.filter(
+            status='completed',
+            created_at__gte=since
+        ).annotate(month=TruncMonth('created_at')).order_by().values('month').annotate(total=Sum('total_price'))
+        totals.update({row['month'].strftime('%Y-%m'): float(row['total'] or 0) for row in rows})
+    return {'labels': labels, 'data': [totals.get(label, 0.0) for label in labels]}
+
+
+@cached('stats', ttl=600, stale_ttl=300)
+def halls_per_category():
+    categories = Category.objects.annotate(hall_count=Count('hall')).values('name', 'hall_count')
+    return {
+        'labels': [cat['name'] for cat in categories],
+        'data': [cat['hall_count'] for cat in categories],
+    }
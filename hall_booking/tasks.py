@@ -0,0 +1,33 @@
+"""المهام الخلفية الخاصة بتطبيق حجز القاعات (تُكتشف تلقائياً بواسطة run_worker)"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.forms import PasswordResetForm
+
+from .jobqueue import task
+from .lifecycle import run_booking_lifecycle as run_lifecycle, send_due_reminders
+
+
+@task(name='hall_booking.send_password_reset_email')
+def send_password_reset_email(email):
+    """إرسال رابط إعادة تعيين كلمة المرور خارج دورة الطلب"""
+    form = PasswordResetForm(data={'email': email})
+    if form.is_valid():
+        form.save(
+            domain_override=getattr(settings, 'SITE_DOMAIN', 'localhost:8000'),
+            use_https=getattr(settings, 'SITE_USE_HTTPS', False),
+        )
+
+
+@task(name='hall_booking.send_booking_reminders')
+def send_booking_reminders(window_hours=None, batch_size=500):
+    """مسح دوري لإنشاء تذكيرات الحجوزات القريبة"""
+    window = timedelta(hours=window_hours) if window_hours else None
+    send_due_reminders(window=window, batch_size=batch_size)
+
+
+@task(name='hall_booking.run_booking_lifecycle')
+def run_booking_lifecycle(pending_ttl_hours=None, chunk_size=500):
+    """إكمال الحجوزات المنتهية وإلغاء الطلبات المعلقة القديمة"""
+    ttl = timedelta(hours=pending_ttl_hours) if pending_ttl_hours else None
+    run_lifecycle(pending_ttl=ttl, chunk_size=chunk_size)
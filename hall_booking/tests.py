@@ -0,0 +1,400 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from hall_booking import invalidation, stats, writelock
+from hall_booking.cache import tiered_cache
+from hall_booking.lifecycle import send_due_reminders
+from hall_booking.models import (Booking, CacheTagVersion, Category, City, Governorate, Hall, Notification,
+                                 generate_reference)
+from hall_booking.nplusone import NPlusOneError, QueryBudgetExceeded, assertMaxQueries, detect_n_plus_one
+from hall_booking.routers import use_replica
+from hall_booking.seeding import seed_uuid
+
+LOCK_ALIAS = 'hb_lock_test'
+REPLICA_ALIAS = 'hb_replica_test'
+THREADS = 4
+
+
+class SQLiteWriteContentionTests(unittest.TestCase):
+    """كتابات confirm_booking و update(is_read=True) المتزامنة على ملف SQLite حقيقي"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory(prefix='hb-lock-test-')
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'lock.sqlite3'
+
+    @contextmanager
+    def database(self, options):
+        connections.settings[LOCK_ALIAS] = connections.configure_settings({
+            'default': connections.settings['default'],
+            LOCK_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(self.path), 'OPTIONS': dict(options)},
+        })[LOCK_ALIAS]
+        try:
+            with connections[LOCK_ALIAS].cursor() as cursor:
+                cursor.execute('CREATE TABLE booking (id INTEGER PRIMARY KEY, hall_id INTEGER, start_at INTEGER, '
+                               'end_at INTEGER)')
+                cursor.execute('CREATE TABLE notification (id INTEGER PRIMARY KEY, user_id INTEGER, is_read INTEGER)')
+                # رفع إصدارات وسوم الذاكرة المؤقتة بعد كل معاملة (invalidation._bump) جزء من تكلفة الكتابة
+                cursor.execute('CREATE TABLE hall_booking_cachetagversion (tag varchar(200) PRIMARY KEY, '
+                               'version bigint NOT NULL, updated_at datetime NOT NULL)')
+            connections[LOCK_ALIAS].close()
+            yield
+        finally:
+            connections[LOCK_ALIAS].close()
+            del connections[LOCK_ALIAS]
+            del connections.settings[LOCK_ALIAS]
+
+    @staticmethod
+    def tuned_options():
+        options = settings.DATABASES['default'].get('OPTIONS', {})
+        return options if settings.DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' else {}
+
+    def contend(self, write, operation):
+        """تشغيل ``operation`` من عدة خيوط معاً، وكل خيط ينتظر البقية داخل معاملته"""
+        barrier = threading.Barrier(THREADS, timeout=0.5)
+        errors = []
+
+        def wait_for_others():
+            # مع BEGIN IMMEDIATE لا يصل الآخرون إلى هنا قبل انتهاء هذا الكاتب، فينكسر الحاجز بعد المهلة
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+
+        def worker(index):
+            try:
+                with write():
+                    operation(index, wait_for_others)
+            except OperationalError as exc:
+                errors.append(str(exc))
+            finally:
+                connections[LOCK_ALIAS].close()
+
+        workers = [threading.Thread(target=worker, args=(index,)) for index in range(THREADS)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return errors
+
+    @staticmethod
+    def confirm_booking(index, wait_for_others):
+        # مثل confirm_booking: فحص التداخل ثم الإدراج في المعاملة نفسها
+        with connections[LOCK_ALIAS].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM booking WHERE hall_id = 1 AND start_at < %s AND end_at > %s',
+                           [index * 10 + 5, index * 10])
+            free = cursor.fetchone()[0] == 0
+            wait_for_others()
+            if free:
+                cursor.execute('INSERT INTO booking (hall_id, start_at, end_at) VALUES (1, %s, %s)',
+                               [index * 10, index * 10 + 5])
+                invalidation.invalidate_tags('bookings', 'hall:1:availability', 'stats', using=LOCK_ALIAS)
+
+    @staticmethod
+    def mark_read(index, wait_for_others):
+        # مثل user_notifications: المستخدم محدد في الشروط فلا يقرأ InvalidatingQuerySet.update شيئاً قبل التحديث
+        with connections[LOCK_ALIAS].cursor() as cursor:
+            cursor.execute('UPDATE notification SET is_read = 1 WHERE user_id = %s AND is_read = 0', [index])
+            invalidation.invalidate_tags(f'user:{index}:notifications', using=LOCK_ALIAS)
+            wait_for_others()
+
+    @staticmethod
+    def tag_versions():
+        with connections[LOCK_ALIAS].cursor() as cursor:
+            cursor.execute('SELECT tag, version FROM hall_booking_cachetagversion')
+            return dict(cursor.fetchall())
+
+    def run_profile(self, options, write):
+        with self.database(options):
+            with connections[LOCK_ALIAS].cursor() as cursor:
+                cursor.executemany('INSERT INTO notification (user_id, is_read) VALUES (%s, 0)',
+                                   [(index,) for index in range(THREADS)])
+            connections[LOCK_ALIAS].close()
+            errors = self.contend(write, self.confirm_booking) + self.contend(write, self.mark_read)
+            with connections[LOCK_ALIAS].cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM booking')
+                bookings = cursor.fetchone()[0]
+                cursor.execute('SELECT COUNT(*) FROM notification WHERE is_read = 0')
+                unread = cursor.fetchone()[0]
+            versions = self.tag_versions()
+        return errors, bookings, unread, versions
+
+    @staticmethod
+    def expected_versions():
+        # رفع واحد لكل معاملة ناجحة
+        return {'bookings': THREADS, 'hall:1:availability': THREADS, 'stats': THREADS,
+                **{f'user:{index}:notifications': 1 for index in range(THREADS)}}
+
+    def test_legacy_profile_fails_under_contention(self):
+        errors, bookings, unread, versions = self.run_profile({}, lambda: transaction.atomic(using=LOCK_ALIAS))
+        self.assertTrue(errors)
+        self.assertTrue(all('locked' in error for error in errors), errors)
+        self.assertLess(bookings, THREADS)
+
+    def test_serialized_write_succeeds_under_contention(self):
+        errors, bookings, unread, versions = self.run_profile(
+            self.tuned_options(), lambda: writelock.serialized_write(LOCK_ALIAS),
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual((bookings, unread), (THREADS, 0))
+        self.assertEqual(versions, self.expected_versions())
+
+    @override_settings(SQLITE_SERIALIZE_WRITES=False)
+    def test_begin_immediate_alone_succeeds_under_contention(self):
+        errors, bookings, unread, versions = self.run_profile(
+            self.tuned_options(), lambda: writelock.serialized_write(LOCK_ALIAS),
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual((bookings, unread), (THREADS, 0))
+        self.assertEqual(versions, self.expected_versions())
+
+    def test_one_tag_bump_per_transaction(self):
+        with self.database(self.tuned_options()):
+            with CaptureQueriesContext(connections[LOCK_ALIAS]) as queries:
+                with writelock.serialized_write(LOCK_ALIAS):
+                    invalidation.invalidate_tags('bookings', 'hall:1:availability', using=LOCK_ALIAS)
+                    invalidation.invalidate_tags('bookings', 'stats', using=LOCK_ALIAS)
+            bumps = [query['sql'] for query in queries.captured_queries if 'cachetagversion' in query['sql']]
+            self.assertEqual(len(bumps), 1)
+            self.assertEqual(self.tag_versions(), {'bookings': 1, 'hall:1:availability': 1, 'stats': 1})
+
+    def test_only_serialized_writes_begin_immediate(self):
+        with self.database(self.tuned_options()):
+            connection = connections[LOCK_ALIAS]
+            with CaptureQueriesContext(connection) as queries:
+                with transaction.atomic(using=LOCK_ALIAS):
+                    connection.cursor().execute('SELECT COUNT(*) FROM booking')
+                with writelock.serialized_write(LOCK_ALIAS):
+                    connection.cursor().execute('SELECT COUNT(*) FROM booking')
+                    # داخل معاملة قائمة لا تضيف SAVEPOINT (ميزانية استعلامات confirm_booking)
+                    with writelock.serialized_write(LOCK_ALIAS):
+                        connection.cursor().execute('SELECT COUNT(*) FROM booking')
+            begins = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('BEGIN')]
+            self.assertEqual(begins, ['BEGIN', 'BEGIN IMMEDIATE'])
+            self.assertFalse(any('SAVEPOINT' in query['sql'] for query in queries.captured_queries))
+            self.assertIsNone(connection.transaction_mode)
+
+
+class NPlusOneTests(TestCase):
+    """كشف التحميل الكسول المتكرر وميزانيات عدد الاستعلامات"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            governorate = Governorate.objects.create(name=f'محافظة {index}', name_en=f'Gov {index}',
+                                                     code=f'G{index}', region='delta')
+            City.objects.create(name=f'مدينة {index}', name_en=f'City {index}', governorate=governorate)
+
+    def test_repeated_lazy_load_raises(self):
+        with self.assertRaisesRegex(NPlusOneError, r'hall_booking\.City\.governorate loaded lazily 3 times'):
+            with detect_n_plus_one(threshold=3):
+                [city.governorate.name for city in City.objects.all()]
+
+    def test_select_related_passes(self):
+        with detect_n_plus_one(threshold=3) as tracker:
+            [city.governorate.name for city in City.objects.select_related('governorate')]
+        self.assertEqual(tracker.offenders(), [])
+
+    def test_log_mode_reports_offenders(self):
+        with self.assertLogs('hall_booking.nplusone', 'WARNING') as logs:
+            with detect_n_plus_one(threshold=3, mode='log') as tracker:
+                [city.governorate.name for city in City.objects.all()]
+        self.assertEqual(len(tracker.offenders()), 1)
+        self.assertIn('select_related', logs.output[0])
+
+    def test_query_budget(self):
+        with assertMaxQueries(1) as captured:
+            list(City.objects.select_related('governorate'))
+        self.assertEqual(len(captured.captured_queries), 1)
+
+        with self.assertRaisesRegex(QueryBudgetExceeded, r'4 queries executed, budget is 2\n  3x '):
+            with assertMaxQueries(2):
+                [city.governorate.name for city in City.objects.all()]
+
+
+def create_hall():
+    governorate = Governorate.objects.create(name='القاهرة', name_en='Cairo', code='C', region='cairo')
+    city = City.objects.create(name='مدينة نصر', name_en='Nasr City', governorate=governorate)
+    return Hall.objects.create(
+        name='قاعة النيل', category=Category.objects.create(name='أفراح', description=''),
+        governorate=governorate, city=city, address='شارع عباس العقاد', description='', capacity=200,
+        price_per_hour=500, image='halls/nile.jpg',
+    )
+
+
+def create_booking(hall, user=None, hours=3):
+    start = timezone.now() + timedelta(hours=hours)
+    return Booking.objects.create(
+        hall=hall, user=user, customer_name='عميل', customer_email='guest@example.com',
+        customer_phone='01000000000', event_title='حفل', event_description='', start_datetime=start,
+        end_datetime=start + timedelta(hours=2), attendees_count=50, total_price=1000, status='approved',
+    )
+
+
+class BookingReminderTests(TestCase):
+    """تذكيرات الحجوزات القريبة لأصحاب الحسابات وحجوزات الضيوف"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = create_hall()
+        cls.user = User.objects.create_user('reminded', 'reminded@example.com')
+
+    def test_guest_bookings_are_marked_but_not_counted_as_sent(self):
+        reminded, guest = create_booking(self.hall, self.user, 3), create_booking(self.hall, None, 5)
+        create_booking(self.hall, self.user, 48)
+
+        self.assertEqual(send_due_reminders(batch_size=1), {'sent': 1, 'guests': 1})
+        reminders = Notification.objects.filter(notification_type='booking_reminder')
+        self.assertEqual(list(reminders.values_list('booking_id', flat=True)), [reminded.pk])
+        self.assertEqual(Booking.objects.filter(reminder_sent_at__isnull=False).count(), 2)
+        guest.refresh_from_db()
+        self.assertIsNotNone(guest.reminder_sent_at)
+        self.assertEqual(send_due_reminders(), {'sent': 0, 'guests': 0})
+
+
+class CacheInvalidationTests(TestCase):
+    """إبطال الوسوم في التحديثات الجماعية"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('notified', 'notified@example.com')
+        Notification.objects.bulk_create([
+            Notification(user=cls.user, notification_type='booking_reminder', title='تذكير', message='')
+            for _ in range(2)
+        ])
+
+    def version(self, tag):
+        return CacheTagVersion.objects.filter(tag=tag).values_list('version', flat=True).first() or 0
+
+    def test_update_filtered_by_scope_skips_distinct_select(self):
+        tag = f'user:{self.user.pk}:notifications'
+        before = self.version(tag)
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            with CaptureQueriesContext(connections['default']) as queries:
+                Notification.objects.filter(user=self.user, is_read=False).update(is_read=True)
+                Notification.objects.filter(user=self.user).update(title='تذكير بالموعد')
+        self.assertEqual([query['sql'].split()[0] for query in queries.captured_queries], ['UPDATE', 'UPDATE'])
+        # رفع واحد للتحديثين عند نجاح المعاملة
+        self.assertEqual(self.version(tag), before + 1)
+
+    def test_update_without_scope_filter_reads_affected_scopes(self):
+        tag = f'user:{self.user.pk}:notifications'
+        before = self.version(tag)
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.filter(is_read=False).update(is_read=True)
+        self.assertEqual(self.version(tag), before + 1)
+
+
+class BookingReferenceTests(TestCase):
+    """الأرقام المرجعية القصيرة للحجوزات"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = create_hall()
+
+    def test_seeded_reference_skips_fixed_uuid_bits(self):
+        references = {generate_reference(seed_uuid('reference-test', index)) for index in range(2000)}
+        self.assertEqual(len(references), 2000)
+        # نصف البايت السابع (الإصدار 5) ثابت في كل المعرّفات فيظهر لو دخل الرقم
+        self.assertGreater(len({reference[10:12] for reference in references}), 2)
+        self.assertEqual(generate_reference(seed_uuid('reference-test', 1)),
+                         generate_reference(seed_uuid('reference-test', 1)))
+
+    def test_save_retries_on_reference_collision(self):
+        taken = create_booking(self.hall, hours=3).reference
+        with mock.patch('hall_booking.models.generate_reference', side_effect=[taken, 'FRESHREF2345']):
+            booking = create_booking(self.hall, hours=6)
+        self.assertEqual(booking.reference, 'FRESHREF2345')
+        # المعاملة المحيطة بقيت صالحة بعد الإدراج المرفوض
+        self.assertEqual(Booking.objects.filter(reference__in=[taken, 'FRESHREF2345']).count(), 2)
+
+    def test_save_gives_up_after_repeated_collisions(self):
+        taken = create_booking(self.hall, hours=3).reference
+        with mock.patch('hall_booking.models.generate_reference', return_value=taken):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                create_booking(self.hall, hours=6)
+
+
+@unittest.skipUnless(settings.DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3',
+                     'the replica is synced with the SQLite backup API')
+@override_settings(REPLICA_DATABASE=REPLICA_ALIAS,
+                   CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReplicaCachedStatsTests(TransactionTestCase):
+    """إحصائيات الإدارة المخزنة تُحسب من نسخة القراءة ما لم تتأخر عن آخر إبطال"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # النسخة ملف SQLite مؤقت يُملأ بنسخة احتياطية من الرئيسية (مثل replica_status --sync)؛
+        # يُعرَّف بعد إعداد الفئة لأن مشغل الاختبارات لا يعرفه
+        cls.directory = tempfile.TemporaryDirectory(prefix='hb-replica-test-')
+        connections.settings[REPLICA_ALIAS] = connections.configure_settings({
+            'default': connections.settings['default'],
+            REPLICA_ALIAS: {'ENGINE': 'django.db.backends.sqlite3',
+                            'NAME': str(Path(cls.directory.name) / 'replica.sqlite3')},
+        })[REPLICA_ALIAS]
+        cls.databases = {*cls.databases, REPLICA_ALIAS}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+        del cls.databases
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        # الجداول تُفرَّغ بين الاختبارات فتعود الإصدارات إلى الصفر؛ مدخلات الاختبار السابق يجب ألا تُقرأ
+        tiered_cache.l1.clear()
+        tiered_cache.l2.clear()
+        invalidation._local_versions.clear()
+        Category.objects.create(name='أفراح', description='')
+
+    @staticmethod
+    def sync_replica():
+        # مثل replica_status --sync
+        connections[REPLICA_ALIAS].close()
+        target = sqlite3.connect(connections.settings[REPLICA_ALIAS]['NAME'])
+        try:
+            connections['default'].ensure_connection()
+            connections['default'].connection.backup(target)
+        finally:
+            target.close()
+
+    def category_stats(self):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica, use_replica():
+            rows = stats.category_stats()
+        reports = lambda queries: [q['sql'] for q in queries if 'FROM "hall_booking_category"' in q['sql']]
+        return [row['name'] for row in rows], reports(primary.captured_queries), reports(replica.captured_queries)
+
+    def test_report_query_hits_replica(self):
+        self.sync_replica()
+        names, primary, replica = self.category_stats()
+        self.assertEqual(names, ['أفراح'])
+        self.assertEqual(primary, [])
+        self.assertEqual(len(replica), 1)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.sync_replica()
+        self.category_stats()
+        # الإضافة ترفع إصدار stats على الرئيسية فقط، والنسخة لم تُنسخ بعدها
+        Category.objects.create(name='مؤتمرات', description='')
+        names, primary, replica = self.category_stats()
+        self.assertEqual(sorted(names), ['أفراح', 'مؤتمرات'])
+        self.assertEqual(len(primary), 1)
+        self.assertEqual(replica, [])
@@ -13,6 +13,8 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     path('api/check-availability/', views.check_availability, name='check_availability'),
     path('api/get-cities/', views.get_cities_by_governorate, name='get_cities_by_governorate'),
+    path('api/geo/<str:digest>.json', views.geo_bundle, name='geo_bundle'),
+    path('metrics', views.metrics_endpoint, name='metrics'),
     
 
     # مسارات مديري القاعات
@@ -24,6 +26,7 @@ urlpatterns = [
     # مسارات الحجز الجديد بـ 6 خطوات
     path('booking/<int:hall_id>/step1/', views.booking_step1_date, name='booking_step1_date'),
     path('booking/<int:hall_id>/step2/', views.booking_step2_time, name='booking_step2_time'),
+    path('booking/<int:hall_id>/hold/', views.hold_time_slot, name='hold_time_slot'),
     path('booking/<int:hall_id>/step3/', views.booking_step3_services, name='booking_step3_services'),
     path('booking/<int:hall_id>/step4/', views.booking_step4_meals, name='booking_step4_meals'),
     path('booking/<int:hall_id>/step5/', views.booking_step5_info, name='booking_step5_info'),
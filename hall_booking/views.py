@@ -1,16 +1,30 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.conf import settings
+from django.db import IntegrityError
 from django.db.models import Q, Count, Sum, Avg
 from datetime import datetime, timedelta
-from .models import (Hall, Booking, Category, Governorate, City, HallService, 
+from .models import (Hall, Booking, Category, City, HallService, 
                     HallMeal, BookingService, BookingMeal, HallManager, HallImage, 
-                    Contact, Notification)
+                    Contact, Notification, BookingStatusEvent)
 from .forms import BookingForm, ContactForm, HallForm
+from .archive import booking_sources
+from .availability import busy_slots, hold_slot, is_slot_available, release_holds, wizard_token
+from . import catalogue
+from .pagecache import cache_anonymous_page
+from .api import compress_response, json_endpoint
+from .geo import bundle_url, geo_table
+from .jobqueue import enqueue
+from .pgfeatures import is_overlap_violation, search_halls
+from .routers import use_replica
+from .writelock import serialized_write
+from .metrics import booking_conflicts, booking_funnel, registry as metrics_registry
+from .tasks import send_password_reset_email
 from django.contrib.auth.models import User
 import calendar
 import json
@@ -33,10 +47,11 @@ def get_user_managed_hall(user):
     except HallManager.DoesNotExist:
         return None
 
+@cache_anonymous_page(tags=['halls', 'catalogue', 'stats'], last_modified=catalogue.halls_last_modified)
 def home(request):
     """الصفحة الرئيسية"""
-    categories = Category.objects.all()
-    featured_halls = Hall.objects.filter(status='available').prefetch_related('images')[:6]
+    categories = catalogue.categories()
+    featured_halls = catalogue.featured_halls()
     recent_bookings = Booking.objects.filter(status='approved').order_by('-created_at')[:3]
     
     context = {
@@ -46,6 +61,11 @@ def home(request):
     }
     return render(request, 'hall_booking/home.html', context)
 
+@cache_anonymous_page(
+    tags=['halls', 'catalogue'],
+    params=['category', 'governorate', 'city', 'capacity', 'search'],
+    last_modified=catalogue.halls_last_modified,
+)
 def halls_list(request):
     """قائمة القاعات"""
     category_id = request.GET.get('category')
@@ -79,22 +99,23 @@ def halls_list(request):
             halls = halls.filter(capacity__gte=201)
 
     if search_query:
-        halls = halls.filter(
+        halls = search_halls(halls, search_query, (
             Q(name__icontains=search_query) |
             Q(description__icontains=search_query) |
             Q(category__name__icontains=search_query) |
             Q(governorate__name__icontains=search_query) |
             Q(city__name__icontains=search_query) |
             Q(address__icontains=search_query)
-        )
+        ))
 
-    categories = Category.objects.all()
-    governorates = Governorate.objects.all().order_by('name')
+    categories = catalogue.categories()
+    geo = geo_table()
+    governorates = geo.governorates
 
     # المدن تظهر فقط إذا تم اختيار محافظة
     cities = []
     if governorate_id:
-        cities = City.objects.filter(governorate_id=governorate_id).order_by('name')
+        cities = geo.cities_for(governorate_id)
 
     context = {
         'halls': halls,
@@ -106,20 +127,51 @@ def halls_list(request):
         'selected_city': city_id,
         'selected_capacity': capacity,
         'search_query': search_query,
+        'geo_bundle_url': bundle_url(),
     }
     return render(request, 'hall_booking/halls_list.html', context)
 
+@json_endpoint(tags=['catalogue'], max_age=300, public=True)
 def get_cities_by_governorate(request):
     """الحصول على المدن حسب المحافظة (AJAX)"""
     governorate_id = request.GET.get('governorate_id')
     cities = []
 
     if governorate_id:
-        cities_queryset = City.objects.filter(governorate_id=governorate_id).order_by('name')
-        cities = [{'id': city.id, 'name': city.name} for city in cities_queryset]
+        cities = [{'id': city['id'], 'name': city['name']} for city in geo_table().cities_for(governorate_id)]
 
     return JsonResponse({'cities': cities})
 
+def geo_bundle(request, digest):
+    """حزمة المحافظات والمدن المعنونة ببصمة المحتوى (تخزين دائم في المتصفح)"""
+    table = geo_table()
+    if digest != table.digest:
+        # بصمة قديمة: توجيه إلى الحزمة الحالية دون تخزين التوجيه
+        response = redirect('hall_booking:geo_bundle', digest=table.digest)
+        response['Cache-Control'] = 'no-cache'
+        return response
+    response = HttpResponse(table.content, content_type='application/json; charset=utf-8')
+    response['ETag'] = f'"{table.digest}"'
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return compress_response(request, response)
+
+def metrics_endpoint(request):
+    """مقاييس التطبيق بصيغة Prometheus النصية (رمز ``METRICS_TOKEN`` أو الموظفون في غيابه)"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        allowed = constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    else:
+        allowed = settings.DEBUG or request.user.is_staff
+    if not allowed:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    response = HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    response['Cache-Control'] = 'no-store'
+    return response
+
+@cache_anonymous_page(
+    tags=lambda request, hall_id: [f'hall:{hall_id}', 'halls', 'catalogue'],
+    last_modified=catalogue.hall_last_modified,
+)
 def hall_detail(request, hall_id):
     """تفاصيل القاعة"""
     hall = get_object_or_404(Hall, id=hall_id, status='available')
@@ -130,13 +182,7 @@ def hall_detail(request, hall_id):
     hall_images = hall.images.all().order_by('order', '-uploaded_at')
 
     # القاعات المشابهة (نفس الفئة أو نفس المحافظة)
-    similar_halls = Hall.objects.filter(
-        status='available'
-    ).exclude(
-        id=hall.id
-    ).filter(
-        Q(category=hall.category) | Q(governorate=hall.governorate)
-    ).select_related('category', 'governorate', 'city').prefetch_related('images')[:6]
+    similar_halls = catalogue.similar_halls(hall.id, hall.category_id, hall.governorate_id)
 
     # التحقق من التواريخ المتاحة
     if request.method == 'POST':
@@ -252,15 +298,8 @@ def check_availability(request):
             start_dt = datetime.fromisoformat(start_datetime.replace('Z', '+00:00'))
             end_dt = datetime.fromisoformat(end_datetime.replace('Z', '+00:00'))
             
-            # التحقق من وجود حجوزات متداخلة
-            conflicting_bookings = Booking.objects.filter(
-                hall=hall,
-                status__in=['approved', 'pending'],
-                start_datetime__lt=end_dt,
-                end_datetime__gt=start_dt
-            )
-            
-            is_available = not conflicting_bookings.exists()
+            # التحقق من وجود حجوزات أو حجوزات مؤقتة متداخلة
+            is_available = is_slot_available(hall.id, start_dt, end_dt, wizard_token(request))
             
             return JsonResponse({
                 'available': is_available,
@@ -274,6 +313,7 @@ def check_availability(request):
     
     return JsonResponse({'error': 'طريقة طلب غير صحيحة'})
 
+@json_endpoint(tags=['bookings'])
 def admin_bookings_calendar(request):
     """Return JSON data for calendar events"""
     if not request.user.is_staff:
@@ -413,9 +453,15 @@ def admin_add_booking(request):
         if form.is_valid():
             booking = form.save(commit=False)
             booking.created_by = request.user
-            booking.save()
-            messages.success(request, 'تم إضافة الحجز بنجاح')
-            return redirect('hall_booking:admin_booking_detail', booking_id=booking.id)
+            try:
+                booking.save()
+            except IntegrityError as e:
+                if not is_overlap_violation(e):
+                    raise
+                form.add_error(None, 'القاعة محجوزة في هذا الوقت')
+            else:
+                messages.success(request, 'تم إضافة الحجز بنجاح')
+                return redirect('hall_booking:admin_booking_detail', booking_id=booking.id)
     else:
         form = BookingForm()
     
@@ -519,7 +565,7 @@ def admin_booking_detail(request, booking_id):
     if request.method == 'POST':
         new_status = request.POST.get('status')
         if new_status in ['pending', 'approved', 'completed', 'cancelled']:
-            booking.status = new_status
+            booking.change_status(new_status, actor=request.user)
             booking.save()
             messages.success(request, 'تم تحديث حالة الحجز بنجاح')
             return redirect('hall_booking:admin_bookings_list')
@@ -603,6 +649,7 @@ def admin_contact_delete(request, contact_id):
 # التقارير
 @login_required
 @user_passes_test(is_admin)
+@use_replica()
 def admin_reports(request):
     """صفحة التقارير والإحصائيات"""
     # إحصائيات عامة
@@ -819,7 +866,12 @@ def auth_forgot_password(request):
     if request.method == 'POST':
         email = request.POST.get('email')
         if email:
-            # Here you can add password reset logic
+            # إرسال البريد عبر طابور المهام الخلفية بدلاً من دورة الطلب
+            enqueue(
+                send_password_reset_email,
+                {'email': email},
+                dedup_key=f'password-reset:{email.strip().lower()}',
+            )
             messages.success(request, 'تم إرسال رابط إعادة تعيين كلمة المرور إلى بريدك الإلكتروني')
             return redirect('hall_booking:auth_login_step1')
         else:
@@ -1069,7 +1121,7 @@ def hall_manager_booking_detail(request, booking_id):
         admin_notes = request.POST.get('admin_notes', '')
 
         if new_status in ['pending', 'approved', 'completed', 'cancelled']:
-            booking.status = new_status
+            booking.change_status(new_status, actor=request.user)
             if admin_notes:
                 booking.admin_notes = admin_notes
             booking.save()
@@ -1425,7 +1477,7 @@ def user_profile(request):
     user = request.user
 
     # جلب حجوزات المستخدم
-    bookings = Booking.objects.filter(user=user).order_by('-created_at')
+    bookings = Booking.objects.filter(user=user).select_related('hall').order_by('-created_at')
 
     # جلب الإشعارات
     notifications = Notification.objects.filter(user=user).order_by('-created_at')
@@ -1470,7 +1522,7 @@ def user_bookings(request):
     status_filter = request.GET.get('status', 'all')
 
     # جلب الحجوزات
-    bookings = Booking.objects.filter(user=user).order_by('-created_at')
+    bookings = Booking.objects.filter(user=user).select_related('hall').order_by('-created_at')
 
     # تطبيق فلتر الحالة
     if status_filter != 'all':
@@ -1509,7 +1561,7 @@ def cancel_booking(request, booking_id):
         return redirect('booking_detail_user', booking_id=booking_id)
 
     if request.method == 'POST':
-        booking.status = 'cancelled'
+        booking.change_status('cancelled', actor=request.user)
         booking.save()
         messages.success(request, 'تم إلغاء الحجز بنجاح.')
         return redirect('user_profile')
@@ -1543,7 +1595,7 @@ def user_notifications(request):
     user = request.user
 
     # جلب الإشعارات
-    notifications = Notification.objects.filter(user=user).order_by('-created_at')
+    notifications = Notification.objects.filter(user=user).select_related('booking__hall').order_by('-created_at')
 
     # تقسيم الصفحات
     paginator = Paginator(notifications, 15)
@@ -1552,7 +1604,8 @@ def user_notifications(request):
 
     # تحديد الإشعارات كمقروءة عند عرضها
     unread_notifications = notifications.filter(is_read=False)
-    unread_notifications.update(is_read=True)
+    with serialized_write():
+        unread_notifications.update(is_read=True)
 
     context = {
         'page_obj': page_obj,
@@ -1572,6 +1625,7 @@ def mark_notification_read(request, notification_id):
     return redirect('user_notifications')
 
 @login_required
+@json_endpoint(tags=lambda request: [f'user:{request.user.pk}:notifications'])
 def get_unread_notifications_count(request):
     """الحصول على عدد الإشعارات غير المقروءة"""
     count = Notification.objects.filter(user=request.user, is_read=False).count()
@@ -1586,6 +1640,7 @@ def booking_step1_date(request, hall_id):
     context = {
         'hall': hall,
     }
+    booking_funnel.inc(step='step1')
     return render(request, 'hall_booking/booking/step1_date.html', context)
 
 def booking_step2_time(request, hall_id):
@@ -1603,16 +1658,10 @@ def booking_step2_time(request, hall_id):
         try:
             from datetime import datetime
             date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-            bookings = Booking.objects.filter(
-                hall=hall,
-                start_datetime__date=date_obj,
-                status__in=['approved', 'pending']
-            ).order_by('start_datetime')
-            
-            for booking in bookings:
+            for start, end in busy_slots(hall, date_obj, wizard_token(request)):
                 booked_slots.append({
-                    'start': booking.start_datetime.strftime('%H:%M'),
-                    'end': booking.end_datetime.strftime('%H:%M')
+                    'start': start.strftime('%H:%M'),
+                    'end': end.strftime('%H:%M')
                 })
         except ValueError:
             pass
@@ -1630,8 +1679,32 @@ def booking_step2_time(request, hall_id):
         'booked_slots': booked_slots,
         'available_times': available_times,
     }
+    booking_funnel.inc(step='step2')
     return render(request, 'hall_booking/booking/step2_time.html', context)
 
+def hold_time_slot(request, hall_id):
+    """حجز الفترة المختارة مؤقتاً للجلسة حتى إكمال خطوات الحجز"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'طريقة طلب غير صحيحة'})
+    
+    hall = get_object_or_404(Hall, id=hall_id, status='available')
+    try:
+        data = json.loads(request.body)
+        start_datetime = timezone.make_aware(datetime.strptime(f"{data['date']} {data['start_time']}", "%Y-%m-%d %H:%M"))
+        end_datetime = timezone.make_aware(datetime.strptime(f"{data['date']} {data['end_time']}", "%Y-%m-%d %H:%M"))
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'message': 'بيانات غير مكتملة'})
+    
+    if end_datetime <= start_datetime:
+        return JsonResponse({'success': False, 'message': 'وقت النهاية يجب أن يكون بعد وقت البداية'})
+    
+    hold = hold_slot(hall, start_datetime, end_datetime, wizard_token(request, create=True))
+    if hold is None:
+        booking_conflicts.inc(stage='hold')
+        return JsonResponse({'success': False, 'message': 'القاعة محجوزة في هذا الوقت'})
+    
+    return JsonResponse({'success': True, 'expires_at': hold.expires_at.isoformat()})
+
 def booking_step3_services(request, hall_id):
     """الخطوة الثالثة: اختيار الخدمات"""
     hall = get_object_or_404(Hall, id=hall_id, status='available')
@@ -1641,6 +1714,7 @@ def booking_step3_services(request, hall_id):
         'hall': hall,
         'hall_services': hall_services,
     }
+    booking_funnel.inc(step='step3')
     return render(request, 'hall_booking/booking/step3_services.html', context)
 
 def booking_step4_meals(request, hall_id):
@@ -1652,6 +1726,7 @@ def booking_step4_meals(request, hall_id):
         'hall': hall,
         'hall_meals': hall_meals,
     }
+    booking_funnel.inc(step='step4')
     return render(request, 'hall_booking/booking/step4_meals.html', context)
 
 def booking_step5_info(request, hall_id):
@@ -1661,6 +1736,7 @@ def booking_step5_info(request, hall_id):
     context = {
         'hall': hall,
     }
+    booking_funnel.inc(step='step5')
     return render(request, 'hall_booking/booking/step5_info.html', context)
 
 def booking_step6_review(request, hall_id):
@@ -1674,6 +1750,7 @@ def booking_step6_review(request, hall_id):
         'hall_services': hall_services,
         'hall_meals': hall_meals,
     }
+    booking_funnel.inc(step='step6')
     return render(request, 'hall_booking/booking/step6_review.html', context)
 
 @csrf_exempt
@@ -1706,82 +1783,83 @@ def confirm_booking(request, hall_id):
         start_datetime = datetime.strptime(f"{date_str} {start_time_str}", "%Y-%m-%d %H:%M")
         end_datetime = datetime.strptime(f"{date_str} {end_time_str}", "%Y-%m-%d %H:%M")
         
-        # التحقق من عدم تداخل الحجوزات
-        conflicting_bookings = Booking.objects.filter(
-            hall=hall,
-            status__in=['approved', 'pending'],
-            start_datetime__lt=end_datetime,
-            end_datetime__gt=start_datetime
-        )
+        # الفحص والإنشاء في معاملة كتابة واحدة (IMMEDIATE على SQLite) فلا يتسلل حجز متداخل بينهما
+        with serialized_write():
+            # التحقق من عدم تداخل الحجوزات (الحجز المؤقت لنفس المعالج لا يُعد تعارضاً)
+            owner = wizard_token(request)
+            if not is_slot_available(hall.id, start_datetime, end_datetime, owner):
+                booking_conflicts.inc(stage='confirm')
+                return JsonResponse({'success': False, 'message': 'القاعة محجوزة في هذا الوقت'})
         
-        if conflicting_bookings.exists():
-            return JsonResponse({'success': False, 'message': 'القاعة محجوزة في هذا الوقت'})
+            # حساب السعر الإجمالي
+            duration_hours = (end_datetime - start_datetime).total_seconds() / 3600
+            hall_cost = float(hall.price_per_hour) * duration_hours
         
-        # حساب السعر الإجمالي
-        duration_hours = (end_datetime - start_datetime).total_seconds() / 3600
-        hall_cost = float(hall.price_per_hour) * duration_hours
+            services_cost = 0
+            for service_data in selected_services:
+                try:
+                    service = HallService.objects.get(id=service_data['id'], hall=hall, is_available=True)
+                    services_cost += float(service.price) * service_data['quantity']
+                except HallService.DoesNotExist:
+                    continue
         
-        services_cost = 0
-        for service_data in selected_services:
-            try:
-                service = HallService.objects.get(id=service_data['id'], hall=hall, is_available=True)
-                services_cost += float(service.price) * service_data['quantity']
-            except HallService.DoesNotExist:
-                continue
+            meals_cost = 0
+            for meal_data in selected_meals:
+                try:
+                    meal = HallMeal.objects.get(id=meal_data['id'], hall=hall, is_available=True)
+                    meals_cost += float(meal.price_per_person) * meal_data['quantity']
+                except HallMeal.DoesNotExist:
+                    continue
         
-        meals_cost = 0
-        for meal_data in selected_meals:
-            try:
-                meal = HallMeal.objects.get(id=meal_data['id'], hall=hall, is_available=True)
-                meals_cost += float(meal.price_per_person) * meal_data['quantity']
-            except HallMeal.DoesNotExist:
-                continue
+            total_price = hall_cost + services_cost + meals_cost
         
-        total_price = hall_cost + services_cost + meals_cost
+            # إنشاء الحجز
+            booking = Booking.objects.create(
+                hall=hall,
+                user=request.user if request.user.is_authenticated else None,
+                customer_name=customer_info['customer_name'],
+                customer_email=customer_info['customer_email'],
+                customer_phone=customer_info['customer_phone'],
+                event_title=customer_info['event_title'],
+                event_description=customer_info.get('event_description', ''),
+                start_datetime=start_datetime,
+                end_datetime=end_datetime,
+                attendees_count=int(customer_info['attendees_count']),
+                total_price=total_price,
+                status='pending'
+            )
         
-        # إنشاء الحجز
-        booking = Booking.objects.create(
-            hall=hall,
-            user=request.user if request.user.is_authenticated else None,
-            customer_name=customer_info['customer_name'],
-            customer_email=customer_info['customer_email'],
-            customer_phone=customer_info['customer_phone'],
-            event_title=customer_info['event_title'],
-            event_description=customer_info.get('event_description', ''),
-            start_datetime=start_datetime,
-            end_datetime=end_datetime,
-            attendees_count=int(customer_info['attendees_count']),
-            total_price=total_price,
-            status='pending'
-        )
+            # إضافة الخدمات المختارة
+            for service_data in selected_services:
+                try:
+                    service = HallService.objects.get(id=service_data['id'], hall=hall, is_available=True)
+                    BookingService.objects.create(
+                        booking=booking,
+                        service=service,
+                        quantity=service_data['quantity'],
+                        price=service.price
+                    )
+                except HallService.DoesNotExist:
+                    continue
         
-        # إضافة الخدمات المختارة
-        for service_data in selected_services:
-            try:
-                service = HallService.objects.get(id=service_data['id'], hall=hall, is_available=True)
-                BookingService.objects.create(
-                    booking=booking,
-                    service=service,
-                    quantity=service_data['quantity'],
-                    price=service.price
-                )
-            except HallService.DoesNotExist:
-                continue
+            # إضافة الوجبات المختارة
+            for meal_data in selected_meals:
+                try:
+                    meal = HallMeal.objects.get(id=meal_data['id'], hall=hall, is_available=True)
+                    serving_time = datetime.strptime(meal_data['serving_time'], '%H:%M').time()
+                    BookingMeal.objects.create(
+                        booking=booking,
+                        meal=meal,
+                        quantity=meal_data['quantity'],
+                        price_per_person=meal.price_per_person,
+                        serving_time=serving_time
+                    )
+                except (HallMeal.DoesNotExist, ValueError):
+                    continue
         
-        # إضافة الوجبات المختارة
-        for meal_data in selected_meals:
-            try:
-                meal = HallMeal.objects.get(id=meal_data['id'], hall=hall, is_available=True)
-                serving_time = datetime.strptime(meal_data['serving_time'], '%H:%M').time()
-                BookingMeal.objects.create(
-                    booking=booking,
-                    meal=meal,
-                    quantity=meal_data['quantity'],
-                    price_per_person=meal.price_per_person,
-                    serving_time=serving_time
-                )
-            except (HallMeal.DoesNotExist, ValueError):
-                continue
+            # الحجز الفعلي يحل محل الحجز المؤقت
+            release_holds(owner, hall=hall)
+        booking_funnel.inc(step='confirmed')
         
         return JsonResponse({
             'success': True,
@@ -1789,6 +1867,12 @@ def confirm_booking(request, hall_id):
             'redirect_url': f'/booking/success/{booking.booking_id}/'
         })
         
+    except IntegrityError as e:
+        # على PostgreSQL يرفض قيد منع التداخل حجزاً متزامناً تجاوز الفحص أعلاه
+        if is_overlap_violation(e):
+            booking_conflicts.inc(stage='confirm')
+            return JsonResponse({'success': False, 'message': 'القاعة محجوزة في هذا الوقت'})
+        return JsonResponse({'success': False, 'message': f'حدث خطأ: {str(e)}'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': f'حدث خطأ: {str(e)}'})
 
@@ -1814,16 +1898,21 @@ def hall_manager_dashboard(request):
         # إذا كان المستخدم admin
         halls = Hall.objects.all()
     
-    # إضافة الإحصائيات لكل قاعة
-    halls_with_stats = []
-    for hall in halls:
-        hall_stats = {
+    # إضافة الإحصائيات لكل قاعة في استعلام واحد بدلاً من ثلاثة لكل قاعة
+    halls = halls.select_related('city', 'governorate').annotate(
+        total_bookings=Count('bookings'),
+        pending_bookings=Count('bookings', filter=Q(bookings__status='pending')),
+        approved_bookings=Count('bookings', filter=Q(bookings__status='approved')),
+    )
+    halls_with_stats = [
+        {
             'hall': hall,
-            'total_bookings': hall.bookings.count(),
-            'pending_bookings': hall.bookings.filter(status='pending').count(),
-            'approved_bookings': hall.bookings.filter(status='approved').count(),
+            'total_bookings': hall.total_bookings,
+            'pending_bookings': hall.pending_bookings,
+            'approved_bookings': hall.approved_bookings,
         }
-        halls_with_stats.append(hall_stats)
+        for hall in halls
+    ]
     
     context = {
         'halls_with_stats': halls_with_stats,
@@ -1873,6 +1962,13 @@ def hall_management(request, hall_id):
     }
     return render(request, 'hall_booking/manager/hall_management.html', context)
 
+def _group_bookings_by_day(bookings):
+    """تجميع الحجوزات حسب يوم البداية بالتوقيت المحلي (نفس معنى ``start_datetime__date``)"""
+    grouped = {}
+    for booking in bookings:
+        grouped.setdefault(timezone.localtime(booking.start_datetime).date(), []).append(booking)
+    return grouped
+
 @login_required
 @user_passes_test(lambda u: u.is_staff or hasattr(u, 'hall_manager'))
 def hall_schedule_management(request, hall_id):
@@ -1908,10 +2004,11 @@ def hall_schedule_management(request, hall_id):
     
     if view_type == 'day':
         # عرض اليوم الواحد
-        bookings = Booking.objects.filter(
+        # حجوزات اليوم في استعلام واحد، ثم تُطابق الفترات في الذاكرة بدلاً من استعلامين لكل فترة
+        bookings = list(Booking.objects.filter(
             hall=hall,
             start_datetime__date=selected_date
-        ).order_by('start_datetime')
+        ).order_by('start_datetime'))
         
         # إنشاء جدول زمني (من 8 صباحاً إلى 11 مساءً)
         time_slots = []
@@ -1920,19 +2017,15 @@ def hall_schedule_management(request, hall_id):
                 time_str = f"{hour:02d}:{minute:02d}"
                 
                 # التحقق من وجود حجز في هذا الوقت
-                slot_datetime = datetime.combine(selected_date, datetime.strptime(time_str, '%H:%M').time())
-                is_booked = bookings.filter(
-                    start_datetime__lte=slot_datetime,
-                    end_datetime__gt=slot_datetime
-                ).exists()
-                
-                # الحصول على تفاصيل الحجز إن وجد
-                booking_details = None
-                if is_booked:
-                    booking_details = bookings.filter(
-                        start_datetime__lte=slot_datetime,
-                        end_datetime__gt=slot_datetime
-                    ).first()
+                slot_datetime = timezone.make_aware(
+                    datetime.combine(selected_date, datetime.strptime(time_str, '%H:%M').time())
+                )
+                booking_details = next(
+                    (booking for booking in bookings
+                     if booking.start_datetime <= slot_datetime < booking.end_datetime),
+                    None
+                )
+                is_booked = booking_details is not None
                 
                 time_slots.append({
                     'time': time_str,
@@ -1957,15 +2050,15 @@ def hall_schedule_management(request, hall_id):
             hall=hall,
             start_datetime__date__range=[week_start, week_end]
         ).order_by('start_datetime')
+        bookings_by_day = _group_bookings_by_day(week_bookings)
         
         # تنظيم البيانات حسب الأيام
         week_days = []
         for i in range(7):
             day_date = week_start + timedelta(days=i)
-            day_bookings = week_bookings.filter(start_datetime__date=day_date)
             week_days.append({
                 'date': day_date,
-                'bookings': day_bookings
+                'bookings': bookings_by_day.get(day_date, [])
             })
         
         context.update({
@@ -1987,6 +2080,7 @@ def hall_schedule_management(request, hall_id):
             hall=hall,
             start_datetime__date__range=[month_start, month_end]
         ).order_by('start_datetime')
+        bookings_by_day = _group_bookings_by_day(month_bookings)
         
         # إنشاء التقويم
         cal = calendar.monthcalendar(selected_date.year, selected_date.month)
@@ -2006,7 +2100,7 @@ def hall_schedule_management(request, hall_id):
                     })
                 else:
                     day_date = selected_date.replace(day=day)
-                    day_bookings = month_bookings.filter(start_datetime__date=day_date)
+                    day_bookings = bookings_by_day.get(day_date, [])
                     is_today = day_date == datetime.now().date()
                     
                     week_data.append({
@@ -2064,6 +2158,10 @@ def block_time_slot(request, hall_id):
             
             return JsonResponse({'success': True, 'message': 'تم حجب الفترة الزمنية بنجاح'})
             
+        except IntegrityError as e:
+            if is_overlap_violation(e):
+                return JsonResponse({'success': False, 'error': 'الفترة محجوزة بالفعل'})
+            return JsonResponse({'success': False, 'error': str(e)})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
@@ -2292,19 +2390,19 @@ def manage_booking_status(request, hall_id, booking_id):
         
         try:
             if action == 'approve':
-                booking.status = 'approved'
+                booking.change_status('approved', actor=request.user)
                 booking.admin_notes = admin_notes
                 booking.save()
                 return JsonResponse({'success': True, 'message': 'تم الموافقة على الحجز'})
             
             elif action == 'reject':
-                booking.status = 'rejected'
+                booking.change_status('rejected', actor=request.user)
                 booking.admin_notes = admin_notes
                 booking.save()
                 return JsonResponse({'success': True, 'message': 'تم رفض الحجز'})
             
             elif action == 'cancel':
-                booking.status = 'cancelled'
+                booking.change_status('cancelled', actor=request.user)
                 booking.admin_notes = admin_notes
                 booking.save()
                 return JsonResponse({'success': True, 'message': 'تم إلغاء الحجز'})
@@ -2321,6 +2419,7 @@ def manage_booking_status(request, hall_id, booking_id):
 
 @login_required
 @user_passes_test(lambda u: u.is_staff or hasattr(u, 'hall_manager'))
+@use_replica()
 def hall_reports(request, hall_id):
     """تقارير القاعة المفصلة"""
     hall = get_object_or_404(Hall, id=hall_id)
@@ -2338,10 +2437,11 @@ def hall_reports(request, hall_id):
     start_date = end_date - timedelta(days=30)
     
     # إحصائيات عامة
-    total_bookings = Booking.objects.filter(hall=hall).count()
+    # الحجوزات المنتهية القديمة في الأرشيف (الموافق عليها والمعلقة لا تُؤرشف)
+    total_bookings = sum(bookings.filter(hall=hall).count() for bookings in booking_sources())
     approved_bookings = Booking.objects.filter(hall=hall, status='approved').count()
     pending_bookings = Booking.objects.filter(hall=hall, status='pending').count()
-    rejected_bookings = Booking.objects.filter(hall=hall, status='rejected').count()
+    rejected_bookings = sum(bookings.filter(hall=hall, status='rejected').count() for bookings in booking_sources())
     
     # إحصائيات الفترة الأخيرة
     recent_bookings = Booking.objects.filter(
@@ -2374,6 +2474,9 @@ def hall_reports(request, hall_id):
     ).values('meal__name').annotate(
         count=Count('meal')
     ).order_by('-count')[:5]
+
+    # وسيط زمن الموافقة من سجل انتقالات الحالة
+    median_approval_hours = BookingStatusEvent.median_approval_hours_by_hall(hall_ids=[hall.id]).get(hall.id)
     
     # الحجوزات حسب الشهر (آخر 6 شهور)
     monthly_bookings = []
@@ -2402,6 +2505,7 @@ def hall_reports(request, hall_id):
         'recent_revenue': recent_revenue,
         'popular_services': popular_services,
         'popular_meals': popular_meals,
+        'median_approval_hours': median_approval_hours,
         'monthly_bookings': monthly_bookings,
         'start_date': start_date,
         'end_date': end_date,
@@ -2411,9 +2515,10 @@ def hall_reports(request, hall_id):
 
 @login_required
 @user_passes_test(lambda u: u.is_staff or hasattr(u, 'hall_manager'))
+@json_endpoint()
 def booking_details_modal(request, booking_id):
     """عرض تفاصيل الحجز في نافذة منبثقة"""
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.select_related('hall'), id=booking_id)
     
     # التحقق من الصلاحيات
     if not request.user.is_staff:
@@ -2421,13 +2526,14 @@ def booking_details_modal(request, booking_id):
             return JsonResponse({'success': False, 'error': 'غير مصرح لك'})
     
     # جلب الخدمات والوجبات المرتبطة بالحجز
-    booking_services = BookingService.objects.filter(booking=booking)
-    booking_meals = BookingMeal.objects.filter(booking=booking)
+    booking_services = list(BookingService.objects.filter(booking=booking).select_related('service'))
+    booking_meals = list(BookingMeal.objects.filter(booking=booking).select_related('meal'))
     
     # حساب التكلفة التفصيلية
     services_cost = sum(bs.service.price * bs.quantity for bs in booking_services)
     meals_cost = sum(bm.meal.price_per_person * bm.quantity for bm in booking_meals)
-    hall_cost = booking.hall.base_price
+    # تكلفة القاعة نفسها حسب مدة الحجز (لا يوجد حقل base_price في Hall)
+    hall_cost = booking.calculate_total_price()
     
     context = {
         'booking': booking,
@@ -2446,129 +2552,3 @@ def booking_details_modal(request, booking_id):
         'success': True,
         'html': html
     })
-
-# ==================== Admin Statistics Views ====================
-
-@staff_member_required
-def admin_statistics_view(request):
-    """صفحة الإحصائيات مع الرسوم البيانية"""
-    # إحصائيات عامة
-    total_halls = Hall.objects.count()
-    total_bookings = Booking.objects.count()
-    total_revenue = Booking.objects.filter(status='completed').aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # إحصائيات الحجوزات حسب الحالة
-    booking_stats = {
-        'pending': Booking.objects.filter(status='pending').count(),
-        'approved': Booking.objects.filter(status='approved').count(),
-        'completed': Booking.objects.filter(status='completed').count(),
-        'cancelled': Booking.objects.filter(status='cancelled').count(),
-        'rejected': Booking.objects.filter(status='rejected').count(),
-    }
-    
-    # إحصائيات القاعات حسب الفئة
-    category_stats = Category.objects.annotate(
-        hall_count=Count('hall'),
-        booking_count=Count('hall__bookings')
-    ).values('name', 'hall_count', 'booking_count')
-    
-    # إحصائيات المحافظات
-    governorate_stats = Governorate.objects.annotate(
-        hall_count=Count('hall'),
-        booking_count=Count('hall__bookings')
-    ).values('name', 'hall_count', 'booking_count')
-    
-    # أفضل القاعات (الأكثر حجزاً)
-    top_halls = Hall.objects.annotate(
-        booking_count=Count('bookings')
-    ).order_by('-booking_count')[:10]
-    
-    # إحصائيات الإيرادات الشهرية (آخر 12 شهر)
-    monthly_revenue = []
-    for i in range(12):
-        date = timezone.now() - timedelta(days=30*i)
-        revenue = Booking.objects.filter(
-            status='completed',
-            created_at__year=date.year,
-            created_at__month=date.month
-        ).aggregate(total=Sum('total_price'))['total'] or 0
-        monthly_revenue.append({
-            'month': date.strftime('%Y-%m'),
-            'revenue': float(revenue)
-        })
-    
-    context = {
-        'title': 'الإحصائيات والتقارير',
-        'total_halls': total_halls,
-        'total_bookings': total_bookings,
-        'total_revenue': total_revenue,
-        'booking_stats': booking_stats,
-        'category_stats': list(category_stats),
-        'governorate_stats': list(governorate_stats),
-        'top_halls': top_halls,
-        'monthly_revenue': monthly_revenue[::-1],  # عكس الترتيب للحصول على الأحدث أولاً
-    }
-    
-    return render(request, 'admin/statistics.html', context)
-
-@staff_member_required
-def admin_bookings_chart_api(request):
-    """API للحصول على بيانات مخطط الحجوزات"""
-    # بيانات الحجوزات حسب الشهر (آخر 12 شهر)
-    months = []
-    bookings_data = []
-    
-    for i in range(12):
-        date = timezone.now() - timedelta(days=30*i)
-        month_name = date.strftime('%Y-%m')
-        booking_count = Booking.objects.filter(
-            created_at__year=date.year,
-            created_at__month=date.month
-        ).count()
-        
-        months.append(month_name)
-        bookings_data.append(booking_count)
-    
-    return JsonResponse({
-        'labels': months[::-1],
-        'data': bookings_data[::-1]
-    })
-
-@staff_member_required
-def admin_revenue_chart_api(request):
-    """API للحصول على بيانات مخطط الإيرادات"""
-    # بيانات الإيرادات حسب الشهر (آخر 12 شهر)
-    months = []
-    revenue_data = []
-    
-    for i in range(12):
-        date = timezone.now() - timedelta(days=30*i)
-        month_name = date.strftime('%Y-%m')
-        revenue = Booking.objects.filter(
-            status='completed',
-            created_at__year=date.year,
-            created_at__month=date.month
-        ).aggregate(total=Sum('total_price'))['total'] or 0
-        
-        months.append(month_name)
-        revenue_data.append(float(revenue))
-    
-    return JsonResponse({
-        'labels': months[::-1],
-        'data': revenue_data[::-1]
-    })
-
-@staff_member_required
-def admin_halls_chart_api(request):
-    """API للحصول على بيانات مخطط القاعات حسب الفئة"""
-    categories = Category.objects.annotate(
-        hall_count=Count('hall')
-    ).values('name', 'hall_count')
-    
-    labels = [cat['name'] for cat in categories]
-    data = [cat['hall_count'] for cat in categories]
-    
-    return JsonResponse({
-        'labels': labels,
-        'data': data
-    })
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+معاملات الكتابة الساخنة على SQLite.
+
+SQLite يسمح بكاتب واحد في كل لحظة. المعاملة العادية (DEFERRED) تأخذ قفل القراءة أولاً، فإذا حاولت
+الكتابة بعد القراءة وكاتب آخر يسبقها فشلت فوراً بـ "database is locked" دون انتظار ``timeout``.
+``immediate_atomic`` تبدأ المعاملة بـ ``BEGIN IMMEDIATE`` فيُحجز قفل الكتابة عند BEGIN وينتظر البقية
+حتى ``timeout``؛ وتبقى بقية المعاملات على DEFERRED فلا تحجز القراءات قفل الكتابة.
+
+انتظار ``timeout`` استطلاع دوري بفواصل متزايدة، لذا ``serialized_write`` يصفّ كتابات خيوط العملية
+الواحدة خلف قفل Python فيتسلمها الكاتب التالي فور انتهاء السابق، ويبقى ``timeout`` لتنافس العمليات المختلفة.
+
+على PostgreSQL وغيره تكون الاثنتان معاملة ``atomic`` عادية.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from .metrics import db_write_wait
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(using):
+    with _locks_guard:
+        return _locks.setdefault(using, threading.Lock())
+
+
+def serializes(using=DEFAULT_DB_ALIAS):
+    """هل تُصفّ كتابات هذا الاتصال خلف قفل العملية"""
+    return connections[using].vendor == 'sqlite' and getattr(settings, 'SQLITE_SERIALIZE_WRITES', True)
+
+
+@contextmanager
+def immediate_atomic(using=DEFAULT_DB_ALIAS):
+    """معاملة ``atomic`` تحجز قفل الكتابة عند BEGIN على SQLite"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        with transaction.atomic(using=using):
+            yield
+        return
+    if connection.in_atomic_block:
+        # المعاملة الخارجية بدأت فعلاً؛ بدون نقطة حفظ لأن التراجع الجزئي لا يفيد كاتباً وحيداً
+        with transaction.atomic(using=using, savepoint=False):
+            yield
+        return
+
+    # transaction_mode يُقرأ من OPTIONS عند فتح الاتصال، فيُفتح أولاً ثم يُغيَّر لهذه المعاملة فقط
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
+
+
+@contextmanager
+def serialized_write(using=DEFAULT_DB_ALIAS):
+    """معاملة كتابة تنتظر دورها خلف كتابات العملية الأخرى على نفس قاعدة SQLite"""
+    # داخل معاملة قائمة يكون قفل SQLite محجوزاً أصلاً، وانتظار قفل العملية قد يعلق خلف من ينتظرنا
+    if not serializes(using) or connections[using].in_atomic_block:
+        with immediate_atomic(using):
+            yield
+        return
+
+    lock = _lock_for(using)
+    started = time.perf_counter()
+    if not lock.acquire(timeout=getattr(settings, 'SQLITE_WRITE_LOCK_TIMEOUT', 30)):
+        raise OperationalError('database is locked (timed out waiting for the in-process write lock)')
+    db_write_wait.observe(time.perf_counter() - started, database=using)
+    try:
+        with immediate_atomic(using):
+            yield
+    finally:
+        lock.release()